@@ -5,27 +5,316 @@ Agente Colaborativo CAIXA - Sistema Completo de Consultas e Análise de Crédito
 Baseado no Manual Geral de Concessão de Crédito Imobiliário para Pessoa Física - Versão Completa
 """
 
+import argparse
+import contextlib
+import copy
+import hashlib
 import json
 import re
-import sqlite3
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union, Any
 import logging
 
+from armazenamento import (
+    BACKENDS_ARMAZENAMENTO, COLUNAS_EXPORTACAO, ArmazenamentoAuditoria, ArmazenamentoSQLite,
+    CursorPerguntas, criar_armazenamento, mensagens_resultado, resultado_sem_mensagens
+)
+from auditoria import FilaAuditoria
+from autocompletar import TrieSugestoes
+from busca_historico import destacar
+from busca_semantica import IndiceSemantico, extrair_trechos
+from catalogo_impedimentos import IMPEDIMENTOS_IMOVEL, CatalogoImpedimentos
+from controle_admissao import PRIORIDADE_INTERATIVA, PRIORIDADE_LOTE, ControleAdmissao
+from corretor_ortografico import CorretorOrtografico, LexicoPortugues
+from exportacao import FORMATOS_EXPORTACAO, exportar_auditoria, exportar_para_arquivo
+from instrumentacao import Instrumentacao
+from metricas import MetricasAgente
+from modelo_score import ModeloScore
+from normalizacao_texto import STOPWORDS, tokenizar
+from perfilamento import Perfilador
+from rastro_analise import INDICE_REGRA, novo_rastro
+from regioes import ChaveRegional, IndiceRegional, RegrasRegionais
+from validador_documentos import ValidadorDocumentos
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class AgenteCaixaCreditoCompleto:
-    def __init__(self):
+    # Palavras-chave do roteamento por categoria (a ordem define a prioridade)
+    PALAVRAS_CHAVE_CATEGORIAS = {
+        "programas": ["programa", "pmcmv", "fgts", "sbpe", "recursos livres", "minha casa"],
+        "tomador": ["tomador", "cliente", "proponente", "mutuário", "renda"],
+        "vendedor": ["vendedor", "venda", "pessoa física", "pessoa jurídica"],
+        "imovel": ["imóvel", "imovel", "propriedade", "garantia", "terreno"],
+        "construcao": ["construção", "construcao", "obra", "reforma", "ampliação"],
+        "financiamento": ["financiamento", "taxa", "juros", "amortização", "prazo"],
+        "documentacao": ["documento", "documentação", "certidão", "comprovação"],
+        "tarifas": ["tarifa", "custo", "taxa", "valor", "preço"],
+        "compliance": ["compliance", "conformidade", "pld", "legitimidade"],
+        "procedimentos": ["procedimento", "processo", "fluxo", "operacional"],
+        "canais": ["app", "siopi", "agência", "atendimento", "canal"]
+    }
+
+    # Programa da base -> termo que o seleciona em _consultar_programas_avancado
+    TERMOS_PROGRAMAS = {
+        "PMCMV": "pmcmv",
+        "FGTS": "fgts",
+        "SBPE": "sbpe",
+        "RECURSOS_LIVRES": "recursos livres"
+    }
+
+    # Seções servidas pelo renderizador genérico: categoria -> (caminho na base, título, ícone)
+    SECOES_CONSULTA = {
+        "tomador": (("exigencias_tomador",), "Exigências do Tomador", "👤"),
+        "vendedor": (("exigencias_vendedor",), "Exigências do Vendedor", "🏢"),
+        "imovel": (("exigencias_imovel",), "Exigências do Imóvel", "🏠"),
+        "financiamento": (("parametros_financiamento",), "Parâmetros de Financiamento", "💰"),
+        "documentacao": (("documentacao",), "Documentação Necessária", "📄"),
+        "tarifas": (("tarifas_custos",), "Tarifas e Custos", "💵"),
+        "compliance": (("compliance",), "Compliance e Conformidade", "🛡️"),
+        "procedimentos": (("procedimentos_operacionais",), "Procedimentos Operacionais", "⚙️"),
+        "canais": (("canais_atendimento",), "Canais de Atendimento", "📱")
+    }
+
+    # Termos que apontam para cada subtópico, além do próprio nome da chave (normalizados no índice)
+    SINONIMOS_SUBTOPICOS = {
+        "exigencias_tomador": {
+            "requisitos_gerais": ["cpf", "residencia", "brasileiro", "estrangeiro", "rnm", "rne", "idoneidade", "socio"],
+            "restricoes_cca": ["cca", "correspondente", "restricao", "vedado"],
+            "situacoes_especiais": ["incapaz", "curatela", "curador", "responsavel", "tecnico"]
+        },
+        "exigencias_vendedor": {
+            "pessoa_fisica": ["pf", "cpf", "menor", "emancipado", "idade", "civil"],
+            "pessoa_juridica": ["pj", "cnpj", "empresa", "fundo"],
+            "situacoes_especiais": ["analfabeto", "exterior", "ascendente", "visual"]
+        },
+        "exigencias_imovel": {
+            "requisitos_basicos": ["requisito", "urbana", "ônus", "matricula", "infraestrutura"],
+            "situacoes_aceitas": ["aceito", "aceita", "permitido", "misto", "enfiteuse", "marinha", "madeira"],
+            "impedimentos": ["impedido", "vedado", "proibido", "hotel", "laje", "usufruto", "tombado", "agricola"],
+            "exigencias_regionais": ["regional", "regiao", "uf", "estado", "municipio", "df", "distrito",
+                                     "federal", "brasilia", "deec"]
+        },
+        "parametros_financiamento": {
+            "modalidades_taxa": ["juro", "fixa", "variavel"],
+            "indexadores": ["tr", "ipca", "poupanca", "indice", "correcao"],
+            "sistemas_amortizacao": ["sac", "price", "parcela"],
+            "garantias": ["hipoteca", "alienacao", "fiduciaria"],
+            "seguros_obrigatorios": ["seguro", "mip", "dfi", "dfc"],
+            "carencia": ["ilha", "pura"]
+        },
+        "documentacao": {
+            "tomador": ["comprador", "proponente", "cliente", "renda"],
+            "vendedor": ["vendedor"],
+            "imovel": ["iptu", "escritura", "planta", "matricula"],
+            "especificas_programa": ["fgts", "pmcmv", "programa"]
+        },
+        "tarifas_custos": {
+            "tarifa_avaliacao": ["avaliacao", "vistoria"],
+            "tao": ["acompanhamento", "obra", "construcao"],
+            "tarifa_reavaliacao": ["reavaliacao", "sbpe"],
+            "tarifa_analise_seguro": ["seguro", "apolice", "mip", "dfi"],
+            "ta": ["administracao", "mensal"],
+            "outros_custos": ["iof", "cartório", "cartoriais", "despesa"]
+        },
+        "compliance": {
+            "pld": ["lavagem", "terrorismo", "coaf"],
+            "conflito_interesse": ["conflito"],
+            "legitimidade": ["legitimidade", "legitima"],
+            "pesquisas_cadastrais": ["cadastral", "pesquisa"],
+            "conformidade_proativa": ["proativa"]
+        },
+        "procedimentos_operacionais": {
+            "qualificacao_proposta": ["proposta", "entrevista", "risco", "alcada"],
+            "formalizacao": ["contrato", "assinatura", "registro"],
+            "acompanhamento": ["cobranca", "encargo", "garantia"]
+        },
+        "canais_atendimento": {
+            "app_habitacao": ["app", "aplicativo", "celular", "simulacao"],
+            "siopi": ["siopi", "sistema", "internet"],
+            "agencias_pa": ["agencia", "pa", "posto", "digital"]
+        }
+    }
+
+    # Rótulos exibidos para chaves da base cujo nome não vira um bom título
+    TITULOS_CHAVES = {
+        "exigencias_regionais": "Exigências Regionais",
+        "restricoes_cca": "Restrições ao CCA",
+        "tao": "TAO",
+        "ta": "TA",
+        "pld": "PLD",
+        "app_habitacao": "APP Habitação",
+        "siopi": "SIOPI",
+        "agencias_pa": "Agências e PA",
+        "especificas_programa": "Específicas por Programa",
+        "imovel": "Imóvel",
+        "qualificacao_proposta": "Qualificação da Proposta",
+        "formalizacao": "Formalização",
+        "carencia": "Carência",
+        "sistemas_amortizacao": "Sistemas de Amortização",
+        "seguros_obrigatorios": "Seguros Obrigatórios",
+        "situacoes_especiais": "Situações Especiais",
+        "situacoes_aceitas": "Situações Aceitas",
+        "requisitos_basicos": "Requisitos Básicos",
+        "pessoa_fisica": "Pessoa Física",
+        "pessoa_juridica": "Pessoa Jurídica",
+        "tarifa_avaliacao": "Tarifa de Avaliação",
+        "tarifa_reavaliacao": "Tarifa de Reavaliação",
+        "tarifa_analise_seguro": "Tarifa de Análise de Seguro",
+        "aplicacao": "Aplicação",
+        "conflito_interesse": "Conflito de Interesse",
+        "verificacoes": "Verificações"
+    }
+
+    # Seção da base -> categoria de roteamento, usada pela busca semântica
+    CATEGORIAS_SECOES = {
+        "programas": "programas",
+        "exigencias_tomador": "tomador",
+        "exigencias_vendedor": "vendedor",
+        "exigencias_imovel": "imovel",
+        "modalidades_construcao": "construcao",
+        "parametros_financiamento": "financiamento",
+        "documentacao": "documentacao",
+        "tarifas_custos": "tarifas",
+        "compliance": "compliance",
+        "procedimentos_operacionais": "procedimentos",
+        "canais_atendimento": "canais"
+    }
+
+    # Perguntas curadas (com paráfrases comuns dos analistas) e a categoria que as responde
+    PERGUNTAS_CURADAS = [
+        ("Quais são os programas habitacionais disponíveis?", "programas"),
+        ("Posso usar meu fundo de garantia (FGTS) para comprar o imóvel?", "programas"),
+        ("Como funciona o redutor de taxa para cotistas do FGTS?", "programas"),
+        ("Quem tem direito ao Minha Casa Minha Vida (PMCMV)?", "programas"),
+        ("Qual linha usar para imóvel acima de 1,5 milhão em recursos livres?", "programas"),
+        ("Posso financiar um segundo imóvel pelo SBPE?", "programas"),
+        ("Quais exigências para o tomador?", "tomador"),
+        ("Estrangeiro pode financiar? Precisa de RNM ou RNE?", "tomador"),
+        ("Pessoa sob curatela pode ser proponente?", "tomador"),
+        ("Quais exigências para o vendedor pessoa física ou jurídica?", "vendedor"),
+        ("Menor emancipado pode vender o imóvel?", "vendedor"),
+        ("Que imóveis são aceitos como garantia?", "imovel"),
+        ("Quais impedimentos para imóveis?", "imovel"),
+        ("Quais são as exigências específicas para imóveis no Distrito Federal?", "imovel"),
+        ("Casa de madeira ou pré-fabricada pode ser financiada?", "imovel"),
+        ("Sítio, chácara ou área rural pode ser financiada?", "imovel"),
+        ("Quais documentos para construção individual?", "construcao"),
+        ("Como financiar reforma ou ampliação da casa?", "construcao"),
+        ("Quanto da obra pode estar executada na construção em terreno próprio?", "construcao"),
+        ("Qual a diferença entre SAC e PRICE?", "financiamento"),
+        ("Quais indexadores corrigem o saldo devedor?", "financiamento"),
+        ("Quais seguros são obrigatórios no financiamento?", "financiamento"),
+        ("Quais documentos o comprador precisa apresentar?", "documentacao"),
+        ("Que papéis preciso juntar para dar entrada?", "documentacao"),
+        ("Quais são as tarifas aplicáveis?", "tarifas"),
+        ("Quanto custa a avaliação do imóvel?", "tarifas"),
+        ("As despesas de cartório podem ser financiadas?", "tarifas"),
+        ("Como funciona a conformidade proativa?", "compliance"),
+        ("Quais verificações de lavagem de dinheiro são feitas?", "compliance"),
+        ("Quais são as etapas da proposta até a assinatura do contrato?", "procedimentos"),
+        ("Como acompanhar minha proposta pelo aplicativo?", "canais"),
+        ("Onde cadastrar a proposta no SIOPI?", "canais")
+    ]
+
+    # Resposta rápida quando o controle de admissão recusa a consulta
+    RESPOSTA_OCUPADO = """
+⏳ **Sistema ocupado**
+
+Muitas consultas em andamento ou limite de consultas do usuário atingido.
+Aguarde alguns instantes e tente novamente.
+    """
+
+    # Roteamento semântico, medido buscando cada pergunta curada com ela fora do índice: só com
+    # palavras-chave, 17 de 32 acertam; com a busca semântica decidindo sempre a partir de 0,3,
+    # 24 de 32, mas "taxa de juros" ia para o FGTS e "quais os documentos necessários?" para
+    # construção. Com a palavra-chave prevalecendo abaixo de 0,7 e a busca exigindo 0,35 e a
+    # segunda categoria abaixo de 75% do score, 22 de 32 acertam sem esses desvios.
+    LIMIAR_ROTEAMENTO_SEMANTICO = 0.35
+    RAZAO_MAXIMA_SEGUNDA_CATEGORIA = 0.75
+    LIMIAR_SEMANTICO_PREVALENTE = 0.7
+    LIMIAR_SUGESTAO_SEMANTICA = 0.15
+
+    # Alerta de cada grupo de documentos do validador com pendências
+    ALERTAS_DOCUMENTACAO = {
+        "tomador": "Documentação do tomador incompleta",
+        "vendedor": "Documentação do vendedor incompleta",
+        "imovel": "Documentação do imóvel incompleta",
+        "modalidade": "Documentação da obra incompleta",
+        "programa": "Documentação específica do programa incompleta"
+    }
+
+    # Prefixo das mensagens de impedimento do catálogo do imóvel
+    PREFIXO_IMPEDIMENTO_IMOVEL = "Imóvel: "
+
+    # Colunas das exportações de auditoria (definidas junto aos backends de armazenamento)
+    COLUNAS_EXPORTACAO = COLUNAS_EXPORTACAO
+
+    def __init__(self, caminho_bd: str = 'agente_caixa_completo.db',
+                 controle_admissao: Optional[ControleAdmissao] = None,
+                 instrumentar: bool = False, diretorio_particoes: Optional[str] = None,
+                 meses_retencao: Optional[int] = None,
+                 armazenamento: Optional[ArmazenamentoAuditoria] = None,
+                 rastrear_analises: bool = False, modelo_score: Optional[ModeloScore] = None):
         self.nome = "Agente Colaborativo CAIXA - Versão Completa"
         self.versao = "2.0"
         self.data_criacao = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
+        # Impedimentos do imóvel com código estável e sinônimos (fonte da base, da análise e dos relatórios)
+        self.catalogo_impedimentos = CatalogoImpedimentos(IMPEDIMENTOS_IMOVEL)
+        
         # Base de conhecimento completa extraída do manual
         self.base_conhecimento = self._carregar_base_conhecimento_completa()
         
-        # Inicializar banco de dados
-        self._inicializar_bd()
+        # Índice termo -> subtópicos de cada seção e cache das respostas renderizadas
+        self._indice_subtopicos, self._termos_discriminantes = self._construir_indice_subtopicos()
+        
+        # Exigências do imóvel por UF e município (código IBGE)
+        self.indice_regional = IndiceRegional(self.base_conhecimento["exigencias_imovel"]["exigencias_regionais"])
+        
+        # Documentos exigidos por (programa, operação, tipo de vendedor), pré-calculados em bitsets
+        self.validador_documentos = ValidadorDocumentos(
+            self.base_conhecimento["documentacao"], self.base_conhecimento["modalidades_construcao"],
+            self.base_conhecimento["programas"]
+        )
+        self._cache_secoes = {}
+        
+        # Índice TF-IDF local de trechos da base e perguntas curadas
+        self.indice_semantico = self._construir_indice_semantico()
+        
+        # Dicionário de deleções simétricas para corrigir a digitação antes do roteamento
+        self.corretor = self._construir_corretor()
+        
+        # Limites por usuário e prioridade entre tráfego interativo e em lote
+        self.controle_admissao = controle_admissao or ControleAdmissao()
+        
+        # Histogramas de latência por etapa (desligados por padrão)
+        self.instrumentacao = Instrumentacao(instrumentar)
+        
+        # Perfilamento sob demanda; None mantém o caminho das chamadas intocado
+        self.perfilador: Optional[Perfilador] = None
+        
+        # Rastro por regra em detalhes_analise["rastro"] (padrão das análises sem `rastrear` explícito)
+        self.rastrear_analises = rastrear_analises
+        
+        # Penalidade por regra e limiar de conformidade (configuráveis; padrão 25/5 e 70)
+        self.modelo_score = modelo_score or ModeloScore()
+        
+        # Backend da auditoria (SQLite por padrão; memória ou nulo para testes e lotes)
+        self.armazenamento = armazenamento or ArmazenamentoSQLite(caminho_bd, diretorio_particoes, meses_retencao)
+        
+        # Fila de gravação assíncrona (desligada por padrão)
+        self._fila_auditoria: Optional[FilaAuditoria] = None
+        
+        # Contadores operacionais em memória (exportáveis no formato Prometheus)
+        self.metricas = self._construir_metricas()
+        
+        # Autocompletar: vocabulário da base + perguntas mais frequentes do histórico
+        self.sugestoes_vocabulario, self.sugestoes_perguntas = self._construir_sugestoes()
+        self._cursor_sugestoes: CursorPerguntas = 0
+        self.atualizar_sugestoes()
         
         print(f"🏦 {self.nome} v{self.versao} inicializado com sucesso!")
         print(f"📅 Data de criação: {self.data_criacao}")
@@ -149,31 +438,22 @@ class AgenteCaixaCreditoCompleto:
                     "Imóvel CAIXA/AMV",
                     "De madeira, casa pré-fabricada ou com outras tecnologias construtivas"
                 ],
-                "impedimentos": [
-                    "Bens ou imóveis com contaminação por substâncias químicas",
-                    "Bens de hospitais filantrópicos e Santas Casas de Misericórdia",
-                    "Propriedade(s) cuja(s) matrícula(s) haja averbação de cancelamento, suspensão ou bloqueio",
-                    "Gravado com cláusula de usufruto",
-                    "Tombado ou em fase de tombamento pelo Patrimônio Histórico e Artístico",
-                    "Alienado/hipotecado em garantia de operação de crédito em outra instituição",
-                    "Gravado com cláusula de inalienabilidade ou outro ônus",
-                    "Com destinação agrícola, inclusive sítios, glebas ou granjas",
-                    "Com características de imóvel multifamiliar",
-                    "Próprio da União, Estado, Município ou Autarquia",
-                    "Que já tenha sido de propriedade do proponente nos últimos 02 anos",
-                    "Cujo vendedor seja pessoa jurídica e o proponente seja sócio ou representante legal",
-                    "Sem nenhuma área construída averbada (exceto lote urbanizado)",
-                    "Localizado em condomínio com características de loteamento irregular",
-                    "Sob regime de ocupação",
-                    "Registrados como imóvel do tipo 'Laje'",
-                    "Cuja edificação possua característica de hotel/apart hotel",
-                    "Sob regime de enfiteuse não permitida"
-                ],
-                "exigencias_especificas_df": [
-                    "Declaração de Capacidade de Atendimento das Ligações Individuais",
-                    "Declaração de Execução de Elementos Construtivos – DEEC",
-                    "Verificação pela engenharia da CAIXA das exigências técnicas"
-                ]
+                # Textos do manual, na ordem do catálogo de impedimentos (códigos IMV01...)
+                "impedimentos": self.catalogo_impedimentos.descricoes(),
+                # UF -> exigências da UF e, por código IBGE, dos municípios com regras próprias
+                "exigencias_regionais": {
+                    "DF": {
+                        "nome": "Distrito Federal",
+                        "exigencias": [
+                            "Declaração de Capacidade de Atendimento das Ligações Individuais",
+                            "Declaração de Execução de Elementos Construtivos – DEEC",
+                            "Verificação pela engenharia da CAIXA das exigências técnicas"
+                        ],
+                        "municipios": {
+                            "5300108": {"nome": "Brasília", "exigencias": []}
+                        }
+                    }
+                }
             },
             
             "modalidades_construcao": {
@@ -374,57 +654,178 @@ class AgenteCaixaCreditoCompleto:
             ]
         }
 
-    def _inicializar_bd(self):
-        """Inicializa banco de dados SQLite para histórico de consultas"""
-        self.conn = sqlite3.connect('agente_caixa_completo.db')
-        cursor = self.conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS consultas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                tipo_consulta TEXT,
-                pergunta TEXT,
-                resposta TEXT,
-                usuario TEXT,
-                categoria TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analises_conformidade (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                tipo_operacao TEXT,
-                resultado TEXT,
-                observacoes TEXT,
-                usuario TEXT,
-                score_conformidade REAL
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS historico_decisoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                tipo_decisao TEXT,
-                contexto TEXT,
-                decisao TEXT,
-                justificativa TEXT,
-                usuario TEXT
-            )
-        ''')
-        
-        self.conn.commit()
-
-    def consultar(self, pergunta: str, usuario: str = "sistema") -> str:
+    def rotacionar_particoes(self) -> Dict[str, List[str]]:
+        """Move os meses fechados para suas partições e arquiva as expiradas pela retenção"""
+        self.descarregar_auditoria()
+        return self.armazenamento.rotacionar()
+
+    def obter_analise(self, id_analise: int) -> Optional[Dict]:
+        """Reconstrói o resultado completo de uma análise registrada"""
+        self.descarregar_auditoria()
+        return self.armazenamento.obter_analise(id_analise)
+
+    def paginas_auditoria(self, tabela: str, inicio: Optional[str] = None, fim: Optional[str] = None,
+                          usuario: Optional[str] = None,
+                          tamanho_pagina: int = 5000) -> Iterator[List[Tuple[Any, ...]]]:
+        """Páginas de linhas prontas para exportação (respostas descomprimidas, mensagens agregadas)"""
+        self.descarregar_auditoria()
+        return self.armazenamento.paginas(tabela, inicio, fim, usuario, tamanho_pagina=tamanho_pagina)
+
+    def iterar_decisoes(self, operacao: Optional[str] = None, inicio: Optional[str] = None,
+                        fim: Optional[str] = None, tamanho_pagina: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Percorre o histórico de decisões em ordem cronológica sem carregá-lo inteiro"""
+        self.descarregar_auditoria()
+        nomes = [nome for nome, _ in self.COLUNAS_EXPORTACAO["historico_decisoes"]]
+        for pagina in self.armazenamento.paginas("historico_decisoes", inicio, fim, operacao=operacao,
+                                                 tamanho_pagina=tamanho_pagina):
+            for linha in pagina:
+                registro = dict(zip(nomes, linha))
+                registro["contexto"] = json.loads(registro["contexto"] or "{}")
+                yield registro
+
+    def historico_operacao(self, operacao) -> List[Dict[str, Any]]:
+        """Todas as decisões sobre uma operação (dados ou chave), da mais antiga à mais recente"""
+        chave = operacao if isinstance(operacao, str) else self.chave_operacao(operacao)
+        return list(self.iterar_decisoes(operacao=chave))
+
+    def principais_ocorrencias(self, tipo: str = "impedimento", periodo_dias: int = 30,
+                               limite: int = 10) -> List[Tuple[str, int, int]]:
+        """Impedimentos (ou alertas) mais frequentes no período, como (mensagem, código, quantidade)"""
+        self.descarregar_auditoria()
+        return self.armazenamento.principais_ocorrencias(tipo, self._inicio_periodo(periodo_dias), limite)
+
+    def _rotulo_impedimento(self, mensagem: str) -> str:
+        """Mensagem de impedimento precedida do código do catálogo, quando for um impedimento do imóvel"""
+        if mensagem.startswith(self.PREFIXO_IMPEDIMENTO_IMOVEL):
+            codigo = self.catalogo_impedimentos.codigo(mensagem[len(self.PREFIXO_IMPEDIMENTO_IMOVEL):])
+            if codigo is not None:
+                return f"[{codigo}] {mensagem}"
+        return mensagem
+
+    def reconstruir_busca(self, tamanho_bloco: int = 5000) -> int:
+        """Refaz os índices de busca textual a partir do histórico; retorna as consultas indexadas"""
+        self.descarregar_auditoria()
+        return self.armazenamento.reconstruir_busca(tamanho_bloco)
+
+    def buscar_consultas(self, texto: str, usuario: Optional[str] = None, categoria: Optional[str] = None,
+                         inicio: Optional[str] = None, fim: Optional[str] = None,
+                         limite: int = 20) -> List[Dict[str, Any]]:
+        """Consultas do histórico que contêm todos os termos, da mais relevante para a menos"""
+        self.descarregar_auditoria()
+        encontradas = self.armazenamento.buscar_consultas(texto, usuario, categoria, inicio, fim, limite)
+        termos = tokenizar(texto)
+        for consulta in encontradas:
+            consulta["trecho"] = destacar(consulta["pergunta"] or "", termos)
+        return encontradas
+
+    def buscar_respostas(self, texto: str, limite: int = 10) -> List[Dict[str, Any]]:
+        """Respostas distintas já dadas que contêm todos os termos, com o trecho destacado"""
+        self.descarregar_auditoria()
+        termos = tokenizar(texto)
+        return [
+            {
+                "hash": resposta["hash"],
+                "trecho": destacar(resposta["texto"], termos, janela=30),
+                "relevancia": resposta["relevancia"]
+            }
+            for resposta in self.armazenamento.buscar_respostas(texto, limite)
+        ]
+
+    def obter_resposta(self, resposta_hash: str) -> Optional[str]:
+        """Texto original de uma resposta registrada, pelo hash"""
+        self.descarregar_auditoria()
+        return self.armazenamento.obter_resposta(resposta_hash)
+
+    def historico_consultas(self, usuario: Optional[str] = None, limite: int = 50) -> List[Dict[str, Any]]:
+        """Consultas mais recentes (de um usuário ou de todos) com as respostas descomprimidas"""
+        self.descarregar_auditoria()
+        return self.armazenamento.historico_consultas(usuario, limite)
+
+    def compactar_bd(self):
+        """Devolve ao sistema de arquivos o espaço liberado pela migração (VACUUM)"""
+        self.descarregar_auditoria()
+        self.armazenamento.compactar()
+
+    def consultar(self, pergunta: str, usuario: str = "sistema",
+                  prioridade: int = PRIORIDADE_INTERATIVA) -> str:
         """Realiza consulta avançada na base de conhecimento"""
-        pergunta_lower = pergunta.lower()
-        categoria = self._identificar_categoria(pergunta_lower)
+        with self.controle_admissao.admitir(usuario, "consultar", prioridade) as admitida:
+            if not admitida:
+                return self.RESPOSTA_OCUPADO
+            
+            if self.perfilador is not None:
+                with self.perfilador.perfilar(usuario):
+                    return self._consultar(pergunta, usuario)
+            return self._consultar(pergunta, usuario)
+
+    def _consultar(self, pergunta: str, usuario: str) -> str:
+        """Responde e registra a pergunta (já admitida)"""
+        with self.instrumentacao.etapa("consultar"):
+            resposta, categoria = self._responder(pergunta)
+            
+            # Registrar consulta
+            with self.instrumentacao.etapa("consultar.registrar"):
+                self._registrar_consulta(pergunta, resposta, usuario, categoria)
+        
+        return resposta
+
+    def consultar_lote(self, perguntas: List[str], usuario: str = "sistema",
+                       prioridade: int = PRIORIDADE_LOTE) -> List[str]:
+        """Responde várias perguntas de uma vez, calculando cada pergunta repetida uma única vez"""
+        with self.controle_admissao.admitir(usuario, "consultar_lote", prioridade,
+                                            custo=len(perguntas)) as admitida:
+            if not admitida:
+                return [self.RESPOSTA_OCUPADO] * len(perguntas)
+            with self.instrumentacao.etapa("consultar_lote"):
+                return [resposta for resposta, _ in self._consultar_lote(perguntas, usuario, {})]
+
+    def _consultar_lote(self, perguntas: List[str], usuario: str,
+                        cache: Dict[str, Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Responde o lote reaproveitando `cache` e grava a auditoria numa única transação"""
+        resultados = []
+        falhas = 0
+        for pergunta in perguntas:
+            chave = " ".join(pergunta.lower().split())
+            resultado = cache.get(chave)
+            if resultado is None:
+                falhas += 1
+                resultado = self._responder(pergunta)
+                cache[chave] = resultado
+            resultados.append(resultado)
+        self.metricas.contar_cache("lote", acertos=len(perguntas) - falhas, falhas=falhas)
+        self.metricas.contar_consultas(categoria for _, categoria in resultados)
+        
+        timestamp = datetime.now().isoformat()
+        with self.instrumentacao.etapa("consultar_lote.registrar"):
+            self._registrar_auditoria("consultas", [
+                (timestamp, pergunta, resposta, usuario, categoria)
+                for pergunta, (resposta, categoria) in zip(perguntas, resultados)
+            ])
+        return resultados
+
+    def _responder(self, pergunta: str) -> Tuple[str, str]:
+        """Gera a resposta e a categoria da pergunta, sem registrá-la"""
+        with self.instrumentacao.etapa("consultar.corrigir"):
+            pergunta_lower, correcoes = self.corretor.corrigir(pergunta.lower())
+        if correcoes:
+            logging.info("Correções aplicadas à consulta: %s", correcoes)
         
+        with self.instrumentacao.etapa("consultar.rotear"):
+            categoria, secao = self._rotear(pergunta_lower)
+        
+        with self.instrumentacao.etapa("consultar.renderizar"):
+            resposta = self._renderizar_resposta(categoria, pergunta_lower, secao)
+        
+        if correcoes:
+            resposta = self._anotar_correcoes(correcoes) + resposta
+        
+        return resposta, categoria
+
+    def _renderizar_resposta(self, categoria: str, pergunta_lower: str, secao: Optional[str] = None) -> str:
+        """Encaminha a pergunta ao tratador da categoria (`secao` é a dica do trecho da busca semântica)"""
         # Roteamento inteligente de consultas
         if categoria == "programas":
-            resposta = self._consultar_programas_avancado(pergunta_lower)
+            resposta = self._consultar_programas_avancado(pergunta_lower, secao)
         elif categoria == "tomador":
             resposta = self._consultar_exigencias_tomador_avancado(pergunta_lower)
         elif categoria == "vendedor":
@@ -448,34 +849,146 @@ class AgenteCaixaCreditoCompleto:
         else:
             resposta = self._busca_geral(pergunta_lower)
         
-        # Registrar consulta
-        self._registrar_consulta(pergunta, resposta, usuario, categoria)
-        
         return resposta
 
+    def _rotear(self, pergunta_lower: str) -> Tuple[str, Optional[str]]:
+        """Roteia a pergunta, devolvendo a categoria e a dica de seção do trecho encontrado pela busca semântica
+
+        Palavras-chave de uma única categoria prevalecem, salvo trecho quase
+        idêntico à pergunta; com várias, a busca semântica escolhe entre elas;
+        sem nenhuma, a busca semântica decide se a categoria vencer com folga.
+        """
+        candidatas = [
+            categoria for categoria, palavras_chave in self.PALAVRAS_CHAVE_CATEGORIAS.items()
+            if any(palavra in pergunta_lower for palavra in palavras_chave)
+        ]
+        semantica = self._rotear_semanticamente(pergunta_lower)
+        
+        if len(candidatas) == 1 and (semantica is None or semantica[2] < self.LIMIAR_SEMANTICO_PREVALENTE):
+            return candidatas[0], None
+        if len(candidatas) > 1 and (semantica is None or semantica[2] < self.LIMIAR_SEMANTICO_PREVALENTE):
+            semantica = self._rotear_semanticamente(pergunta_lower, candidatas)
+        if semantica is not None:
+            return semantica[0], semantica[1]
+        return (candidatas[0] if candidatas else "geral"), None
+
     def _identificar_categoria(self, pergunta: str) -> str:
         """Identifica a categoria da pergunta para roteamento inteligente"""
-        categorias = {
-            "programas": ["programa", "pmcmv", "fgts", "sbpe", "recursos livres", "minha casa"],
-            "tomador": ["tomador", "cliente", "proponente", "mutuário", "renda"],
-            "vendedor": ["vendedor", "venda", "pessoa física", "pessoa jurídica"],
-            "imovel": ["imóvel", "imovel", "propriedade", "garantia", "terreno"],
-            "construcao": ["construção", "construcao", "obra", "reforma", "ampliação"],
-            "financiamento": ["financiamento", "taxa", "juros", "amortização", "prazo"],
-            "documentacao": ["documento", "documentação", "certidão", "comprovação"],
-            "tarifas": ["tarifa", "custo", "taxa", "valor", "preço"],
-            "compliance": ["compliance", "conformidade", "pld", "legitimidade"],
-            "procedimentos": ["procedimento", "processo", "fluxo", "operacional"],
-            "canais": ["app", "siopi", "agência", "atendimento", "canal"]
-        }
-        
-        for categoria, palavras_chave in categorias.items():
+        for categoria, palavras_chave in self.PALAVRAS_CHAVE_CATEGORIAS.items():
             if any(palavra in pergunta for palavra in palavras_chave):
                 return categoria
         
         return "geral"
 
-    def _consultar_programas_avancado(self, pergunta: str) -> str:
+    def _construir_corretor(self) -> CorretorOrtografico:
+        """Monta o corretor com o vocabulário da base, das perguntas curadas e do roteamento"""
+        corretor = CorretorOrtografico(lexico=LexicoPortugues())
+        
+        for _, texto in extrair_trechos(self.base_conhecimento):
+            corretor.adicionar_texto(texto)
+        for pergunta, _ in self.PERGUNTAS_CURADAS:
+            corretor.adicionar_texto(pergunta)
+        for palavra in STOPWORDS:
+            corretor.adicionar(palavra)
+        
+        # Palavras-chave do roteamento têm prioridade entre candidatos à mesma distância
+        for palavras_chave in self.PALAVRAS_CHAVE_CATEGORIAS.values():
+            for palavra_chave in palavras_chave:
+                corretor.adicionar_texto(palavra_chave, frequencia=100)
+        
+        return corretor
+
+    def _anotar_correcoes(self, correcoes: List[Tuple[str, str]]) -> str:
+        """Informa ao usuário como a consulta foi interpretada"""
+        trocas = ", ".join(f"{original} → {corrigida}" for original, corrigida in correcoes)
+        return f"\n🔤 _Consulta interpretada com correções: {trocas}_\n"
+
+    def _construir_sugestoes(self) -> Tuple[TrieSugestoes, TrieSugestoes]:
+        """Monta as tries de autocompletar de palavras da base e de perguntas"""
+        vocabulario = TrieSugestoes()
+        for _, texto in extrair_trechos(self.base_conhecimento):
+            for palavra in re.findall(r"[^\W\d_]{4,}", texto.lower()):
+                vocabulario.adicionar(palavra)
+        
+        perguntas = TrieSugestoes()
+        for pergunta, _ in self.PERGUNTAS_CURADAS:
+            perguntas.adicionar(pergunta)
+        
+        return vocabulario, perguntas
+
+    def atualizar_sugestoes(self, limite_perguntas: int = 5000):
+        """Incorpora à trie de perguntas as consultas registradas desde a última atualização"""
+        self.descarregar_auditoria()
+        cursor, frequentes = self.armazenamento.perguntas_frequentes_desde(
+            self._cursor_sugestoes, limite_perguntas
+        )
+        if cursor == self._cursor_sugestoes:
+            return
+        
+        for pergunta, total in frequentes:
+            self.sugestoes_perguntas.adicionar(pergunta, total)
+        
+        self._cursor_sugestoes = cursor
+
+    def sugerir_perguntas(self, prefixo: str, limite: int = 8) -> List[str]:
+        """Sugere perguntas frequentes que começam com o prefixo, completando a última palavra se faltarem"""
+        sugestoes = [texto for texto, _ in self.sugestoes_perguntas.sugerir(prefixo, limite)]
+        
+        inicio, _, ultima_palavra = prefixo.rstrip().rpartition(" ")
+        if len(sugestoes) < limite and ultima_palavra:
+            for palavra, _ in self.sugestoes_vocabulario.sugerir(ultima_palavra, limite - len(sugestoes)):
+                sugestoes.append(f"{inicio} {palavra}".strip())
+        
+        return sugestoes
+
+    def _construir_indice_semantico(self) -> IndiceSemantico:
+        """Indexa cada trecho da base de conhecimento e cada pergunta curada"""
+        indice = IndiceSemantico()
+        
+        for caminho, texto in extrair_trechos(self.base_conhecimento):
+            categoria = self.CATEGORIAS_SECOES.get(caminho[0])
+            if categoria is None:
+                continue
+            # O caminho entra no texto indexado para que "FGTS" ou "impedimentos" contem no trecho
+            contexto = " ".join(caminho).replace("_", " ").lower()
+            secao = caminho[1] if len(caminho) > 1 else None
+            indice.adicionar(f"{contexto} {texto}", {"categoria": categoria, "secao": secao})
+        
+        for pergunta, categoria in self.PERGUNTAS_CURADAS:
+            indice.adicionar(pergunta, {"categoria": categoria})
+        
+        indice.construir()
+        return indice
+
+    def _rotear_semanticamente(self, pergunta: str, categorias: Optional[List[str]] = None
+                               ) -> Optional[Tuple[str, Optional[str], float]]:
+        """Roteia pela busca semântica, devolvendo (categoria, dica de seção, similaridade)
+
+        Com `categorias`, só os trechos dessas categorias concorrem. None se o
+        melhor trecho não alcança o limiar ou se outra categoria fica perto
+        demais dele.
+        """
+        resultados = [
+            (score, documento) for score, documento in self.indice_semantico.buscar(pergunta, k=20)
+            if categorias is None or documento["categoria"] in categorias
+        ]
+        if not resultados or resultados[0][0] < self.LIMIAR_ROTEAMENTO_SEMANTICO:
+            return None
+        
+        similaridade, documento = resultados[0]
+        segunda = next((score for score, outro in resultados[1:] if outro["categoria"] != documento["categoria"]), 0.0)
+        if segunda > self.RAZAO_MAXIMA_SEGUNDA_CATEGORIA * similaridade:
+            return None
+        return documento["categoria"], documento.get("secao"), similaridade
+
+    def buscar_trechos(self, pergunta: str, k: int = 5) -> List[Tuple[float, str, str]]:
+        """Retorna os k trechos mais similares à pergunta como (similaridade, categoria, texto)"""
+        return [
+            (score, documento["categoria"], documento["texto"])
+            for score, documento in self.indice_semantico.buscar(pergunta.lower(), k=k)
+        ]
+
+    def _consultar_programas_avancado(self, pergunta: str, secao: Optional[str] = None) -> str:
         """Consulta avançada sobre programas habitacionais"""
         programas = self.base_conhecimento["programas"]
         
@@ -549,6 +1062,10 @@ class AgenteCaixaCreditoCompleto:
 **Público-Alvo:** Clientes com imóveis de alto valor ou relacionamento existente
             """
         
+        elif secao in self.TERMOS_PROGRAMAS:
+            # Sem programa citado, vale o do trecho que a busca semântica encontrou
+            return self._consultar_programas_avancado(self.TERMOS_PROGRAMAS[secao])
+        
         else:
             return """
 📋 **Programas Habitacionais CAIXA - Visão Completa**
@@ -640,8 +1157,372 @@ Para informações específicas, pergunte sobre o programa desejado.
 Para detalhes específicos, pergunte sobre a modalidade desejada.
             """
 
-    def analisar_conformidade_avancada(self, dados_operacao: Dict, usuario: str = "sistema") -> Dict:
-        """Análise avançada de conformidade com scoring"""
+    def _consultar_exigencias_tomador_avancado(self, pergunta: str) -> str:
+        """Consulta avançada sobre exigências do tomador"""
+        return self._renderizar_secao("tomador", pergunta)
+
+    def _consultar_exigencias_vendedor_avancado(self, pergunta: str) -> str:
+        """Consulta avançada sobre exigências do vendedor"""
+        return self._renderizar_secao("vendedor", pergunta)
+
+    def _consultar_exigencias_imovel_avancado(self, pergunta: str) -> str:
+        """Consulta avançada sobre exigências do imóvel (as regionais, se a pergunta citar UF ou município)"""
+        regiao = self.indice_regional.regiao_na_pergunta(pergunta)
+        if regiao is None:
+            return self._renderizar_secao("imovel", pergunta)
+        return self._renderizar_regiao(self.indice_regional.regras(regiao))
+
+    def _renderizar_regiao(self, regras: RegrasRegionais) -> str:
+        """Exigências regionais aplicáveis, lembrando as nacionais que continuam valendo"""
+        chave_cache = ("imovel", regras.chave)
+        resposta = self._cache_secoes.get(chave_cache)
+        if resposta is not None:
+            self.metricas.contar_cache("secoes", acertos=1)
+            return resposta
+        self.metricas.contar_cache("secoes", falhas=1)
+        
+        caminho, titulo, icone = self.SECOES_CONSULTA["imovel"]
+        exigencias = "\n".join(f"• {exigencia}" for exigencia in regras.exigencias) \
+            or "• Nenhuma exigência regional além das nacionais"
+        nacionais = [self._titulo_chave(s) for s in self._obter_secao(caminho) if s != "exigencias_regionais"]
+        resposta = (
+            f"\n{icone} **{titulo} - {regras.nome}**\n\n"
+            f"**{self._titulo_chave('exigencias_regionais')}:**\n{exigencias}\n\n"
+            f"Valem também as exigências nacionais: {', '.join(nacionais)}\n"
+        )
+        self._cache_secoes[chave_cache] = resposta
+        return resposta
+
+    def _consultar_parametros_financiamento_avancado(self, pergunta: str) -> str:
+        """Consulta avançada sobre parâmetros de financiamento"""
+        return self._renderizar_secao("financiamento", pergunta)
+
+    def _consultar_documentacao_avancada(self, pergunta: str) -> str:
+        """Consulta avançada sobre documentação necessária"""
+        return self._renderizar_secao("documentacao", pergunta)
+
+    def _consultar_tarifas_avancado(self, pergunta: str) -> str:
+        """Consulta avançada sobre tarifas e custos"""
+        return self._renderizar_secao("tarifas", pergunta)
+
+    def _consultar_compliance_avancado(self, pergunta: str) -> str:
+        """Consulta avançada sobre compliance"""
+        return self._renderizar_secao("compliance", pergunta)
+
+    def _consultar_procedimentos_operacionais(self, pergunta: str) -> str:
+        """Consulta sobre procedimentos operacionais"""
+        return self._renderizar_secao("procedimentos", pergunta)
+
+    def _consultar_canais_atendimento(self, pergunta: str) -> str:
+        """Consulta sobre canais de atendimento"""
+        return self._renderizar_secao("canais", pergunta)
+
+    def _obter_secao(self, caminho: Tuple[str, ...]) -> Any:
+        """Retorna o nó da base de conhecimento indicado pelo caminho"""
+        no = self.base_conhecimento
+        for chave in caminho:
+            no = no[chave]
+        return no
+
+    def _construir_indice_subtopicos(self) -> Tuple[Dict[Tuple[str, ...], Dict[str, List[str]]],
+                                                    Dict[Tuple[str, ...], Dict[str, str]]]:
+        """Constrói, para cada seção do renderizador, o índice termo -> subtópicos e os termos discriminantes
+
+        Discriminantes são os termos do nome da chave ou dos sinônimos curados
+        que apontam para um único subtópico da seção; palavras do título (como
+        "operação") só reforçam a pontuação.
+        """
+        indice = {}
+        discriminantes = {}
+        for caminho, _, _ in self.SECOES_CONSULTA.values():
+            secao = self._obter_secao(caminho)
+            sinonimos = self.SINONIMOS_SUBTOPICOS.get(caminho[-1], {})
+            termos_secao: Dict[str, List[str]] = {}
+            proprios: Dict[str, set] = {}
+
+            for subtopico, conteudo in secao.items():
+                termos = set(tokenizar(subtopico.replace("_", " ")))
+                for sinonimo in sinonimos.get(subtopico, []):
+                    termos.update(tokenizar(sinonimo, remover_stopwords=False))
+                proprios[subtopico] = set(termos)
+                if isinstance(conteudo, dict) and isinstance(conteudo.get("nome"), str):
+                    termos.update(tokenizar(conteudo["nome"]))
+                for termo in termos:
+                    termos_secao.setdefault(termo, []).append(subtopico)
+
+            # Termos presentes em todos os subtópicos não ajudam a escolher nenhum
+            indice[caminho] = {
+                termo: subtopicos for termo, subtopicos in termos_secao.items()
+                if len(subtopicos) < len(secao)
+            }
+            discriminantes[caminho] = {
+                termo: subtopicos[0] for termo, subtopicos in termos_secao.items()
+                if len(subtopicos) == 1 and termo in proprios[subtopicos[0]]
+            }
+        return indice, discriminantes
+
+    def _selecionar_subtopicos(self, caminho: Tuple[str, ...], pergunta: str) -> Tuple[str, ...]:
+        """Seleciona os subtópicos da seção citados na pergunta, na ordem da base
+
+        Só os termos da própria pergunta contam: o trecho que a busca semântica
+        encontrou chega ao tratador como dica de seção, nunca no texto. Com
+        algum termo discriminante na pergunta, entram só os subtópicos que
+        casaram um termo próprio; sem nenhum, só os de maior pontuação.
+        """
+        indice = self._indice_subtopicos[caminho]
+        discriminantes = self._termos_discriminantes[caminho]
+        pontuacao: Dict[str, float] = {}
+        citados = set()
+
+        # Termos raros na seção pesam mais que termos compartilhados por vários subtópicos
+        for termo in tokenizar(pergunta):
+            subtopicos = indice.get(termo)
+            if subtopicos:
+                peso = 1.0 / len(subtopicos)
+                for subtopico in subtopicos:
+                    pontuacao[subtopico] = pontuacao.get(subtopico, 0.0) + peso
+            if termo in discriminantes:
+                citados.add(discriminantes[termo])
+
+        if not pontuacao:
+            return ()
+
+        if citados:
+            return tuple(s for s in self._obter_secao(caminho) if s in citados)
+        maior = max(pontuacao.values())
+        return tuple(s for s in self._obter_secao(caminho) if pontuacao.get(s, 0.0) == maior)
+
+    def _renderizar_secao(self, categoria: str, pergunta: str) -> str:
+        """Renderiza a seção da categoria, restrita aos subtópicos citados na pergunta"""
+        caminho, titulo, icone = self.SECOES_CONSULTA[categoria]
+        subtopicos = self._selecionar_subtopicos(caminho, pergunta)
+
+        chave_cache = (categoria, subtopicos)
+        resposta = self._cache_secoes.get(chave_cache)
+        if resposta is None:
+            self.metricas.contar_cache("secoes", falhas=1)
+            resposta = self._formatar_secao(caminho, titulo, icone, subtopicos)
+            self._cache_secoes[chave_cache] = resposta
+        else:
+            self.metricas.contar_cache("secoes", acertos=1)
+        return resposta
+
+    def _formatar_secao(self, caminho: Tuple[str, ...], titulo: str, icone: str,
+                        subtopicos: Tuple[str, ...]) -> str:
+        """Formata em Markdown os subtópicos escolhidos (ou a seção inteira)"""
+        secao = self._obter_secao(caminho)
+        selecionados = subtopicos or tuple(secao)
+
+        blocos = [f"{icone} **{titulo}**"]
+        for subtopico in selecionados:
+            blocos.append("\n".join(self._formatar_subtopico(subtopico, secao[subtopico])))
+
+        restantes = [self._titulo_chave(s) for s in secao if s not in selecionados]
+        if restantes:
+            blocos.append(f"Para mais detalhes, pergunte também sobre: {', '.join(restantes)}")
+
+        return "\n" + "\n\n".join(blocos) + "\n"
+
+    def _formatar_subtopico(self, chave: str, valor: Any) -> List[str]:
+        """Formata um subtópico: listas viram marcadores e dicionários viram campos"""
+        if isinstance(valor, str):
+            return [f"**{self._titulo_chave(chave)}:** {valor}"]
+
+        if isinstance(valor, list):
+            return [f"**{self._titulo_chave(chave)}:**"] + [f"• {item}" for item in valor]
+
+        titulo = valor.get("nome", self._titulo_chave(chave))
+        linhas = [f"**{titulo}**"]
+        for campo, conteudo in valor.items():
+            if campo == "nome":
+                continue
+            if isinstance(conteudo, list):
+                linhas.append(f"• **{self._titulo_chave(campo)}:**")
+                linhas.extend(f"   - {item}" for item in conteudo)
+            elif isinstance(conteudo, dict):
+                linhas.append(f"• **{conteudo.get('nome', self._titulo_chave(campo))}:**")
+                linhas.extend(f"   - {item}" for item in conteudo.get("exigencias", []))
+            else:
+                linhas.append(f"• **{self._titulo_chave(campo)}:** {conteudo}")
+        return linhas
+
+    def _titulo_chave(self, chave: str) -> str:
+        """Converte uma chave da base em rótulo legível"""
+        if chave in self.TITULOS_CHAVES:
+            return self.TITULOS_CHAVES[chave]
+        if chave.isupper():
+            return chave
+        return chave.replace("_", " ").capitalize()
+
+    def analisar_conformidade_avancada(self, dados_operacao: Dict, usuario: str = "sistema",
+                                       prioridade: int = PRIORIDADE_INTERATIVA,
+                                       rastrear: Optional[bool] = None) -> Dict:
+        """Análise avançada de conformidade com scoring
+        
+        Com `rastrear` (padrão: `rastrear_analises` do agente), `detalhes_analise["rastro"]` traz as
+        ocorrências de cada regra avaliada (`rastro_analise.REGRAS_ANALISE`); `descrever_rastro`
+        acrescenta as entradas lidas e a contribuição no score quando o rastro for exibido.
+        """
+        rastrear = self.rastrear_analises if rastrear is None else rastrear
+        with self.controle_admissao.admitir(usuario, "analisar", prioridade) as admitida:
+            if not admitida:
+                return self._resultado_ocupado()
+            
+            if self.perfilador is not None:
+                with self.perfilador.perfilar(usuario):
+                    return self._analisar_conformidade(dados_operacao, usuario, rastrear)
+            return self._analisar_conformidade(dados_operacao, usuario, rastrear)
+
+    def _analisar_conformidade(self, dados_operacao: Dict, usuario: str, rastrear: bool = False) -> Dict:
+        """Avalia e registra a operação (já admitida)"""
+        with self.instrumentacao.etapa("analisar"):
+            resultado = self._avaliar_conformidade(dados_operacao, rastrear=rastrear)
+            
+            # Registrar análise
+            with self.instrumentacao.etapa("analisar.registrar"):
+                self._registrar_analise_avancada(dados_operacao, resultado, usuario)
+        
+        return resultado
+
+    def analisar_conformidade_lote(self, operacoes: List[Dict], usuario: str = "sistema",
+                                   prioridade: int = PRIORIDADE_LOTE,
+                                   rastrear: Optional[bool] = None) -> List[Dict]:
+        """Analisa várias operações, avaliando cada operação repetida uma única vez"""
+        rastrear = self.rastrear_analises if rastrear is None else rastrear
+        with self.controle_admissao.admitir(usuario, "analisar_lote", prioridade,
+                                            custo=len(operacoes)) as admitida:
+            if not admitida:
+                return [self._resultado_ocupado() for _ in operacoes]
+            with self.instrumentacao.etapa("analisar_lote"):
+                return self._analisar_conformidade_lote(operacoes, usuario, rastrear)
+
+    def _analisar_conformidade_lote(self, operacoes: List[Dict], usuario: str,
+                                    rastrear: bool = False) -> List[Dict]:
+        """Avalia o lote e grava as análises numa única transação"""
+        # Operações agrupadas por região: as regras regionais são resolvidas uma vez por grupo
+        grupos: Dict[Optional[ChaveRegional], List[int]] = {}
+        for posicao, dados_operacao in enumerate(operacoes):
+            regiao = self.indice_regional.chave_operacao(dados_operacao.get("imovel") or {})
+            grupos.setdefault(regiao, []).append(posicao)
+        
+        avaliadas: Dict[str, Dict] = {}
+        resultados: List[Dict] = [None] * len(operacoes)
+        for regiao, posicoes in grupos.items():
+            regras_regionais = self.indice_regional.regras(regiao)
+            for posicao in posicoes:
+                dados_operacao = operacoes[posicao]
+                chave = json.dumps(dados_operacao, sort_keys=True)
+                resultado = avaliadas.get(chave)
+                if resultado is None:
+                    resultado = avaliadas[chave] = self._avaliar_conformidade(dados_operacao, regras_regionais,
+                                                                              rastrear)
+                resultados[posicao] = resultado
+        self.metricas.contar_cache("analises_lote", acertos=len(operacoes) - len(avaliadas),
+                                   falhas=len(avaliadas))
+        
+        with self.instrumentacao.etapa("analisar_lote.registrar"):
+            self._registrar_auditoria("analises", [
+                self._linha_analise(dados_operacao, resultado, usuario)
+                for dados_operacao, resultado in zip(operacoes, resultados)
+            ])
+        # Resultados repetidos são o mesmo objeto: a partir da segunda ocorrência, cópias profundas
+        # (listas e rastro inclusos) isolam quem alterar um deles
+        entregues = set()
+        isolados = []
+        for resultado in resultados:
+            if id(resultado) in entregues:
+                resultado = copy.deepcopy(resultado)
+            else:
+                entregues.add(id(resultado))
+            isolados.append(resultado)
+        return isolados
+
+    def validar_documentos(self, programa: str, operacao: str, tipo_vendedor: Optional[str],
+                           documentos: Union[List[str], Dict[str, List[str]]]) -> Dict:
+        """Documentos faltantes, por grupo, para a combinação (programa, operação, tipo de vendedor)"""
+        return self.validador_documentos.validar(programa, operacao, tipo_vendedor, documentos)
+
+    def validar_documentos_lote(self, pedidos: Iterable[Dict]) -> List[Dict]:
+        """Valida uma fila de pedidos {"programa", "operacao", "tipo_vendedor", "documentos"}"""
+        with self.instrumentacao.etapa("validar_documentos_lote"):
+            return self.validador_documentos.validar_lote(pedidos)
+
+    def _resultado_ocupado(self) -> Dict:
+        """Resultado devolvido quando a análise é recusada pelo controle de admissão"""
+        return {
+            "ocupado": True,
+            "conforme": False,
+            "score_conformidade": 0.0,
+            "alertas": ["Sistema ocupado: análise não realizada"],
+            "impedimentos": [],
+            "recomendacoes": ["Aguarde alguns instantes e repita a análise"],
+            "detalhes_analise": {}
+        }
+
+    def estatisticas_admissao(self) -> Dict[str, int]:
+        """Contadores do controle de admissão (admitidas, rejeitadas, fila, execução)"""
+        return self.controle_admissao.estatisticas()
+
+    def _construir_metricas(self) -> MetricasAgente:
+        """Cria os contadores e liga os medidores lidos de outros componentes"""
+        metricas = MetricasAgente()
+        metricas.registrar_fonte_cache(
+            "corretor", lambda: (self.corretor.acertos_cache, self.corretor.falhas_cache)
+        )
+        metricas.registrar_medidor(
+            "agente_fila_auditoria_profundidade", "Linhas de auditoria aguardando gravação",
+            lambda: self._fila_auditoria.profundidade if self._fila_auditoria is not None else 0
+        )
+        metricas.registrar_medidor(
+            "agente_execucoes_em_andamento", "Chamadas ocupando vagas de execução",
+            lambda: self.controle_admissao.estatisticas()["em_execucao"]
+        )
+        metricas.registrar_medidor(
+            "agente_execucoes_na_fila", "Chamadas esperando por uma vaga de execução",
+            lambda: self.controle_admissao.estatisticas()["na_fila"]
+        )
+        metricas.registrar_medidor(
+            "agente_admissoes_rejeitadas", "Chamadas recusadas pelo controle de admissão",
+            lambda: sum(n for nome, n in self.controle_admissao.contadores.items()
+                        if nome.startswith("rejeitadas"))
+        )
+        metricas.registrar_medidor(
+            "agente_cache_secoes_entradas", "Respostas renderizadas em cache",
+            lambda: len(self._cache_secoes)
+        )
+        return metricas
+
+    def exportar_metricas_prometheus(self) -> str:
+        """Contadores do agente no formato de texto do Prometheus, sem consultar o banco"""
+        return self.metricas.exportar_prometheus()
+
+    def ativar_perfilamento(self, fracao: float = 0.0, usuario: Optional[str] = None,
+                            modo: str = "cprofile", janela: float = 60.0,
+                            diretorio: str = "perfis") -> Perfilador:
+        """Perfila uma fração das consultas e análises (ou todas as de um usuário)"""
+        self.desativar_perfilamento()
+        self.perfilador = Perfilador(fracao, usuario, modo, janela, diretorio)
+        return self.perfilador
+
+    def desativar_perfilamento(self) -> Optional[str]:
+        """Desliga o perfilamento e grava o agregado pendente; retorna o último arquivo"""
+        perfilador, self.perfilador = self.perfilador, None
+        if perfilador is None:
+            return None
+        return perfilador.encerrar()
+
+    def metricas_latencia(self) -> Dict[str, Dict[str, float]]:
+        """Percentis de latência e vazão por etapa (vazio se a instrumentação estiver desligada)"""
+        return self.instrumentacao.instantaneo()
+
+    def _avaliar_conformidade(self, dados_operacao: Dict,
+                              regras_regionais: Optional[RegrasRegionais] = None,
+                              rastrear: bool = False) -> Dict:
+        """Avalia a conformidade da operação, sem registrar a análise
+        
+        `regras_regionais` já resolvidas (análise em lote) dispensam a busca no índice regional.
+        """
+        rastro = novo_rastro() if rastrear else None
         resultado = {
             "conforme": True,
             "score_conformidade": 100.0,
@@ -653,44 +1534,47 @@ Para detalhes específicos, pergunte sobre a modalidade desejada.
         
         # Análise detalhada por componente
         if "tomador" in dados_operacao:
-            resultado = self._analisar_tomador_avancado(dados_operacao["tomador"], resultado)
+            with self.instrumentacao.etapa("analisar.tomador"):
+                resultado = self._analisar_tomador_avancado(dados_operacao["tomador"], resultado, rastro)
         
         if "vendedor" in dados_operacao:
-            resultado = self._analisar_vendedor_avancado(dados_operacao["vendedor"], resultado)
+            with self.instrumentacao.etapa("analisar.vendedor"):
+                resultado = self._analisar_vendedor_avancado(dados_operacao["vendedor"], resultado, rastro)
         
         if "imovel" in dados_operacao:
-            resultado = self._analisar_imovel_avancado(dados_operacao["imovel"], resultado)
+            with self.instrumentacao.etapa("analisar.imovel"):
+                resultado = self._analisar_imovel_avancado(dados_operacao["imovel"], resultado, regras_regionais,
+                                                           rastro)
         
         if "programa" in dados_operacao:
-            resultado = self._analisar_programa_avancado(dados_operacao["programa"], resultado)
+            with self.instrumentacao.etapa("analisar.programa"):
+                resultado = self._analisar_programa_avancado(dados_operacao["programa"], resultado, rastro)
         
         if "documentacao" in dados_operacao:
-            resultado = self._analisar_documentacao_avancada(dados_operacao["documentacao"], resultado)
+            with self.instrumentacao.etapa("analisar.documentacao"):
+                resultado = self._analisar_documentacao_avancada(dados_operacao["documentacao"], resultado,
+                                                                 dados_operacao, rastro)
         
         # Calcular score final
-        resultado["score_conformidade"] = self._calcular_score_conformidade(resultado)
-        resultado["conforme"] = resultado["score_conformidade"] >= 70.0 and len(resultado["impedimentos"]) == 0
+        with self.instrumentacao.etapa("analisar.score"):
+            resultado["score_conformidade"] = self._calcular_score_conformidade(resultado)
+            resultado["conforme"] = self.modelo_score.conforme(resultado["score_conformidade"],
+                                                               len(resultado["impedimentos"]))
         
-        # Registrar análise
-        self._registrar_analise_avancada(dados_operacao, resultado, usuario)
+        if rastro is not None:
+            resultado["detalhes_analise"]["rastro"] = rastro
         
         return resultado
 
     def _calcular_score_conformidade(self, resultado: Dict) -> float:
-        """Calcula score de conformidade baseado em pesos"""
-        score_base = 100.0
-        
-        # Penalidades por impedimentos (críticos)
-        score_base -= len(resultado["impedimentos"]) * 25.0
-        
-        # Penalidades por alertas (moderados)
-        score_base -= len(resultado["alertas"]) * 5.0
-        
-        # Garantir que o score não seja negativo
-        return max(0.0, score_base)
+        """Calcula score de conformidade com as penalidades por regra do modelo de score"""
+        return self.modelo_score.pontuar(resultado["impedimentos"], resultado["alertas"])
 
     def gerar_relatorio_detalhado(self, tipo_relatorio: str = "geral", periodo_dias: int = 30) -> str:
         """Gera relatórios detalhados do sistema"""
+        # Relatórios leem o backend: a auditoria pendente precisa estar gravada
+        self.descarregar_auditoria()
+        
         if tipo_relatorio == "consultas":
             return self._relatorio_consultas_detalhado(periodo_dias)
         elif tipo_relatorio == "conformidade":
@@ -700,28 +1584,16 @@ Para detalhes específicos, pergunte sobre a modalidade desejada.
         else:
             return self._relatorio_geral_detalhado(periodo_dias)
 
+    @staticmethod
+    def _inicio_periodo(periodo_dias: int) -> str:
+        """Início do período no mesmo formato ISO (hora local) gravado na auditoria"""
+        return (datetime.now() - timedelta(days=periodo_dias)).isoformat()
+
     def _relatorio_geral_detalhado(self, periodo_dias: int) -> str:
         """Gera relatório geral detalhado"""
-        cursor = self.conn.cursor()
-        
         # Estatísticas gerais
-        cursor.execute('''
-            SELECT COUNT(*) FROM consultas 
-            WHERE datetime(timestamp) >= datetime('now', '-{} days')
-        '''.format(periodo_dias))
-        total_consultas = cursor.fetchone()[0]
-        
-        cursor.execute('''
-            SELECT COUNT(*) FROM analises_conformidade 
-            WHERE datetime(timestamp) >= datetime('now', '-{} days')
-        '''.format(periodo_dias))
-        total_analises = cursor.fetchone()[0]
-        
-        cursor.execute('''
-            SELECT AVG(score_conformidade) FROM analises_conformidade 
-            WHERE datetime(timestamp) >= datetime('now', '-{} days')
-        '''.format(periodo_dias))
-        score_medio = cursor.fetchone()[0] or 0
+        geral = self.armazenamento.agregar("geral", self._inicio_periodo(periodo_dias))
+        total_consultas, total_analises, score_medio = geral["consultas"], geral["analises"], geral["score_medio"]
         
         return f"""
 📊 **Relatório Geral do Agente CAIXA - Últimos {periodo_dias} dias**
@@ -734,7 +1606,7 @@ Para detalhes específicos, pergunte sobre a modalidade desejada.
 **Performance do Sistema:**
 • Base de conhecimento: {len(self.base_conhecimento)} seções
 • Programas cobertos: {len(self.base_conhecimento['programas'])}
-• Tipos de impedimentos catalogados: {len(self.base_conhecimento['exigencias_imovel']['impedimentos'])}
+• Tipos de impedimentos catalogados: {len(self.catalogo_impedimentos)}
 
 **Indicadores de Qualidade:**
 • Taxa de conformidade: {(score_medio/100)*100:.1f}%
@@ -742,6 +1614,112 @@ Para detalhes específicos, pergunte sobre a modalidade desejada.
 • Atualização da base: Atual (Manual CAIXA 2026)
         """
 
+    def _relatorio_consultas_detalhado(self, periodo_dias: int) -> str:
+        """Gera relatório de consultas por categoria, perguntas frequentes e usuários"""
+        agregados = self.armazenamento.agregar("consultas", self._inicio_periodo(periodo_dias))
+        por_categoria, frequentes = agregados["por_categoria"], agregados["frequentes"]
+        usuarios = agregados["usuarios"]
+        
+        total = sum(quantidade for _, quantidade in por_categoria)
+        categorias = "\n".join(
+            f"• {categoria or 'sem categoria'}: {quantidade} ({quantidade / total:.1%})"
+            for categoria, quantidade in por_categoria
+        ) or "• Nenhuma consulta no período"
+        perguntas = "\n".join(
+            f"{i}. {pergunta} ({quantidade}x)" for i, (pergunta, quantidade) in enumerate(frequentes, 1)
+        ) or "• Nenhuma consulta no período"
+        
+        return f"""
+🔍 **Relatório de Consultas - Últimos {periodo_dias} dias**
+
+**Volume:**
+• Total de consultas: {total}
+• Usuários ativos: {usuarios}
+
+**Consultas por Categoria:**
+{categorias}
+
+**Perguntas Mais Frequentes:**
+{perguntas}
+        """
+
+    def _relatorio_conformidade_detalhado(self, periodo_dias: int) -> str:
+        """Gera relatório das análises de conformidade por faixa de score e tipo de operação"""
+        agregados = self.armazenamento.agregar("conformidade", self._inicio_periodo(periodo_dias))
+        total, conformes = agregados["total"], agregados["conformes"]
+        score_medio, score_minimo, score_maximo = (
+            agregados["score_medio"], agregados["score_minimo"], agregados["score_maximo"]
+        )
+        faixas, por_operacao = agregados["faixas"], agregados["por_operacao"]
+        
+        if not total:
+            return f"""
+✅ **Relatório de Conformidade - Últimos {periodo_dias} dias**
+
+• Nenhuma análise de conformidade no período
+        """
+        
+        linhas_faixas = "\n".join(f"• Score {faixa}: {quantidade}" for faixa, quantidade in faixas)
+        linhas_operacoes = "\n".join(
+            f"• {operacao}: {quantidade} análises, score médio {media:.1f}%"
+            for operacao, quantidade, media in por_operacao
+        )
+        linhas_impedimentos = "\n".join(
+            f"• {self._rotulo_impedimento(mensagem)}: {quantidade}"
+            for mensagem, _, quantidade in self.principais_ocorrencias("impedimento", periodo_dias, 5)
+        ) or "• Nenhum impedimento no período"
+        linhas_alertas = "\n".join(
+            f"• {mensagem}: {quantidade}"
+            for mensagem, _, quantidade in self.principais_ocorrencias("alerta", periodo_dias, 5)
+        ) or "• Nenhum alerta no período"
+        
+        return f"""
+✅ **Relatório de Conformidade - Últimos {periodo_dias} dias**
+
+**Resultados:**
+• Total de análises: {total}
+• Operações conformes: {conformes} ({conformes / total:.1%})
+• Score médio: {score_medio:.1f}% (mínimo {score_minimo:.1f}%, máximo {score_maximo:.1f}%)
+
+**Distribuição por Faixa de Score:**
+{linhas_faixas}
+
+**Por Tipo de Operação:**
+{linhas_operacoes}
+
+**Principais Impedimentos:**
+{linhas_impedimentos}
+
+**Principais Alertas:**
+{linhas_alertas}
+        """
+
+    def _relatorio_decisoes_detalhado(self, periodo_dias: int) -> str:
+        """Gera relatório do histórico de decisões"""
+        agregados = self.armazenamento.agregar("decisoes", self._inicio_periodo(periodo_dias))
+        por_tipo, recentes = agregados["por_tipo"], agregados["recentes"]
+        
+        total = sum(quantidade for _, _, quantidade in por_tipo)
+        linhas_tipos = "\n".join(
+            f"• {tipo} → {decisao}: {quantidade}" for tipo, decisao, quantidade in por_tipo
+        ) or "• Nenhuma decisão registrada no período"
+        linhas_recentes = "\n".join(
+            f"• {timestamp[:16]} | {tipo} → {decisao} ({usuario})"
+            for timestamp, tipo, decisao, usuario in recentes
+        ) or "• Nenhuma decisão registrada no período"
+        
+        return f"""
+⚖️ **Relatório de Decisões - Últimos {periodo_dias} dias**
+
+**Total de decisões:** {total}
+
+**Decisões por Tipo:**
+{linhas_tipos}
+
+**Decisões Recentes:**
+{linhas_recentes}
+        """
+
     def obter_ajuda_completa(self) -> str:
         """Retorna guia completo de uso do sistema"""
         return """
@@ -773,6 +1751,14 @@ Para detalhes específicos, pergunte sobre a modalidade desejada.
    • Análise de tendências
    • Métricas de performance
 
+**4. Consultas em Lote**
+   ```python
+   agente.consultar_lote(["pergunta 1", "pergunta 2"], "usuario")
+   ```
+   • Perguntas repetidas calculadas uma única vez
+   • Auditoria gravada em uma transação por lote
+   • Linha de comando: `python agente_caixa_completo.py lote perguntas.jsonl respostas.jsonl`
+
 **📚 Categorias de Consulta:**
 • **Programas:** PMCMV, FGTS, SBPE, Recursos Livres
 • **Exigências:** Tomador, Vendedor, Imóvel
@@ -816,38 +1802,103 @@ Para dúvidas específicas, consulte a documentação do manual CAIXA ou use con
 
     def _registrar_consulta(self, pergunta: str, resposta: str, usuario: str, categoria: str):
         """Registra consulta no banco de dados"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO consultas (timestamp, tipo_consulta, pergunta, resposta, usuario, categoria)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            datetime.now().isoformat(),
-            "consulta_avancada",
-            pergunta,
-            resposta,
-            usuario,
-            categoria
-        ))
-        self.conn.commit()
+        self.metricas.contar_consultas((categoria,))
+        self._registrar_auditoria("consultas", [
+            (datetime.now().isoformat(), pergunta, resposta, usuario, categoria)
+        ])
 
     def _registrar_analise_avancada(self, dados_operacao: Dict, resultado: Dict, usuario: str):
         """Registra análise avançada no banco de dados"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO analises_conformidade (timestamp, tipo_operacao, resultado, observacoes, usuario, score_conformidade)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
+        self._registrar_auditoria("analises", [self._linha_analise(dados_operacao, resultado, usuario)])
+
+    def _linha_analise(self, dados_operacao: Dict, resultado: Dict, usuario: str) -> Tuple[Any, ...]:
+        """Monta a linha de auditoria da análise e a contabiliza nas métricas"""
+        self.metricas.contar_analise(resultado["conforme"], resultado["score_conformidade"])
+        return (
             datetime.now().isoformat(),
             dados_operacao.get("programa", {}).get("tipo", "N/A"),
-            json.dumps(resultado),
+            json.dumps(resultado_sem_mensagens(resultado)),
             f"Score: {resultado['score_conformidade']:.1f}%, Impedimentos: {len(resultado['impedimentos'])}, Alertas: {len(resultado['alertas'])}",
             usuario,
-            resultado['score_conformidade']
-        ))
-        self.conn.commit()
+            resultado['score_conformidade'],
+            int(resultado['conforme']),
+            tuple(mensagens_resultado(resultado)),
+            self.chave_operacao(dados_operacao)
+        )
+
+    @staticmethod
+    def chave_operacao(dados_operacao: Dict) -> str:
+        """Identificador estável da operação: `id_operacao` informado ou hash do conteúdo"""
+        if dados_operacao.get("id_operacao"):
+            return str(dados_operacao["id_operacao"])
+        conteudo = json.dumps(dados_operacao, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.blake2b(conteudo, digest_size=8).hexdigest()
+
+    def registrar_decisao(self, operacao, decisao: str, justificativa: str, usuario: str,
+                          id_analise: Optional[int] = None, contexto: Optional[Dict] = None,
+                          tipo_decisao: str = "revisao_analista"):
+        """Registra a decisão de um analista sobre uma operação (dados ou chave)
+        
+        Sem `id_analise`, a decisão é ligada à análise mais recente da operação.
+        """
+        chave = operacao if isinstance(operacao, str) else self.chave_operacao(operacao)
+        if id_analise is None:
+            # A análise pode estar na fila assíncrona: gravá-la antes garante a ligação
+            self.descarregar_auditoria()
+        self._registrar_auditoria("decisoes", [(
+            datetime.now().isoformat(), tipo_decisao, chave, id_analise,
+            json.dumps(contexto or {}, ensure_ascii=False), decisao, justificativa, usuario
+        )])
+
+    def ativar_auditoria_assincrona(self, tamanho_lote: int = 500):
+        """Passa a gravar a auditoria em lotes numa thread dedicada, sem bloquear quem registra"""
+        if self._fila_auditoria is None:
+            self._fila_auditoria = FilaAuditoria(self._gravar_auditoria_lote, tamanho_lote)
+
+    def descarregar_auditoria(self):
+        """Aguarda a gravação de toda a auditoria pendente na fila assíncrona"""
+        if self._fila_auditoria is not None:
+            self._fila_auditoria.descarregar()
+
+    def encerrar_auditoria_assincrona(self):
+        """Grava a auditoria pendente e volta ao modo de gravação síncrona"""
+        if self._fila_auditoria is not None:
+            self._fila_auditoria.encerrar()
+            self._fila_auditoria = None
+
+    def _registrar_auditoria(self, tipo: str, linhas: List[Tuple[Any, ...]]):
+        """Envia linhas de auditoria para a fila assíncrona ou as grava imediatamente"""
+        if self._fila_auditoria is None:
+            self._gravar_auditoria_lote(tipo, linhas)
+            return
+        for linha in linhas:
+            self._fila_auditoria.enfileirar(tipo, linha)
+
+    def _gravar_auditoria_lote(self, tipo: str, linhas: List[Tuple[Any, ...]]):
+        """Grava um lote de linhas de auditoria do mesmo tipo no backend, medindo a duração"""
+        inicio = time.perf_counter()
+        self.armazenamento.gravar(tipo, linhas)
+        duracao = time.perf_counter() - inicio
+        self.metricas.observar_gravacao(tipo, duracao)
+        self.instrumentacao.registrar(f"auditoria.{tipo}", duracao)
 
     def _busca_geral(self, pergunta: str) -> str:
         """Busca geral na base de conhecimento"""
+        sugestoes = [
+            f"• {texto}" for score, _, texto in self.buscar_trechos(pergunta, k=3)
+            if score >= self.LIMIAR_SUGESTAO_SEMANTICA
+        ]
+        if sugestoes:
+            return f"""
+🤖 **Agente Colaborativo CAIXA**
+
+Não encontrei uma resposta direta, mas estes trechos do manual parecem relacionados:
+
+{chr(10).join(sugestoes)}
+
+Reformule sua pergunta ou escolha um tópico específico.
+        """
+        
         return """
 🤖 **Agente Colaborativo CAIXA**
 
@@ -875,106 +1926,213 @@ Não encontrei informações específicas para sua consulta.
 Reformule sua pergunta ou escolha um tópico específico.
         """
 
-    def _analisar_tomador_avancado(self, dados_tomador: Dict, resultado: Dict) -> Dict:
+    def _analisar_tomador_avancado(self, dados_tomador: Dict, resultado: Dict,
+                                   rastro: Optional[List[Optional[int]]] = None) -> Dict:
         """Análise avançada de conformidade do tomador"""
         
         # Verificar CPF
-        if not dados_tomador.get("cpf_regular", False):
+        cpf_regular = dados_tomador.get("cpf_regular", False)
+        if not cpf_regular:
             resultado["impedimentos"].append("CPF irregular junto à Receita Federal")
         
         # Verificar nacionalidade
-        if not dados_tomador.get("brasileiro") and not dados_tomador.get("rnm_valida"):
+        brasileiro, rnm_valida = dados_tomador.get("brasileiro"), dados_tomador.get("rnm_valida")
+        if not brasileiro and not rnm_valida:
             resultado["impedimentos"].append("Estrangeiro sem RNM/RNE válida")
         
         # Verificar idoneidade
-        if not dados_tomador.get("idoneidade_cadastral", True):
+        idoneidade = dados_tomador.get("idoneidade_cadastral", True)
+        if not idoneidade:
             resultado["impedimentos"].append("Falta de idoneidade cadastral")
         
         # Verificar residência
-        if not dados_tomador.get("residencia_brasil", True):
+        residencia = dados_tomador.get("residencia_brasil", True)
+        if not residencia:
             resultado["impedimentos"].append("Não comprova residência no Brasil")
         
+        if rastro is not None:
+            rastro[INDICE_REGRA["tomador.cpf"]] = not cpf_regular
+            rastro[INDICE_REGRA["tomador.nacionalidade"]] = not brasileiro and not rnm_valida
+            rastro[INDICE_REGRA["tomador.idoneidade"]] = not idoneidade
+            rastro[INDICE_REGRA["tomador.residencia"]] = not residencia
+        
         return resultado
 
-    def _analisar_vendedor_avancado(self, dados_vendedor: Dict, resultado: Dict) -> Dict:
+    def _analisar_vendedor_avancado(self, dados_vendedor: Dict, resultado: Dict,
+                                    rastro: Optional[List[Optional[int]]] = None) -> Dict:
         """Análise avançada de conformidade do vendedor"""
         
         if dados_vendedor.get("tipo") == "PF":
-            if not dados_vendedor.get("maior_idade", True):
+            maior_idade = dados_vendedor.get("maior_idade", True)
+            if not maior_idade:
                 resultado["impedimentos"].append("Vendedor menor de idade sem emancipação")
             
-            if not dados_vendedor.get("cpf_regular", False):
+            cpf_regular = dados_vendedor.get("cpf_regular", False)
+            if not cpf_regular:
                 resultado["impedimentos"].append("CPF do vendedor irregular")
+            
+            if rastro is not None:
+                rastro[INDICE_REGRA["vendedor.maioridade"]] = not maior_idade
+                rastro[INDICE_REGRA["vendedor.cpf"]] = not cpf_regular
         
         elif dados_vendedor.get("tipo") == "PJ":
-            if not dados_vendedor.get("cnpj_regular", False):
+            cnpj_regular = dados_vendedor.get("cnpj_regular", False)
+            if not cnpj_regular:
                 resultado["impedimentos"].append("CNPJ do vendedor irregular")
+            
+            if rastro is not None:
+                rastro[INDICE_REGRA["vendedor.cnpj"]] = not cnpj_regular
         
         return resultado
 
-    def _analisar_imovel_avancado(self, dados_imovel: Dict, resultado: Dict) -> Dict:
+    def _analisar_imovel_avancado(self, dados_imovel: Dict, resultado: Dict,
+                                  regras_regionais: Optional[RegrasRegionais] = None,
+                                  rastro: Optional[List[Optional[int]]] = None) -> Dict:
         """Análise avançada de conformidade do imóvel"""
         
         # Verificar localização
-        if not dados_imovel.get("area_urbana", True):
+        area_urbana = dados_imovel.get("area_urbana", True)
+        if not area_urbana:
             resultado["impedimentos"].append("Imóvel não localizado em área urbana")
         
         # Verificar infraestrutura
-        if not dados_imovel.get("infraestrutura_completa", True):
+        infraestrutura = dados_imovel.get("infraestrutura_completa", True)
+        if not infraestrutura:
             resultado["alertas"].append("Verificar infraestrutura básica (água, esgoto, energia)")
         
         # Verificar ônus
-        if dados_imovel.get("possui_onus", False):
+        possui_onus = dados_imovel.get("possui_onus", False)
+        if possui_onus:
             resultado["alertas"].append("Imóvel possui ônus - verificar se impeditivo")
         
         # Verificar matrícula
-        if not dados_imovel.get("matricula_regular", True):
+        matricula_regular = dados_imovel.get("matricula_regular", True)
+        if not matricula_regular:
             resultado["impedimentos"].append("Matrícula irregular ou inexistente")
         
-        # Verificar impedimentos específicos
-        impedimentos_imovel = dados_imovel.get("impedimentos", [])
-        for impedimento in impedimentos_imovel:
-            if impedimento in self.base_conhecimento["exigencias_imovel"]["impedimentos"]:
-                resultado["impedimentos"].append(f"Imóvel: {impedimento}")
+        # Verificar impedimentos específicos: código, texto do manual ou sinônimo, por busca no catálogo
+        informados = dados_imovel.get("impedimentos", [])
+        codigos, nao_catalogados = self.catalogo_impedimentos.resolver(informados)
+        for codigo in codigos:
+            resultado["impedimentos"].append(f"{self.PREFIXO_IMPEDIMENTO_IMOVEL}{self.catalogo_impedimentos.descricao(codigo)}")
+        if codigos:
+            resultado["detalhes_analise"]["codigos_impedimentos"] = codigos
+        if nao_catalogados:
+            resultado["detalhes_analise"]["impedimentos_nao_catalogados"] = nao_catalogados
+        
+        # Exigências da UF/município do imóvel, por busca no índice regional
+        if regras_regionais is None:
+            regras_regionais = self.indice_regional.regras(self.indice_regional.chave_operacao(dados_imovel))
+        if regras_regionais is not None:
+            resultado["recomendacoes"].extend(regras_regionais.recomendacoes)
+            resultado["detalhes_analise"]["regiao"] = regras_regionais.nome
+        
+        if rastro is not None:
+            rastro[INDICE_REGRA["imovel.area_urbana"]] = not area_urbana
+            rastro[INDICE_REGRA["imovel.infraestrutura"]] = not infraestrutura
+            rastro[INDICE_REGRA["imovel.onus"]] = bool(possui_onus)
+            rastro[INDICE_REGRA["imovel.matricula"]] = not matricula_regular
+            rastro[INDICE_REGRA["imovel.impedimentos"]] = len(codigos)
+            rastro[INDICE_REGRA["imovel.regiao"]] = (len(regras_regionais.recomendacoes)
+                                                     if regras_regionais is not None else 0)
         
         return resultado
 
-    def _analisar_programa_avancado(self, dados_programa: Dict, resultado: Dict) -> Dict:
+    def _analisar_programa_avancado(self, dados_programa: Dict, resultado: Dict,
+                                    rastro: Optional[List[Optional[int]]] = None) -> Dict:
         """Análise avançada de conformidade do programa escolhido"""
         
         programa = dados_programa.get("tipo")
         
         if programa == "FGTS":
-            if not dados_programa.get("tempo_fgts_anos", 0) >= 3:
+            tempo_fgts = dados_programa.get("tempo_fgts_anos", 0)
+            if not tempo_fgts >= 3:
                 resultado["impedimentos"].append("FGTS: Menos de 3 anos de trabalho sob regime FGTS")
             
-            if not dados_programa.get("saldo_suficiente", False):
+            saldo_suficiente = dados_programa.get("saldo_suficiente", False)
+            if not saldo_suficiente:
                 resultado["alertas"].append("FGTS: Verificar saldo mínimo de 10% do valor de avaliação")
+            
+            if rastro is not None:
+                rastro[INDICE_REGRA["programa.fgts_tempo"]] = not tempo_fgts >= 3
+                rastro[INDICE_REGRA["programa.fgts_saldo"]] = not saldo_suficiente
         
         elif programa == "PMCMV":
-            if not dados_programa.get("renda_familiar_compativel", True):
+            renda_compativel = dados_programa.get("renda_familiar_compativel", True)
+            if not renda_compativel:
                 resultado["alertas"].append("PMCMV: Verificar compatibilidade da renda familiar")
+            
+            if rastro is not None:
+                rastro[INDICE_REGRA["programa.pmcmv_renda"]] = not renda_compativel
         
         return resultado
 
-    def _analisar_documentacao_avancada(self, dados_documentacao: Dict, resultado: Dict) -> Dict:
-        """Análise avançada da documentação"""
+    def _analisar_documentacao_avancada(self, dados_documentacao: Dict, resultado: Dict,
+                                        dados_operacao: Optional[Dict] = None,
+                                        rastro: Optional[List[Optional[int]]] = None) -> Dict:
+        """Análise avançada da documentação
+        
+        Com a lista `documentos` entregues, os faltantes vêm do validador (programa e tipo de
+        vendedor da operação, `operacao` da documentação); sem ela, valem os indicadores de completude.
+        """
+        
+        if "documentos" in dados_documentacao:
+            dados_operacao = dados_operacao or {}
+            operacao = dados_documentacao.get("operacao", "aquisicao")
+            faltantes: Dict[str, List[str]] = {}
+            try:
+                validacao = self.validador_documentos.validar(
+                    (dados_operacao.get("programa") or {}).get("tipo"),
+                    operacao,
+                    (dados_operacao.get("vendedor") or {}).get("tipo"),
+                    dados_documentacao["documentos"]
+                )
+            except ValueError as erro:
+                resultado["alertas"].append(f"Documentação não validada: {erro}")
+                validacao = None
+            else:
+                faltantes = validacao["faltantes"]
+                for grupo in faltantes:
+                    resultado["alertas"].append(self.ALERTAS_DOCUMENTACAO[grupo])
+                if faltantes:
+                    resultado["detalhes_analise"]["documentos_faltantes"] = faltantes
+                if validacao["nao_reconhecidos"]:
+                    resultado["detalhes_analise"]["documentos_nao_reconhecidos"] = validacao["nao_reconhecidos"]
+            if rastro is not None:
+                # Tomador, vendedor e imóvel têm regra própria; obra, programa e erro de validação ficam em "documentos"
+                rastro[INDICE_REGRA["documentacao.tomador"]] = "tomador" in faltantes
+                rastro[INDICE_REGRA["documentacao.vendedor"]] = "vendedor" in faltantes
+                rastro[INDICE_REGRA["documentacao.imovel"]] = "imovel" in faltantes
+                rastro[INDICE_REGRA["documentacao.documentos"]] = (
+                    ("modalidade" in faltantes) + ("programa" in faltantes) + (validacao is None)
+                )
+            return resultado
         
-        if not dados_documentacao.get("tomador_completa", True):
+        tomador_completa = dados_documentacao.get("tomador_completa", True)
+        if not tomador_completa:
             resultado["alertas"].append("Documentação do tomador incompleta")
         
-        if not dados_documentacao.get("vendedor_completa", True):
+        vendedor_completa = dados_documentacao.get("vendedor_completa", True)
+        if not vendedor_completa:
             resultado["alertas"].append("Documentação do vendedor incompleta")
         
-        if not dados_documentacao.get("imovel_completa", True):
+        imovel_completa = dados_documentacao.get("imovel_completa", True)
+        if not imovel_completa:
             resultado["alertas"].append("Documentação do imóvel incompleta")
         
+        if rastro is not None:
+            rastro[INDICE_REGRA["documentacao.tomador"]] = not tomador_completa
+            rastro[INDICE_REGRA["documentacao.vendedor"]] = not vendedor_completa
+            rastro[INDICE_REGRA["documentacao.imovel"]] = not imovel_completa
+        
         return resultado
 
     def __del__(self):
-        """Fecha conexão com banco de dados"""
-        if hasattr(self, 'conn'):
-            self.conn.close()
+        """Grava a auditoria pendente e fecha o backend"""
+        if getattr(self, '_fila_auditoria', None) is not None:
+            self._fila_auditoria.encerrar()
+        if hasattr(self, 'armazenamento'):
+            self.armazenamento.fechar()
 
 
 # Função para demonstração completa
@@ -996,9 +2154,9 @@ def demonstracao_completa():
     ]
     
     print("📋 **Exemplos de Consultas Avançadas:**\n")
-    for i, pergunta in enumerate(consultas_avancadas, 1):
+    respostas = agente.consultar_lote(consultas_avancadas, "demo_avancada")
+    for i, (pergunta, resposta) in enumerate(zip(consultas_avancadas, respostas), 1):
         print(f"**{i}. {pergunta}**")
-        resposta = agente.consultar(pergunta, "demo_avancada")
         print(resposta)
         print("-" * 80)
     
@@ -1074,5 +2232,194 @@ def demonstracao_completa():
     print("📖 Use agente.obter_ajuda_completa() para guia detalhado")
 
 
+def _ler_perguntas_jsonl(arquivo) -> Iterator[Tuple[Any, str]]:
+    """Lê (id, pergunta) de cada linha JSONL: objeto com "pergunta" (e "id" opcional) ou string"""
+    for numero, linha in enumerate(arquivo, 1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        registro = json.loads(linha)
+        if isinstance(registro, str):
+            yield numero, registro
+        else:
+            yield registro.get("id", numero), registro["pergunta"]
+
+
+def processar_lote_jsonl(agente: AgenteCaixaCreditoCompleto, entrada, saida,
+                         usuario: str = "lote", tamanho_lote: int = 1000,
+                         limite_cache: int = 100000) -> Dict[str, int]:
+    """Responde em fluxo um arquivo JSONL de perguntas, gravando uma resposta JSONL por linha"""
+    cache: Dict[str, Tuple[str, str]] = {}
+    estatisticas = {"perguntas": 0, "distintas": 0}
+
+    def responder(bloco: List[Tuple[Any, str]]):
+        antes = len(cache)
+        resultados = agente._consultar_lote([pergunta for _, pergunta in bloco], usuario, cache)
+        estatisticas["perguntas"] += len(bloco)
+        estatisticas["distintas"] += len(cache) - antes
+        for (identificador, pergunta), (resposta, categoria) in zip(bloco, resultados):
+            saida.write(json.dumps({
+                "id": identificador,
+                "pergunta": pergunta,
+                "categoria": categoria,
+                "resposta": resposta
+            }, ensure_ascii=False) + "\n")
+
+    bloco: List[Tuple[Any, str]] = []
+    for item in _ler_perguntas_jsonl(entrada):
+        bloco.append(item)
+        if len(bloco) >= tamanho_lote:
+            responder(bloco)
+            bloco = []
+            # Limita a memória em arquivos com milhões de perguntas distintas
+            if len(cache) > limite_cache:
+                cache.clear()
+    if bloco:
+        responder(bloco)
+
+    return estatisticas
+
+
+def validar_documentos_jsonl(agente: AgenteCaixaCreditoCompleto, entrada, saida,
+                             tamanho_lote: int = 1000) -> Dict[str, int]:
+    """Valida em fluxo uma fila JSONL de pedidos, gravando um resultado JSONL por linha"""
+    estatisticas = {"pedidos": 0, "completos": 0, "erros": 0}
+
+    def validar(bloco: List[Dict]):
+        for pedido, resultado in zip(bloco, agente.validar_documentos_lote(bloco)):
+            estatisticas["pedidos"] += 1
+            estatisticas["completos"] += resultado["completa"]
+            estatisticas["erros"] += "erro" in resultado
+            saida.write(json.dumps({"id": pedido.get("id"), **resultado}, ensure_ascii=False) + "\n")
+
+    bloco: List[Dict] = []
+    for numero, linha in enumerate(entrada, 1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        pedido = json.loads(linha)
+        pedido.setdefault("id", numero)
+        bloco.append(pedido)
+        if len(bloco) >= tamanho_lote:
+            validar(bloco)
+            bloco = []
+    if bloco:
+        validar(bloco)
+
+    return estatisticas
+
+
+def main(argv: Optional[List[str]] = None):
+    """Ponto de entrada da linha de comando: demonstração (padrão) ou processamento em lote"""
+    parser = argparse.ArgumentParser(description="Agente Colaborativo CAIXA")
+    subcomandos = parser.add_subparsers(dest="comando")
+
+    lote = subcomandos.add_parser("lote", help="Responde um arquivo JSONL de perguntas")
+    lote.add_argument("entrada", help="Arquivo JSONL de perguntas ('-' para a entrada padrão)")
+    lote.add_argument("saida", help="Arquivo JSONL de respostas ('-' para a saída padrão)")
+    lote.add_argument("--usuario", default="lote", help="Usuário registrado na auditoria")
+    lote.add_argument("--tamanho-lote", type=int, default=1000,
+                      help="Perguntas por transação de auditoria")
+    lote.add_argument("--bd", default="agente_caixa_completo.db", help="Banco SQLite de auditoria")
+    lote.add_argument("--armazenamento", choices=BACKENDS_ARMAZENAMENTO, default="sqlite",
+                      help="Backend da auditoria (memoria/nulo dispensam o disco)")
+
+    compactacao = subcomandos.add_parser(
+        "compactar", help="Migra respostas antigas para a tabela deduplicada e recupera o espaço (VACUUM)"
+    )
+    compactacao.add_argument("--bd", default="agente_caixa_completo.db", help="Banco SQLite de auditoria")
+
+    manutencao = subcomandos.add_parser(
+        "manutencao", help="Move meses fechados para partições mensais e arquiva as expiradas"
+    )
+    manutencao.add_argument("--bd", default="agente_caixa_completo.db", help="Banco SQLite de auditoria")
+    manutencao.add_argument("--particoes", default=None,
+                            help="Diretório das partições (padrão: <bd>_particoes)")
+    manutencao.add_argument("--retencao-meses", type=int, default=None,
+                            help="Meses mantidos consultáveis; partições mais antigas são comprimidas")
+
+    exportacao = subcomandos.add_parser("exportar", help="Exporta uma tabela de auditoria em fluxo")
+    exportacao.add_argument("tabela", choices=list(AgenteCaixaCreditoCompleto.COLUNAS_EXPORTACAO))
+    exportacao.add_argument("saida", help="Arquivo de saída ('-' para a saída padrão)")
+    exportacao.add_argument("--formato", choices=list(FORMATOS_EXPORTACAO), default="csv")
+    exportacao.add_argument("--dias", type=int, default=None, help="Só os últimos N dias (padrão: tudo)")
+    exportacao.add_argument("--usuario", default=None, help="Só as linhas deste usuário")
+    exportacao.add_argument("--bd", default="agente_caixa_completo.db", help="Banco SQLite de auditoria")
+
+    validacao = subcomandos.add_parser(
+        "validar", help="Valida a documentação de uma fila JSONL de pedidos (faltantes por grupo)"
+    )
+    validacao.add_argument("entrada", help="Arquivo JSONL de pedidos ('-' para a entrada padrão)")
+    validacao.add_argument("saida", help="Arquivo JSONL de resultados ('-' para a saída padrão)")
+
+    args = parser.parse_args(argv)
+    if args.comando == "validar":
+        # A validação não grava auditoria
+        with contextlib.redirect_stdout(sys.stderr):
+            agente = AgenteCaixaCreditoCompleto(armazenamento=criar_armazenamento("nulo"))
+        entrada = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+        saida = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8")
+        try:
+            estatisticas = validar_documentos_jsonl(agente, entrada, saida)
+        finally:
+            if entrada is not sys.stdin:
+                entrada.close()
+            if saida is not sys.stdout:
+                saida.close()
+        print(f"✅ {estatisticas['pedidos']} pedidos validados ({estatisticas['completos']} completos, "
+              f"{estatisticas['erros']} com erro)", file=sys.stderr)
+        return
+    if args.comando == "exportar":
+        with contextlib.redirect_stdout(sys.stderr):
+            agente = AgenteCaixaCreditoCompleto(args.bd)
+        filtros = {
+            "inicio": agente._inicio_periodo(args.dias) if args.dias is not None else None,
+            "usuario": args.usuario
+        }
+        if args.saida == "-":
+            total = exportar_auditoria(agente, args.tabela, args.formato, sys.stdout.buffer, **filtros)
+            sys.stdout.buffer.flush()
+        else:
+            _, total = exportar_para_arquivo(agente, args.tabela, args.formato, args.saida, **filtros)
+        print(f"✅ {total} linhas de {args.tabela} exportadas", file=sys.stderr)
+        return
+    if args.comando == "manutencao":
+        with contextlib.redirect_stdout(sys.stderr):
+            agente = AgenteCaixaCreditoCompleto(args.bd, diretorio_particoes=args.particoes,
+                                                meses_retencao=args.retencao_meses)
+        resultado = agente.rotacionar_particoes()
+        print(f"✅ {len(resultado['movidas'])} mês(es) particionado(s), "
+              f"{len(resultado['arquivadas'])} partição(ões) arquivada(s)", file=sys.stderr)
+        return
+    if args.comando == "compactar":
+        with contextlib.redirect_stdout(sys.stderr):
+            agente = AgenteCaixaCreditoCompleto(args.bd)
+        agente.compactar_bd()
+        print("✅ Banco de auditoria compactado", file=sys.stderr)
+        return
+    if args.comando != "lote":
+        demonstracao_completa()
+        return
+
+    # As mensagens do agente vão para stderr para não se misturarem às respostas
+    with contextlib.redirect_stdout(sys.stderr):
+        agente = AgenteCaixaCreditoCompleto(
+            args.bd, armazenamento=criar_armazenamento(args.armazenamento, args.bd)
+        )
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+    saida = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8")
+    try:
+        estatisticas = processar_lote_jsonl(agente, entrada, saida, args.usuario, args.tamanho_lote)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+
+    print(f"✅ {estatisticas['perguntas']} perguntas respondidas "
+          f"({estatisticas['distintas']} distintas)", file=sys.stderr)
+
+
 if __name__ == "__main__":
-    demonstracao_completa()
\ No newline at end of file
+    main()
\ No newline at end of file
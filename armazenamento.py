@@ -0,0 +1,1691 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazenamento da auditoria do Agente Colaborativo CAIXA
+Interface única para gravar, agregar por período e exportar, com backends SQLite (único ou por locatário), em memória e nulo
+"""
+
+import contextlib
+import hashlib
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from busca_historico import expressao_fts, filtro_coluna, termos_indexados
+from normalizacao_texto import tokenizar
+from particionamento import GerenciadorParticoes
+
+BACKENDS_ARMAZENAMENTO = ("sqlite", "fragmentado", "memoria", "nulo")
+
+# Colunas (nome, tipo) das exportações de auditoria; tipos: "inteiro", "real" ou "texto"
+COLUNAS_EXPORTACAO: Dict[str, List[Tuple[str, str]]] = {
+    "consultas": [
+        ("id", "inteiro"), ("timestamp", "texto"), ("usuario", "texto"), ("categoria", "texto"),
+        ("pergunta", "texto"), ("resposta", "texto")
+    ],
+    "analises_conformidade": [
+        ("id", "inteiro"), ("timestamp", "texto"), ("tipo_operacao", "texto"), ("usuario", "texto"),
+        ("score_conformidade", "real"), ("conforme", "inteiro"), ("impedimentos", "texto"),
+        ("alertas", "texto"), ("observacoes", "texto"), ("resultado", "texto")
+    ],
+    "historico_decisoes": [
+        ("id", "inteiro"), ("timestamp", "texto"), ("tipo_decisao", "texto"), ("operacao", "texto"),
+        ("analise_id", "inteiro"), ("decisao", "texto"), ("justificativa", "texto"),
+        ("contexto", "texto"), ("usuario", "texto")
+    ]
+}
+
+# Faixas de score do relatório de conformidade, da mais alta para a mais baixa
+FAIXAS_SCORE = ((90, "90-100"), (70, "70-89"), (50, "50-69"), (0, "0-49"))
+
+# Cursor de perguntas_frequentes_desde: o maior id lido nos backends de um banco só, texto
+# opaco no fragmentado. 0 começa do início; o chamador só guarda e devolve o valor recebido.
+CursorPerguntas = Union[int, str]
+
+
+def mensagens_resultado(resultado: Dict) -> List[Tuple[str, str]]:
+    """(tipo, mensagem) de cada impedimento e alerta do resultado"""
+    return ([("impedimento", mensagem) for mensagem in resultado.get("impedimentos", [])]
+            + [("alerta", mensagem) for mensagem in resultado.get("alertas", [])])
+
+
+def resultado_sem_mensagens(resultado: Dict) -> Dict:
+    """Parte do resultado que continua em JSON (recomendações e detalhes, sem o rastro por regra)"""
+    parte = {chave: valor for chave, valor in resultado.items()
+             if chave not in ("impedimentos", "alertas", "conforme", "score_conformidade")}
+    # O rastro acompanha só a resposta: gravá-lo multiplicaria o JSON de cada análise
+    detalhes = parte.get("detalhes_analise")
+    if detalhes and "rastro" in detalhes:
+        parte["detalhes_analise"] = {chave: valor for chave, valor in detalhes.items() if chave != "rastro"}
+    return parte
+
+
+def montar_analise(id_analise: int, timestamp: str, tipo_operacao: str, resultado_json: str,
+                   usuario: str, score: float, conforme: int, mensagens: List[Tuple[str, str]]) -> Dict:
+    """Reconstrói o resultado completo a partir do JSON e das mensagens gravadas à parte"""
+    resultado = json.loads(resultado_json or "{}")
+    resultado.update(
+        conforme=bool(conforme),
+        score_conformidade=score,
+        impedimentos=[mensagem for tipo, mensagem in mensagens if tipo == "impedimento"],
+        alertas=[mensagem for tipo, mensagem in mensagens if tipo == "alerta"]
+    )
+    return {"id": id_analise, "timestamp": timestamp, "tipo_operacao": tipo_operacao,
+            "usuario": usuario, "resultado": resultado}
+
+
+def decisao_automatica(linha_analise: Tuple[Any, ...], id_analise: int) -> Tuple[Any, ...]:
+    """Linha de decisão que acompanha toda análise: o resultado automático da conformidade"""
+    timestamp, tipo_operacao, _, observacoes, usuario, score, conforme, mensagens, operacao = linha_analise
+    impedimentos = [mensagem for tipo, mensagem in mensagens if tipo == "impedimento"]
+    return (
+        timestamp, "conformidade_automatica", operacao, id_analise,
+        json.dumps({"programa": tipo_operacao, "score": score}, ensure_ascii=False),
+        "aprovada" if conforme else "reprovada",
+        "; ".join(impedimentos) if impedimentos else observacoes,
+        usuario
+    )
+
+
+def agregados_vazios(relatorio: str) -> Dict[str, Any]:
+    """Agregados de um período sem registros, no formato devolvido por `agregar`"""
+    return {
+        "geral": {"consultas": 0, "analises": 0, "score_medio": 0.0},
+        "consultas": {"por_categoria": [], "frequentes": [], "usuarios": 0},
+        "conformidade": {"total": 0, "score_medio": None, "score_minimo": None, "score_maximo": None,
+                         "conformes": 0, "faixas": [], "por_operacao": []},
+        "decisoes": {"por_tipo": [], "recentes": []}
+    }[relatorio]
+
+
+class ArmazenamentoAuditoria:
+    """Contrato dos backends de auditoria usados pelo agente
+
+    Linhas gravadas por tipo:
+      - "consultas": (timestamp, pergunta, resposta, usuario, categoria)
+      - "analises": linha de `_linha_analise` (timestamp, tipo_operacao, resultado_json,
+        observacoes, usuario, score, conforme, mensagens, operacao)
+      - "decisoes": (timestamp, tipo_decisao, operacao, analise_id, contexto_json, decisao,
+        justificativa, usuario); sem analise_id, liga-se à última análise da operação
+
+    Leituras não esperam pela fila assíncrona: quem chama descarrega antes.
+    """
+
+    def gravar(self, tipo: str, linhas: List[Tuple[Any, ...]]):
+        """Grava um lote de linhas do mesmo tipo de uma só vez"""
+        raise NotImplementedError
+
+    def agregar(self, relatorio: str, inicio: str) -> Dict[str, Any]:
+        """Agregados do relatório ("geral", "consultas", "conformidade", "decisoes") desde `inicio`"""
+        raise NotImplementedError
+
+    def principais_ocorrencias(self, tipo: str, inicio: str, limite: int = 10) -> List[Tuple[str, int, int]]:
+        """Impedimentos (ou alertas) mais frequentes desde `inicio`, como (mensagem, código, quantidade)"""
+        raise NotImplementedError
+
+    def paginas(self, tabela: str, inicio: Optional[str] = None, fim: Optional[str] = None,
+                usuario: Optional[str] = None, operacao: Optional[str] = None,
+                tamanho_pagina: int = 5000) -> Iterator[List[Tuple[Any, ...]]]:
+        """Linhas de `COLUNAS_EXPORTACAO[tabela]` em ordem cronológica, uma página por vez"""
+        raise NotImplementedError
+
+    def obter_analise(self, id_analise: int) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def obter_resposta(self, resposta_hash: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def historico_consultas(self, usuario: Optional[str] = None, limite: int = 50) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def perguntas_frequentes_desde(self, ultimo_id: CursorPerguntas,
+                                   limite: int) -> Tuple[CursorPerguntas, List[Tuple[str, int]]]:
+        """Novo cursor e as perguntas mais frequentes registradas depois do cursor `ultimo_id`
+
+        Sem consultas novas, o cursor devolvido é igual ao recebido.
+        """
+        raise NotImplementedError
+
+    def buscar_consultas(self, texto: str, usuario: Optional[str] = None, categoria: Optional[str] = None,
+                         inicio: Optional[str] = None, fim: Optional[str] = None,
+                         limite: int = 20) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def buscar_respostas(self, texto: str, limite: int = 10) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    # Manutenção: sem efeito nos backends que não guardam nada em disco
+
+    def rotacionar(self) -> Dict[str, List[str]]:
+        return {"movidas": [], "arquivadas": []}
+
+    def compactar(self):
+        pass
+
+    def reconstruir_busca(self, tamanho_bloco: int = 5000) -> int:
+        return 0
+
+    def fechar(self):
+        pass
+
+
+class ArmazenamentoSQLite(ArmazenamentoAuditoria):
+    """Backend em disco: SQLite com respostas deduplicadas, mensagens normalizadas,
+    partições mensais e busca FTS5
+
+    A conexão única é compartilhada entre threads (Streamlit, executor HTTP,
+    fila de auditoria) e protegida por uma trava reentrante.
+    """
+
+    # Tabelas de auditoria particionadas por mês (catálogos como `respostas` ficam no banco principal)
+    TABELAS_PARTICIONADAS = ["consultas", "analises_conformidade", "ocorrencias_conformidade", "historico_decisoes"]
+
+    # Seleção (após t.id, t.timestamp) e origem de cada exportação; {esquema} é o banco da partição
+    _SELECAO_EXPORTACAO = {
+        "consultas": (
+            "t.usuario, t.categoria, t.pergunta, t.resposta, r.conteudo",
+            "{esquema}.consultas t LEFT JOIN main.respostas r ON r.hash = t.resposta_hash"
+        ),
+        "analises_conformidade": (
+            "t.tipo_operacao, t.usuario, t.score_conformidade, t.conforme, " + ", ".join(
+                f"""(SELECT group_concat(m.mensagem, ' | ') FROM {{esquema}}.ocorrencias_conformidade o
+                    JOIN main.mensagens_conformidade m ON m.codigo = o.codigo
+                    WHERE o.analise_id = t.id AND o.tipo = '{tipo}')"""
+                for tipo in ("impedimento", "alerta")
+            ) + ", t.observacoes, t.resultado",
+            "{esquema}.analises_conformidade t"
+        ),
+        "historico_decisoes": (
+            "t.tipo_decisao, t.operacao, t.analise_id, t.decisao, t.justificativa, t.contexto, t.usuario",
+            "{esquema}.historico_decisoes t"
+        )
+    }
+
+    # Respostas distintas com hash memorizado (os textos se repetem a partir de poucos modelos)
+    TAMANHO_MAXIMO_CACHE_HASHES = 10000
+
+    def __init__(self, caminho_bd: str = 'agente_caixa_completo.db', diretorio_particoes: Optional[str] = None,
+                 meses_retencao: Optional[int] = None):
+        self.conn = sqlite3.connect(caminho_bd, check_same_thread=False)
+        self._lock_bd = threading.RLock()
+        self._criar_esquema()
+        
+        # Partições mensais da auditoria (o banco principal guarda só o mês corrente)
+        self.particoes = self._inicializar_particoes(caminho_bd, diretorio_particoes, meses_retencao)
+        if self._busca_criada:
+            self.reconstruir_busca()
+
+    def gravar(self, tipo: str, linhas: List[Tuple[Any, ...]]):
+        """Grava um lote de linhas de auditoria do mesmo tipo numa única transação"""
+        if self.particoes is not None:
+            self.particoes.verificar_virada()
+        novas: List[str] = []
+        novos_codigos: Dict[Tuple[str, str], int] = {}
+        with self._lock_bd:
+            if tipo == "decisoes":
+                # Antes da transação: o SQLite não anexa partições com uma transação aberta
+                linhas = self._ligar_decisoes(linhas)
+            with self.conn:
+                if tipo == "consultas":
+                    hashes, novas = self._armazenar_respostas([linha[2] for linha in linhas])
+                    self.conn.executemany('''
+                        INSERT INTO consultas (timestamp, tipo_consulta, pergunta, resposta_hash, usuario, categoria)
+                        VALUES (?, 'consulta_avancada', ?, ?, ?, ?)
+                    ''', [
+                        (timestamp, pergunta, resposta_hash, usuario, categoria)
+                        for (timestamp, pergunta, _, usuario, categoria), resposta_hash in zip(linhas, hashes)
+                    ])
+                    # Sob a trava e na mesma transação, os ids do lote são os últimos da sequência
+                    ultimo_id = self.conn.execute(
+                        "SELECT seq FROM sqlite_sequence WHERE name = 'consultas'"
+                    ).fetchone()[0]
+                    self._indexar_consultas([
+                        (id_consulta, timestamp, usuario, categoria, pergunta, resposta_hash)
+                        for id_consulta, (timestamp, pergunta, _, usuario, categoria), resposta_hash
+                        in zip(range(ultimo_id - len(linhas) + 1, ultimo_id + 1), linhas, hashes)
+                    ])
+                elif tipo == "analises":
+                    self._inserir_analises(linhas, novos_codigos)
+                elif tipo == "decisoes":
+                    self._inserir_decisoes(linhas)
+                else:
+                    raise ValueError(f"Tipo de auditoria desconhecido: {tipo}")
+        self._respostas_gravadas.update(novas)
+        self._codigos_mensagens.update(novos_codigos)
+
+    def agregar(self, relatorio: str, inicio: str) -> Dict[str, Any]:
+        partes = self._por_lote(inicio, lambda fontes: self._agregar(relatorio, inicio, fontes))
+        if len(partes) == 1:
+            return partes[0]
+        mesclado = mesclar_agregados(relatorio, partes)
+        if relatorio == "consultas":
+            # Um usuário aparece em vários lotes: os distintos são contados sobre a união dos lotes
+            usuarios = self._por_lote(inicio, lambda fontes: self.conn.execute(
+                f'SELECT DISTINCT usuario FROM {fontes["consultas"]} WHERE timestamp >= ?', (inicio,)
+            ).fetchall())
+            mesclado["usuarios"] = len({usuario for parte in usuarios for usuario, in parte})
+        return mesclado
+
+    def _agregar(self, relatorio: str, inicio: str, fontes: Dict[str, str]) -> Dict[str, Any]:
+        """Agregados do relatório sobre as fontes já anexadas"""
+        cursor = self.conn.cursor()
+        
+        if relatorio == "geral":
+            cursor.execute(f'''
+                SELECT COUNT(*) FROM {fontes["consultas"]} 
+                WHERE timestamp >= ?
+            ''', (inicio,))
+            total_consultas = cursor.fetchone()[0]
+            
+            cursor.execute(f'''
+                SELECT COUNT(*), AVG(score_conformidade) FROM {fontes["analises_conformidade"]} 
+                WHERE timestamp >= ?
+            ''', (inicio,))
+            total_analises, score_medio = cursor.fetchone()
+            return {"consultas": total_consultas, "analises": total_analises, "score_medio": score_medio or 0}
+        
+        if relatorio == "consultas":
+            cursor.execute(f'''
+                SELECT categoria, COUNT(*) FROM {fontes["consultas"]}
+                WHERE timestamp >= ?
+                GROUP BY categoria ORDER BY COUNT(*) DESC
+            ''', (inicio,))
+            por_categoria = cursor.fetchall()
+            
+            cursor.execute(f'''
+                SELECT pergunta, COUNT(*) FROM {fontes["consultas"]}
+                WHERE timestamp >= ?
+                GROUP BY pergunta ORDER BY COUNT(*) DESC LIMIT 10
+            ''', (inicio,))
+            frequentes = cursor.fetchall()
+            
+            cursor.execute(f'''
+                SELECT COUNT(DISTINCT usuario) FROM {fontes["consultas"]}
+                WHERE timestamp >= ?
+            ''', (inicio,))
+            return {"por_categoria": por_categoria, "frequentes": frequentes, "usuarios": cursor.fetchone()[0]}
+        
+        if relatorio == "conformidade":
+            cursor.execute(f'''
+                SELECT COUNT(*), AVG(score_conformidade), MIN(score_conformidade), MAX(score_conformidade),
+                       SUM(conforme)
+                FROM {fontes["analises_conformidade"]}
+                WHERE timestamp >= ?
+            ''', (inicio,))
+            total, score_medio, score_minimo, score_maximo, conformes = cursor.fetchone()
+            
+            cursor.execute(f'''
+                SELECT CASE
+                           WHEN score_conformidade >= 90 THEN '90-100'
+                           WHEN score_conformidade >= 70 THEN '70-89'
+                           WHEN score_conformidade >= 50 THEN '50-69'
+                           ELSE '0-49'
+                       END AS faixa, COUNT(*)
+                FROM {fontes["analises_conformidade"]}
+                WHERE timestamp >= ?
+                GROUP BY faixa ORDER BY faixa DESC
+            ''', (inicio,))
+            faixas = cursor.fetchall()
+            
+            cursor.execute(f'''
+                SELECT tipo_operacao, COUNT(*), AVG(score_conformidade) FROM {fontes["analises_conformidade"]}
+                WHERE timestamp >= ?
+                GROUP BY tipo_operacao ORDER BY COUNT(*) DESC
+            ''', (inicio,))
+            return {"total": total, "score_medio": score_medio, "score_minimo": score_minimo,
+                    "score_maximo": score_maximo, "conformes": conformes or 0, "faixas": faixas,
+                    "por_operacao": cursor.fetchall()}
+        
+        if relatorio == "decisoes":
+            cursor.execute(f'''
+                SELECT tipo_decisao, decisao, COUNT(*) FROM {fontes["historico_decisoes"]}
+                WHERE timestamp >= ?
+                GROUP BY tipo_decisao, decisao ORDER BY tipo_decisao, COUNT(*) DESC
+            ''', (inicio,))
+            por_tipo = cursor.fetchall()
+            
+            cursor.execute(f'''
+                SELECT timestamp, tipo_decisao, decisao, usuario FROM {fontes["historico_decisoes"]}
+                WHERE timestamp >= ?
+                ORDER BY timestamp DESC LIMIT 10
+            ''', (inicio,))
+            return {"por_tipo": por_tipo, "recentes": cursor.fetchall()}
+    
+        raise ValueError(f"Relatório desconhecido: {relatorio}")
+
+    def perguntas_frequentes_desde(self, ultimo_id: int, limite: int) -> Tuple[int, List[Tuple[str, int]]]:
+        # A sequência do AUTOINCREMENT não recua, mesmo com o mês corrente esvaziado pela rotação
+        with self._lock_bd:
+            linha = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'consultas'").fetchone()
+        maior_id = linha[0] if linha else 0
+        if maior_id <= ultimo_id:
+            return ultimo_id, []
+        
+        # Mês corrente e partições, da mais recente para a mais antiga: os ids crescem com o tempo,
+        # então a primeira partição sem consultas novas encerra a leitura
+        frequentes: Counter = Counter()
+        for mes in self._meses_recentes():
+            contexto = self.particoes.anexar(*mes) if mes is not None else contextlib.nullcontext("main")
+            with self._lock_bd, contexto as esquema:
+                maior_mes = self.conn.execute(f'SELECT MAX(id) FROM {esquema}.consultas').fetchone()[0]
+                if maior_mes is not None and maior_mes > ultimo_id:
+                    # Só as perguntas mais frequentes do intervalo entram, limitando o tamanho da trie
+                    frequentes.update(dict(self.conn.execute(f'''
+                        SELECT pergunta, COUNT(*) AS total FROM {esquema}.consultas
+                        WHERE id > ? AND id <= ?
+                        GROUP BY pergunta
+                        ORDER BY total DESC
+                        LIMIT ?
+                    ''', (ultimo_id, maior_id, limite)).fetchall()))
+            if maior_mes is not None and maior_mes <= ultimo_id:
+                break
+        return maior_id, frequentes.most_common(limite)
+
+    def fechar(self):
+        self.conn.close()
+
+    def _criar_esquema(self):
+        """Cria as tabelas e índices que faltarem e migra os formatos antigos"""
+        cursor = self.conn.cursor()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS consultas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                tipo_consulta TEXT,
+                pergunta TEXT,
+                resposta TEXT,
+                usuario TEXT,
+                categoria TEXT
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analises_conformidade (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                tipo_operacao TEXT,
+                resultado TEXT,
+                observacoes TEXT,
+                usuario TEXT,
+                score_conformidade REAL
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS historico_decisoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                tipo_decisao TEXT,
+                contexto TEXT,
+                decisao TEXT,
+                justificativa TEXT,
+                usuario TEXT
+            )
+        ''')
+        
+        # Respostas gravadas uma única vez, comprimidas e endereçadas pelo hash do conteúdo
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS respostas (
+                hash TEXT PRIMARY KEY,
+                conteudo BLOB
+            )
+        ''')
+        colunas_consultas = {coluna[1] for coluna in cursor.execute('PRAGMA table_info(consultas)')}
+        if 'resposta_hash' not in colunas_consultas:
+            cursor.execute('ALTER TABLE consultas ADD COLUMN resposta_hash TEXT')
+        
+        # Impedimentos e alertas normalizados: catálogo de mensagens e uma linha por ocorrência
+        colunas_analises = {coluna[1] for coluna in cursor.execute('PRAGMA table_info(analises_conformidade)')}
+        if 'conforme' not in colunas_analises:
+            cursor.execute('ALTER TABLE analises_conformidade ADD COLUMN conforme INTEGER')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mensagens_conformidade (
+                codigo INTEGER PRIMARY KEY,
+                tipo TEXT NOT NULL,
+                mensagem TEXT NOT NULL,
+                UNIQUE (tipo, mensagem)
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ocorrencias_conformidade (
+                analise_id INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                codigo INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ocorrencias_codigo ON ocorrencias_conformidade (codigo, timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ocorrencias_periodo ON ocorrencias_conformidade (tipo, timestamp, codigo)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ocorrencias_analise ON ocorrencias_conformidade (analise_id)')
+        
+        # Decisões ligadas à operação (chave estável) e à análise que as originou
+        colunas_decisoes = {coluna[1] for coluna in cursor.execute('PRAGMA table_info(historico_decisoes)')}
+        if 'operacao' not in colunas_decisoes:
+            cursor.execute('ALTER TABLE historico_decisoes ADD COLUMN operacao TEXT')
+        if 'analise_id' not in colunas_decisoes:
+            cursor.execute('ALTER TABLE historico_decisoes ADD COLUMN analise_id INTEGER')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_decisoes_operacao ON historico_decisoes (operacao, timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_decisoes_analise ON historico_decisoes (analise_id)')
+        
+        # Busca textual (FTS5): uma linha por consulta e uma por resposta distinta, na forma normalizada.
+        # Fica no banco principal e cobre também os meses já movidos para partições.
+        self._busca_criada = cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'busca_consultas'"
+        ).fetchone()[0] == 0
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS busca_consultas USING fts5(
+                termos, categoria, usuario,
+                timestamp UNINDEXED, pergunta UNINDEXED, resposta_hash UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        ''')
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS busca_respostas USING fts5(
+                termos, tokenize = 'unicode61 remove_diacritics 2'
+            )
+        ''')
+        
+        # Relatórios filtram por período: índices no timestamp evitam varrer o histórico inteiro
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_consultas_timestamp ON consultas (timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_analises_timestamp ON analises_conformidade (timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_decisoes_timestamp ON historico_decisoes (timestamp)')
+        
+        self.conn.commit()
+        
+        # Texto da resposta -> hash, e hashes já presentes em `respostas`
+        self._hashes_respostas: Dict[str, str] = {}
+        self._respostas_gravadas = set()
+        self._migrar_respostas()
+        
+        # (tipo, mensagem) -> código no catálogo de mensagens de conformidade
+        self._codigos_mensagens: Dict[Tuple[str, str], int] = {
+            (tipo, mensagem): codigo for codigo, tipo, mensagem
+            in self.conn.execute('SELECT codigo, tipo, mensagem FROM mensagens_conformidade')
+        }
+        self._migrar_analises()
+
+    def _migrar_respostas(self, tamanho_bloco: int = 5000) -> int:
+        """Move para `respostas` o texto das consultas gravadas antes da deduplicação"""
+        migradas = 0
+        ultimo_id = 0
+        while True:
+            with self._lock_bd, self.conn:
+                linhas = self.conn.execute('''
+                    SELECT id, resposta FROM consultas
+                    WHERE id > ? AND resposta IS NOT NULL
+                    ORDER BY id LIMIT ?
+                ''', (ultimo_id, tamanho_bloco)).fetchall()
+                if not linhas:
+                    break
+                hashes, novas = self._armazenar_respostas([resposta for _, resposta in linhas])
+                self.conn.executemany(
+                    'UPDATE consultas SET resposta_hash = ?, resposta = NULL WHERE id = ?',
+                    [(resposta_hash, id_consulta) for resposta_hash, (id_consulta, _) in zip(hashes, linhas)]
+                )
+            self._respostas_gravadas.update(novas)
+            ultimo_id = linhas[-1][0]
+            migradas += len(linhas)
+        
+        if migradas:
+            logging.info("%d respostas migradas para a tabela deduplicada", migradas)
+        return migradas
+
+    def _migrar_analises(self, tamanho_bloco: int = 5000) -> int:
+        """Normaliza as análises gravadas com o resultado inteiro em JSON"""
+        migradas = 0
+        ultimo_id = 0
+        while True:
+            with self._lock_bd, self.conn:
+                linhas = self.conn.execute('''
+                    SELECT id, timestamp, resultado FROM analises_conformidade
+                    WHERE id > ? AND conforme IS NULL
+                    ORDER BY id LIMIT ?
+                ''', (ultimo_id, tamanho_bloco)).fetchall()
+                if not linhas:
+                    break
+                atualizacoes = []
+                ocorrencias = []
+                novos_codigos = {}
+                for id_analise, timestamp, resultado_json in linhas:
+                    try:
+                        resultado = json.loads(resultado_json or "{}")
+                    except ValueError:
+                        resultado = {}
+                    for tipo, mensagem in mensagens_resultado(resultado):
+                        codigo = self._codigo_mensagem(tipo, mensagem, novos_codigos)
+                        ocorrencias.append((id_analise, timestamp, tipo, codigo))
+                    atualizacoes.append((
+                        int(bool(resultado.get("conforme"))),
+                        json.dumps(resultado_sem_mensagens(resultado)),
+                        id_analise
+                    ))
+                self.conn.executemany(
+                    'UPDATE analises_conformidade SET conforme = ?, resultado = ? WHERE id = ?', atualizacoes
+                )
+                self.conn.executemany('''
+                    INSERT INTO ocorrencias_conformidade (analise_id, timestamp, tipo, codigo)
+                    VALUES (?, ?, ?, ?)
+                ''', ocorrencias)
+            self._codigos_mensagens.update(novos_codigos)
+            ultimo_id = linhas[-1][0]
+            migradas += len(linhas)
+        
+        if migradas:
+            logging.info("%d análises migradas para as tabelas de ocorrências", migradas)
+        return migradas
+
+    def _codigo_mensagem(self, tipo: str, mensagem: str, novos_codigos: Dict[Tuple[str, str], int]) -> int:
+        """Código da mensagem no catálogo, cadastrando-a na transação do chamador se for nova"""
+        chave = (tipo, mensagem)
+        codigo = self._codigos_mensagens.get(chave) or novos_codigos.get(chave)
+        if codigo is None:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO mensagens_conformidade (tipo, mensagem) VALUES (?, ?)', chave
+            )
+            codigo = self.conn.execute(
+                'SELECT codigo FROM mensagens_conformidade WHERE tipo = ? AND mensagem = ?', chave
+            ).fetchone()[0]
+            novos_codigos[chave] = codigo
+        return codigo
+
+    def _inicializar_particoes(self, caminho_bd: str, diretorio: Optional[str],
+                               meses_retencao: Optional[int]) -> Optional[GerenciadorParticoes]:
+        """Cria o gerenciador de partições (desligado para bancos em memória)
+        
+        A rotação é preguiçosa: acontece na primeira gravação de auditoria e a
+        cada virada de mês, ou explicitamente via `rotacionar_particoes`.
+        """
+        if caminho_bd == ':memory:' and diretorio is None:
+            return None
+        return GerenciadorParticoes(
+            self.conn, self._lock_bd,
+            diretorio or os.path.splitext(caminho_bd)[0] + "_particoes",
+            self.TABELAS_PARTICIONADAS, meses_retencao, ao_arquivar=self._descartar_busca_mes
+        )
+
+    def _por_lote(self, inicio: Optional[str], consulta: Callable[[Dict[str, str]], Any]) -> List[Any]:
+        """Executa a consulta sobre cada lote de fontes que cobre o período, com o banco travado
+
+        A consulta recebe, para cada tabela de auditoria, a fonte SQL do lote.
+        Períodos com mais partições do que o SQLite anexa de uma vez viram
+        vários lotes; o banco principal entra só no primeiro, e o chamador
+        mescla os resultados.
+        """
+        if self.particoes is None:
+            with self._lock_bd:
+                return [consulta({tabela: tabela for tabela in self.TABELAS_PARTICIONADAS})]
+        resultados = []
+        for posicao, meses in enumerate(self.particoes.lotes(inicio)):
+            with self.particoes.fontes(meses=meses, principal=posicao == 0) as fontes:
+                resultados.append(consulta(fontes))
+        return resultados
+
+    def _meses_recentes(self) -> List[Optional[Tuple[int, int]]]:
+        """Mês corrente (None: banco principal) e as partições, da mais recente para a mais antiga"""
+        return [None] + (list(reversed(self.particoes.particoes())) if self.particoes else [])
+
+    def rotacionar(self) -> Dict[str, List[str]]:
+        """Move os meses fechados para suas partições e arquiva as expiradas pela retenção"""
+        if self.particoes is None:
+            return {"movidas": [], "arquivadas": []}
+        movidas = self.particoes.rotacionar()
+        return {
+            "movidas": [f"{ano:04d}-{mes:02d}" for ano, mes in movidas],
+            "arquivadas": self.particoes.aplicar_retencao()
+        }
+
+    def _paginas_auditoria(self, tabela: str, filtros: List[str], parametros: List[Any],
+                           inicio: Optional[str] = None, fim: Optional[str] = None,
+                           tamanho_pagina: int = 1000,
+                           selecao: Optional[Tuple[str, str]] = None) -> Iterator[List[Tuple[Any, ...]]]:
+        """Lê uma tabela de auditoria em ordem cronológica, uma página por vez
+        
+        Paginação por chave (timestamp, id) em cada partição do período e depois
+        no banco principal: a memória fica limitada a uma página e o banco só
+        fica travado durante a leitura de cada uma. `filtros` usam o apelido
+        `t`; sem `selecao`, as colunas seguem `COLUNAS_EXPORTACAO[tabela]`.
+        """
+        selecao, origem = selecao or self._SELECAO_EXPORTACAO[tabela]
+        filtros = list(filtros)
+        parametros = list(parametros)
+        if inicio is not None:
+            filtros.append("t.timestamp >= ?")
+            parametros.append(inicio)
+        if fim is not None:
+            filtros.append("t.timestamp < ?")
+            parametros.append(fim)
+        filtros.append("(t.timestamp, t.id) > (?, ?)")
+        
+        meses = self.particoes.particoes_no_periodo(inicio, fim) if self.particoes else []
+        for mes in meses + [None]:
+            ultimo = ("", -1)
+            while True:
+                contexto = self.particoes.anexar(*mes) if mes is not None else contextlib.nullcontext("main")
+                with self._lock_bd, contexto as esquema:
+                    pagina = self.conn.execute(f'''
+                        SELECT t.id, t.timestamp, {selecao.format(esquema=esquema)}
+                        FROM {origem.format(esquema=esquema)}
+                        WHERE {" AND ".join(filtros)}
+                        ORDER BY t.timestamp, t.id LIMIT ?
+                    ''', parametros + list(ultimo) + [tamanho_pagina]).fetchall()
+                if pagina:
+                    yield pagina
+                if len(pagina) < tamanho_pagina:
+                    break
+                ultimo = (pagina[-1][1], pagina[-1][0])
+
+    def paginas(self, tabela: str, inicio: Optional[str] = None, fim: Optional[str] = None,
+                usuario: Optional[str] = None, operacao: Optional[str] = None,
+                tamanho_pagina: int = 5000) -> Iterator[List[Tuple[Any, ...]]]:
+        """Páginas de linhas prontas para exportação (respostas descomprimidas, mensagens agregadas)"""
+        if tabela not in COLUNAS_EXPORTACAO:
+            raise ValueError(f"Tabela não exportável: {tabela}")
+        filtros: List[str] = []
+        parametros: List[Any] = []
+        for coluna, valor in (("usuario", usuario), ("operacao", operacao)):
+            if valor is not None:
+                filtros.append(f"t.{coluna} = ?")
+                parametros.append(valor)
+        for pagina in self._paginas_auditoria(tabela, filtros, parametros, inicio, fim, tamanho_pagina):
+            if tabela == "consultas":
+                # Respostas deduplicadas chegam comprimidas; as anteriores à migração, em texto
+                pagina = [
+                    linha[:-2] + (linha[-2] if linha[-1] is None else zlib.decompress(linha[-1]).decode("utf-8"),)
+                    for linha in pagina
+                ]
+            yield pagina
+
+    def obter_analise(self, id_analise: int) -> Optional[Dict]:
+        """Reconstrói o resultado completo de uma análise registrada"""
+        # Mês corrente primeiro; depois as partições, da mais recente para a mais antiga
+        for mes in self._meses_recentes():
+            encontrado = self._ler_analise(id_analise, mes)
+            if encontrado is not None:
+                break
+        else:
+            return None
+        
+        linha, mensagens = encontrado
+        return montar_analise(id_analise, *linha, mensagens)
+
+    def _ler_analise(self, id_analise: int, mes: Optional[Tuple[int, int]]):
+        """Linha da análise e suas mensagens no banco principal ou na partição do mês informado"""
+        contexto = self.particoes.anexar(*mes) if mes is not None else contextlib.nullcontext("main")
+        with self._lock_bd, contexto as esquema:
+            linha = self.conn.execute(f'''
+                SELECT timestamp, tipo_operacao, resultado, usuario, score_conformidade, conforme
+                FROM {esquema}.analises_conformidade WHERE id = ?
+            ''', (id_analise,)).fetchone()
+            if linha is None:
+                return None
+            mensagens = self.conn.execute(f'''
+                SELECT o.tipo, m.mensagem FROM {esquema}.ocorrencias_conformidade o
+                JOIN main.mensagens_conformidade m ON m.codigo = o.codigo
+                WHERE o.analise_id = ?
+                ORDER BY o.rowid
+            ''', (id_analise,)).fetchall()
+        return linha, mensagens
+
+    def principais_ocorrencias(self, tipo: str, inicio: str, limite: int = 10) -> List[Tuple[str, int, int]]:
+        """Impedimentos (ou alertas) mais frequentes no período, como (mensagem, código, quantidade)"""
+        partes = self._por_lote(inicio, lambda fontes: self.conn.execute(f'''
+            SELECT codigo, COUNT(*) FROM {fontes["ocorrencias_conformidade"]}
+            WHERE tipo = ? AND timestamp >= ?
+            GROUP BY codigo
+        ''', (tipo, inicio)).fetchall())
+        # Contagens completas por código em cada lote (os códigos são poucos): a soma é exata
+        quantidades: Counter = Counter()
+        for parte in partes:
+            quantidades.update(dict(parte))
+        principais = quantidades.most_common(limite)
+        with self._lock_bd:
+            mensagens = dict(self.conn.execute(
+                f'SELECT codigo, mensagem FROM mensagens_conformidade '
+                f'WHERE codigo IN ({", ".join("?" * len(principais))})',
+                [codigo for codigo, _ in principais]
+            ).fetchall())
+        return [(mensagens[codigo], codigo, quantidade) for codigo, quantidade in principais]
+
+    def _hash_resposta(self, resposta: str) -> str:
+        resposta_hash = self._hashes_respostas.get(resposta)
+        if resposta_hash is None:
+            if len(self._hashes_respostas) >= self.TAMANHO_MAXIMO_CACHE_HASHES:
+                self._hashes_respostas.clear()
+            resposta_hash = hashlib.blake2b(resposta.encode("utf-8"), digest_size=16).hexdigest()
+            self._hashes_respostas[resposta] = resposta_hash
+        return resposta_hash
+
+    def _armazenar_respostas(self, respostas: List[str]) -> Tuple[List[str], List[str]]:
+        """Grava as respostas inéditas (dentro da transação do chamador); retorna os hashes e os novos"""
+        hashes = [self._hash_resposta(resposta) for resposta in respostas]
+        if len(self._respostas_gravadas) >= self.TAMANHO_MAXIMO_CACHE_HASHES:
+            self._respostas_gravadas.clear()
+        novas = {}
+        for resposta_hash, resposta in zip(hashes, respostas):
+            if resposta_hash not in self._respostas_gravadas and resposta_hash not in novas:
+                novas[resposta_hash] = resposta
+        indexar = []
+        for resposta_hash, resposta in novas.items():
+            cursor = self.conn.execute(
+                'INSERT OR IGNORE INTO respostas (hash, conteudo) VALUES (?, ?)',
+                (resposta_hash, zlib.compress(resposta.encode("utf-8"), 6))
+            )
+            # Só as de fato inéditas no banco entram na busca (o cache de hashes pode ter sido esvaziado)
+            if cursor.rowcount:
+                indexar.append((cursor.lastrowid, termos_indexados(resposta)))
+        self.conn.executemany('INSERT INTO busca_respostas (rowid, termos) VALUES (?, ?)', indexar)
+        return hashes, list(novas)
+
+    def _indexar_consultas(self, linhas: List[Tuple[Any, ...]]):
+        """Acrescenta (id, timestamp, usuario, categoria, pergunta, resposta_hash) à busca textual"""
+        self.conn.executemany('''
+            INSERT INTO busca_consultas (rowid, termos, categoria, usuario, timestamp, pergunta, resposta_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (id_consulta, termos_indexados(pergunta or ""), categoria, usuario, timestamp, pergunta, resposta_hash)
+            for id_consulta, timestamp, usuario, categoria, pergunta, resposta_hash in linhas
+        ])
+
+    def reconstruir_busca(self, tamanho_bloco: int = 5000) -> int:
+        """Refaz a busca textual a partir das consultas (principal e partições) e das respostas"""
+        with self._lock_bd, self.conn:
+            self.conn.execute('DELETE FROM busca_consultas')
+            self.conn.execute('DELETE FROM busca_respostas')
+        
+        indexadas = 0
+        for pagina in self._paginas_auditoria(
+            "consultas", [], [], tamanho_pagina=tamanho_bloco,
+            selecao=("t.usuario, t.categoria, t.pergunta, t.resposta_hash", "{esquema}.consultas t")
+        ):
+            with self._lock_bd, self.conn:
+                self._indexar_consultas(pagina)
+            indexadas += len(pagina)
+        
+        ultimo_rowid = 0
+        while True:
+            with self._lock_bd, self.conn:
+                linhas = self.conn.execute(
+                    'SELECT rowid, conteudo FROM respostas WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                    (ultimo_rowid, tamanho_bloco)
+                ).fetchall()
+                if not linhas:
+                    break
+                self.conn.executemany('INSERT INTO busca_respostas (rowid, termos) VALUES (?, ?)', [
+                    (rowid, termos_indexados(zlib.decompress(conteudo).decode("utf-8")))
+                    for rowid, conteudo in linhas
+                ])
+            ultimo_rowid = linhas[-1][0]
+        
+        if indexadas:
+            logging.info("Busca textual reconstruída: %d consultas", indexadas)
+        return indexadas
+
+    def _descartar_busca_mes(self, ano: int, mes: int):
+        """Tira da busca as consultas de um mês arquivado pela retenção"""
+        inicio = f"{ano:04d}-{mes:02d}-01T00:00:00"
+        fim = f"{ano + mes // 12:04d}-{mes % 12 + 1:02d}-01T00:00:00"
+        with self._lock_bd, self.conn:
+            self.conn.execute('DELETE FROM busca_consultas WHERE timestamp >= ? AND timestamp < ?', (inicio, fim))
+
+    def buscar_consultas(self, texto: str, usuario: Optional[str] = None, categoria: Optional[str] = None,
+                         inicio: Optional[str] = None, fim: Optional[str] = None,
+                         limite: int = 20) -> List[Dict[str, Any]]:
+        """Consultas do histórico que contêm todos os termos, da mais relevante (BM25) para a menos"""
+        expressao = expressao_fts(texto)
+        if expressao is None:
+            return []
+        # Usuário e categoria entram no MATCH (recorte pelo índice) e na igualdade exata
+        partes = [f"termos : ({expressao})"]
+        filtros: List[str] = []
+        parametros: List[Any] = []
+        for coluna, valor in (("usuario", usuario), ("categoria", categoria)):
+            if valor:
+                partes.append(filtro_coluna(coluna, valor))
+                filtros.append(f"{coluna} = ?")
+                parametros.append(valor)
+        if inicio is not None:
+            filtros.append("timestamp >= ?")
+            parametros.append(inicio)
+        if fim is not None:
+            filtros.append("timestamp < ?")
+            parametros.append(fim)
+        
+        with self._lock_bd:
+            linhas = self.conn.execute(f'''
+                SELECT rowid, timestamp, usuario, categoria, pergunta, resposta_hash, rank
+                FROM busca_consultas
+                WHERE busca_consultas MATCH ? {"".join(" AND " + filtro for filtro in filtros)}
+                ORDER BY rank LIMIT ?
+            ''', [" AND ".join(partes)] + parametros + [limite]).fetchall()
+        
+        return [
+            {
+                "id": id_consulta,
+                "timestamp": timestamp,
+                "usuario": usuario_consulta,
+                "categoria": categoria_consulta,
+                "pergunta": pergunta,
+                "resposta_hash": resposta_hash,
+                "relevancia": -rank
+            }
+            for id_consulta, timestamp, usuario_consulta, categoria_consulta, pergunta, resposta_hash, rank in linhas
+        ]
+
+    def buscar_respostas(self, texto: str, limite: int = 10) -> List[Dict[str, Any]]:
+        """Respostas distintas já dadas que contêm todos os termos"""
+        expressao = expressao_fts(texto)
+        if expressao is None:
+            return []
+        with self._lock_bd:
+            linhas = self.conn.execute('''
+                SELECT r.hash, r.conteudo, b.rank FROM busca_respostas b
+                JOIN respostas r ON r.rowid = b.rowid
+                WHERE busca_respostas MATCH ?
+                ORDER BY b.rank LIMIT ?
+            ''', (expressao, limite)).fetchall()
+        return [
+            {
+                "hash": resposta_hash,
+                "texto": zlib.decompress(conteudo).decode("utf-8"),
+                "relevancia": -rank
+            }
+            for resposta_hash, conteudo, rank in linhas
+        ]
+
+    def obter_resposta(self, resposta_hash: str) -> Optional[str]:
+        """Texto original de uma resposta registrada, pelo hash"""
+        with self._lock_bd:
+            linha = self.conn.execute(
+                'SELECT conteudo FROM respostas WHERE hash = ?', (resposta_hash,)
+            ).fetchone()
+        return zlib.decompress(linha[0]).decode("utf-8") if linha else None
+
+    def historico_consultas(self, usuario: Optional[str] = None, limite: int = 50) -> List[Dict[str, Any]]:
+        """Consultas mais recentes (de um usuário ou de todos) com as respostas descomprimidas"""
+        filtro = 'WHERE c.usuario = ?' if usuario is not None else ''
+        parametros = (usuario,) if usuario is not None else ()
+        linhas: List[Tuple[Any, ...]] = []
+        # Mês corrente primeiro; depois as partições, da mais recente para a mais antiga, até completar o limite
+        for mes in self._meses_recentes():
+            contexto = self.particoes.anexar(*mes) if mes is not None else contextlib.nullcontext("main")
+            with self._lock_bd, contexto as esquema:
+                linhas += self.conn.execute(f'''
+                    SELECT c.id, c.timestamp, c.pergunta, c.usuario, c.categoria, c.resposta, r.conteudo
+                    FROM {esquema}.consultas c LEFT JOIN main.respostas r ON r.hash = c.resposta_hash
+                    {filtro}
+                    ORDER BY c.id DESC LIMIT ?
+                ''', parametros + (limite - len(linhas),)).fetchall()
+            if len(linhas) >= limite:
+                break
+        return [
+            {
+                "id": id_consulta,
+                "timestamp": timestamp,
+                "pergunta": pergunta,
+                "usuario": usuario_consulta,
+                "categoria": categoria,
+                "resposta": resposta if conteudo is None else zlib.decompress(conteudo).decode("utf-8")
+            }
+            for id_consulta, timestamp, pergunta, usuario_consulta, categoria, resposta, conteudo in linhas
+        ]
+
+    def compactar(self):
+        """Devolve ao sistema de arquivos o espaço liberado pela migração (VACUUM)"""
+        with self._lock_bd:
+            self.conn.execute('VACUUM')
+        # O VACUUM pode renumerar o rowid de `respostas`, ao qual a busca das respostas está ligada
+        self.reconstruir_busca()
+
+    def _inserir_analises(self, linhas: List[Tuple[Any, ...]],
+                          novos_codigos: Dict[Tuple[str, str], int]) -> List[int]:
+        """Insere as análises e suas ocorrências (na transação do chamador); retorna os ids"""
+        cursor = self.conn.cursor()
+        ids = []
+        ocorrencias = []
+        decisoes = []
+        for linha in linhas:
+            timestamp, tipo_operacao, resultado, observacoes, usuario, score, conforme, mensagens, _ = linha
+            cursor.execute('''
+                INSERT INTO analises_conformidade (timestamp, tipo_operacao, resultado, observacoes, usuario, score_conformidade, conforme)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (timestamp, tipo_operacao, resultado, observacoes, usuario, score, conforme))
+            id_analise = cursor.lastrowid
+            ids.append(id_analise)
+            for tipo, mensagem in mensagens:
+                ocorrencias.append((id_analise, timestamp, tipo,
+                                    self._codigo_mensagem(tipo, mensagem, novos_codigos)))
+            # Todo resultado automático entra no histórico de decisões
+            decisoes.append(decisao_automatica(linha, id_analise))
+        cursor.executemany('''
+            INSERT INTO ocorrencias_conformidade (analise_id, timestamp, tipo, codigo)
+            VALUES (?, ?, ?, ?)
+        ''', ocorrencias)
+        self._inserir_decisoes(decisoes)
+        return ids
+
+    def _ligar_decisoes(self, linhas: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+        """Liga as decisões que vierem sem id à última análise registrada da operação
+
+        Procura no mês corrente e depois nas partições, da mais recente para a
+        mais antiga, parando quando todas as operações pendentes forem achadas.
+        """
+        pendentes = {operacao for _, _, operacao, id_analise, *_ in linhas if id_analise is None}
+        encontradas: Dict[str, int] = {}
+        for mes in self._meses_recentes():
+            if not pendentes:
+                break
+            contexto = self.particoes.anexar(*mes) if mes is not None else contextlib.nullcontext("main")
+            with self._lock_bd, contexto as esquema:
+                for operacao in list(pendentes):
+                    linha = self.conn.execute(f'''
+                        SELECT analise_id FROM {esquema}.historico_decisoes
+                        WHERE operacao = ? AND analise_id IS NOT NULL
+                        ORDER BY timestamp DESC LIMIT 1
+                    ''', (operacao,)).fetchone()
+                    if linha is not None:
+                        encontradas[operacao] = linha[0]
+                        pendentes.discard(operacao)
+        return [
+            linha if linha[3] is not None else linha[:3] + (encontradas.get(linha[2]),) + linha[4:]
+            for linha in linhas
+        ]
+
+    def _inserir_decisoes(self, linhas: List[Tuple[Any, ...]]):
+        """Insere decisões já ligadas às análises (na transação do chamador)"""
+        self.conn.executemany('''
+            INSERT INTO historico_decisoes (timestamp, tipo_decisao, operacao, analise_id, contexto, decisao, justificativa, usuario)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', linhas)
+
+
+class _Anel:
+    """Buffer circular de capacidade fixa sobre uma lista pré-alocada"""
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self._itens: List[Any] = [None] * capacidade
+        self._inicio = 0
+        self.tamanho = 0
+
+    def acrescentar(self, item: Any) -> Optional[Any]:
+        """Acrescenta o item; cheio, sobrescreve o mais antigo e o devolve"""
+        if self.tamanho < self.capacidade:
+            self._itens[(self._inicio + self.tamanho) % self.capacidade] = item
+            self.tamanho += 1
+            return None
+        descartado = self._itens[self._inicio]
+        self._itens[self._inicio] = item
+        self._inicio = (self._inicio + 1) % self.capacidade
+        return descartado
+
+    def item(self, posicao: int) -> Any:
+        """Item na posição (0 = mais antigo)"""
+        return self._itens[(self._inicio + posicao) % self.capacidade]
+
+    def __len__(self) -> int:
+        return self.tamanho
+
+    def __iter__(self) -> Iterator[Any]:
+        for posicao in range(self.tamanho):
+            yield self._itens[(self._inicio + posicao) % self.capacidade]
+
+    def recentes(self) -> Iterator[Any]:
+        """Itens do mais recente para o mais antigo"""
+        for posicao in range(self.tamanho - 1, -1, -1):
+            yield self._itens[(self._inicio + posicao) % self.capacidade]
+
+
+class ArmazenamentoMemoria(ArmazenamentoAuditoria):
+    """Backend sem disco: as últimas `capacidade` linhas de cada tabela em buffers circulares
+
+    Pensado para testes, lotes e benchmarks que não precisam persistir a
+    auditoria. As linhas já têm o formato exportado; os ids são sequenciais,
+    então a análise de um id é achada pela posição no buffer. Agregações e
+    buscas percorrem o buffer (a capacidade limita o custo).
+    """
+
+    def __init__(self, capacidade: int = 100_000):
+        self.capacidade = capacidade
+        self._lock = threading.RLock()
+        # consultas: (id, timestamp, usuario, categoria, pergunta, resposta_hash)
+        self.consultas = _Anel(capacidade)
+        # analises: (id, timestamp, tipo_operacao, usuario, score, conforme, resultado_json, observacoes,
+        #            mensagens, operacao)
+        self.analises = _Anel(capacidade)
+        # decisoes: colunas de COLUNAS_EXPORTACAO["historico_decisoes"]
+        self.decisoes = _Anel(capacidade)
+        self._proximo_id = {"consultas": 1, "analises": 1, "decisoes": 1}
+        # Respostas distintas referenciadas pelas consultas do buffer, com contagem de uso
+        self._respostas: Dict[str, str] = {}
+        self._usos_respostas: Counter = Counter()
+        self._hashes: Dict[str, str] = {}
+        self._codigos: Dict[Tuple[str, str], int] = {}
+        self._ultima_analise: Dict[str, int] = {}
+
+    def _novo_id(self, tabela: str) -> int:
+        id_linha = self._proximo_id[tabela]
+        self._proximo_id[tabela] += 1
+        return id_linha
+
+    def _hash_resposta(self, resposta: str) -> str:
+        resposta_hash = self._hashes.get(resposta)
+        if resposta_hash is None:
+            if len(self._hashes) >= self.capacidade:
+                self._hashes.clear()
+            resposta_hash = hashlib.blake2b(resposta.encode("utf-8"), digest_size=16).hexdigest()
+            self._hashes[resposta] = resposta_hash
+        return resposta_hash
+
+    def gravar(self, tipo: str, linhas: List[Tuple[Any, ...]]):
+        with self._lock:
+            if tipo == "consultas":
+                for timestamp, pergunta, resposta, usuario, categoria in linhas:
+                    resposta_hash = self._hash_resposta(resposta)
+                    self._respostas[resposta_hash] = resposta
+                    self._usos_respostas[resposta_hash] += 1
+                    descartada = self.consultas.acrescentar(
+                        (self._novo_id("consultas"), timestamp, usuario, categoria, pergunta, resposta_hash)
+                    )
+                    if descartada is not None:
+                        self._liberar_resposta(descartada[5])
+            elif tipo == "analises":
+                decisoes = []
+                for linha in linhas:
+                    (timestamp, tipo_operacao, resultado, observacoes, usuario, score, conforme,
+                     mensagens, operacao) = linha
+                    id_analise = self._novo_id("analises")
+                    self.analises.acrescentar((id_analise, timestamp, tipo_operacao, usuario, score, conforme,
+                                               resultado, observacoes, tuple(mensagens), operacao))
+                    for chave in mensagens:
+                        self._codigos.setdefault(chave, len(self._codigos) + 1)
+                    decisoes.append(decisao_automatica(linha, id_analise))
+                self.gravar("decisoes", decisoes)
+            elif tipo == "decisoes":
+                for (timestamp, tipo_decisao, operacao, id_analise, contexto, decisao, justificativa,
+                     usuario) in linhas:
+                    if id_analise is None:
+                        id_analise = self._ultima_analise.get(operacao)
+                    elif operacao is not None:
+                        if len(self._ultima_analise) >= self.capacidade:
+                            self._ultima_analise.clear()
+                        self._ultima_analise[operacao] = id_analise
+                    self.decisoes.acrescentar((self._novo_id("decisoes"), timestamp, tipo_decisao, operacao,
+                                               id_analise, decisao, justificativa, contexto, usuario))
+            else:
+                raise ValueError(f"Tipo de auditoria desconhecido: {tipo}")
+
+    def _liberar_resposta(self, resposta_hash: str):
+        self._usos_respostas[resposta_hash] -= 1
+        if not self._usos_respostas[resposta_hash]:
+            del self._usos_respostas[resposta_hash]
+            del self._respostas[resposta_hash]
+
+    def _no_periodo(self, anel: _Anel, inicio: Optional[str], fim: Optional[str] = None) -> List[Tuple]:
+        with self._lock:
+            return [linha for linha in anel
+                    if (inicio is None or linha[1] >= inicio) and (fim is None or linha[1] < fim)]
+
+    def agregar(self, relatorio: str, inicio: str) -> Dict[str, Any]:
+        if relatorio == "geral":
+            consultas = self._no_periodo(self.consultas, inicio)
+            analises = self._no_periodo(self.analises, inicio)
+            return {"consultas": len(consultas), "analises": len(analises),
+                    "score_medio": sum(linha[4] for linha in analises) / len(analises) if analises else 0}
+
+        if relatorio == "consultas":
+            consultas = self._no_periodo(self.consultas, inicio)
+            return {
+                "por_categoria": Counter(linha[3] for linha in consultas).most_common(),
+                "frequentes": Counter(linha[4] for linha in consultas).most_common(10),
+                "usuarios": len({linha[2] for linha in consultas})
+            }
+        
+        if relatorio == "conformidade":
+            analises = self._no_periodo(self.analises, inicio)
+            if not analises:
+                return agregados_vazios(relatorio)
+            scores = [linha[4] for linha in analises]
+            faixas = Counter(next(nome for limite, nome in FAIXAS_SCORE if score >= limite) for score in scores)
+            por_operacao: Dict[str, List[float]] = {}
+            for linha in analises:
+                por_operacao.setdefault(linha[2], []).append(linha[4])
+            return {
+                "total": len(analises),
+                "score_medio": sum(scores) / len(scores),
+                "score_minimo": min(scores),
+                "score_maximo": max(scores),
+                "conformes": sum(linha[5] for linha in analises),
+                "faixas": sorted(faixas.items(), reverse=True),
+                "por_operacao": sorted(
+                    ((operacao, len(valores), sum(valores) / len(valores))
+                     for operacao, valores in por_operacao.items()),
+                    key=lambda item: -item[1]
+                )
+            }
+        
+        if relatorio == "decisoes":
+            decisoes = self._no_periodo(self.decisoes, inicio)
+            por_tipo = Counter((linha[2], linha[5]) for linha in decisoes)
+            return {
+                "por_tipo": sorted(((tipo, decisao, quantidade) for (tipo, decisao), quantidade in por_tipo.items()),
+                                   key=lambda item: (item[0], -item[2])),
+                "recentes": [(linha[1], linha[2], linha[5], linha[8])
+                             for linha in sorted(decisoes, key=lambda linha: linha[1], reverse=True)[:10]]
+            }
+        
+        raise ValueError(f"Relatório desconhecido: {relatorio}")
+
+    def principais_ocorrencias(self, tipo: str, inicio: str, limite: int = 10) -> List[Tuple[str, int, int]]:
+        contagem = Counter(
+            mensagem for linha in self._no_periodo(self.analises, inicio)
+            for tipo_mensagem, mensagem in linha[8] if tipo_mensagem == tipo
+        )
+        return [(mensagem, self._codigos[(tipo, mensagem)], quantidade)
+                for mensagem, quantidade in contagem.most_common(limite)]
+
+    def paginas(self, tabela: str, inicio: Optional[str] = None, fim: Optional[str] = None,
+                usuario: Optional[str] = None, operacao: Optional[str] = None,
+                tamanho_pagina: int = 5000) -> Iterator[List[Tuple[Any, ...]]]:
+        if tabela == "consultas":
+            linhas = [
+                (id_consulta, timestamp, usuario_consulta, categoria, pergunta, self._respostas[resposta_hash])
+                for id_consulta, timestamp, usuario_consulta, categoria, pergunta, resposta_hash
+                in self._no_periodo(self.consultas, inicio, fim)
+                if usuario is None or usuario_consulta == usuario
+            ]
+        elif tabela == "analises_conformidade":
+            linhas = [
+                (id_analise, timestamp, tipo_operacao, usuario_analise, score, conforme,
+                 " | ".join(m for t, m in mensagens if t == "impedimento") or None,
+                 " | ".join(m for t, m in mensagens if t == "alerta") or None,
+                 observacoes, resultado)
+                for (id_analise, timestamp, tipo_operacao, usuario_analise, score, conforme, resultado,
+                     observacoes, mensagens, _) in self._no_periodo(self.analises, inicio, fim)
+                if usuario is None or usuario_analise == usuario
+            ]
+        elif tabela == "historico_decisoes":
+            linhas = [
+                linha for linha in self._no_periodo(self.decisoes, inicio, fim)
+                if (usuario is None or linha[8] == usuario) and (operacao is None or linha[3] == operacao)
+            ]
+        else:
+            raise ValueError(f"Tabela não exportável: {tabela}")
+        
+        linhas.sort(key=lambda linha: (linha[1], linha[0]))
+        for inicio_pagina in range(0, len(linhas), tamanho_pagina):
+            yield linhas[inicio_pagina:inicio_pagina + tamanho_pagina]
+
+    def obter_analise(self, id_analise: int) -> Optional[Dict]:
+        with self._lock:
+            posicao = id_analise - (self._proximo_id["analises"] - len(self.analises))
+            if not 0 <= posicao < len(self.analises):
+                return None
+            (_, timestamp, tipo_operacao, usuario, score, conforme, resultado, _, mensagens,
+             _) = self.analises.item(posicao)
+        return montar_analise(id_analise, timestamp, tipo_operacao, resultado, usuario, score, conforme,
+                              mensagens)
+
+    def obter_resposta(self, resposta_hash: str) -> Optional[str]:
+        return self._respostas.get(resposta_hash)
+
+    def historico_consultas(self, usuario: Optional[str] = None, limite: int = 50) -> List[Dict[str, Any]]:
+        resultado = []
+        with self._lock:
+            for id_consulta, timestamp, usuario_consulta, categoria, pergunta, resposta_hash in self.consultas.recentes():
+                if len(resultado) >= limite:
+                    break
+                if usuario is None or usuario_consulta == usuario:
+                    resultado.append({
+                        "id": id_consulta,
+                        "timestamp": timestamp,
+                        "pergunta": pergunta,
+                        "usuario": usuario_consulta,
+                        "categoria": categoria,
+                        "resposta": self._respostas[resposta_hash]
+                    })
+        return resultado
+
+    def perguntas_frequentes_desde(self, ultimo_id: int, limite: int) -> Tuple[int, List[Tuple[str, int]]]:
+        with self._lock:
+            maior_id = self._proximo_id["consultas"] - 1
+            contagem = Counter(linha[4] for linha in self.consultas if linha[0] > ultimo_id)
+        return maior_id, contagem.most_common(limite)
+
+    def buscar_consultas(self, texto: str, usuario: Optional[str] = None, categoria: Optional[str] = None,
+                         inicio: Optional[str] = None, fim: Optional[str] = None,
+                         limite: int = 20) -> List[Dict[str, Any]]:
+        """Varredura das consultas do buffer com todos os termos, das mais recentes para as mais antigas"""
+        termos = set(tokenizar(texto))
+        if not termos:
+            return []
+        encontradas = []
+        with self._lock:
+            for id_consulta, timestamp, usuario_consulta, categoria_consulta, pergunta, resposta_hash \
+                    in self.consultas.recentes():
+                if len(encontradas) >= limite:
+                    break
+                if ((usuario and usuario_consulta != usuario) or (categoria and categoria_consulta != categoria)
+                        or (inicio is not None and timestamp < inicio) or (fim is not None and timestamp >= fim)):
+                    continue
+                if termos <= set(tokenizar(pergunta or "")):
+                    encontradas.append({
+                        "id": id_consulta,
+                        "timestamp": timestamp,
+                        "usuario": usuario_consulta,
+                        "categoria": categoria_consulta,
+                        "pergunta": pergunta,
+                        "resposta_hash": resposta_hash,
+                        "relevancia": 1.0
+                    })
+        return encontradas
+
+    def buscar_respostas(self, texto: str, limite: int = 10) -> List[Dict[str, Any]]:
+        termos = set(tokenizar(texto))
+        if not termos:
+            return []
+        with self._lock:
+            respostas = list(self._respostas.items())
+        return [
+            {"hash": resposta_hash, "texto": resposta, "relevancia": 1.0}
+            for resposta_hash, resposta in respostas if termos <= set(tokenizar(resposta))
+        ][:limite]
+
+
+class ArmazenamentoNulo(ArmazenamentoAuditoria):
+    """Backend que descarta a auditoria: nada é gravado e as leituras voltam vazias"""
+
+    def gravar(self, tipo: str, linhas: List[Tuple[Any, ...]]):
+        pass
+
+    def agregar(self, relatorio: str, inicio: str) -> Dict[str, Any]:
+        return agregados_vazios(relatorio)
+
+    def principais_ocorrencias(self, tipo: str, inicio: str, limite: int = 10) -> List[Tuple[str, int, int]]:
+        return []
+
+    def paginas(self, tabela: str, inicio: Optional[str] = None, fim: Optional[str] = None,
+                usuario: Optional[str] = None, operacao: Optional[str] = None,
+                tamanho_pagina: int = 5000) -> Iterator[List[Tuple[Any, ...]]]:
+        return iter(())
+
+    def obter_analise(self, id_analise: int) -> Optional[Dict]:
+        return None
+
+    def obter_resposta(self, resposta_hash: str) -> Optional[str]:
+        return None
+
+    def historico_consultas(self, usuario: Optional[str] = None, limite: int = 50) -> List[Dict[str, Any]]:
+        return []
+
+    def perguntas_frequentes_desde(self, ultimo_id: CursorPerguntas,
+                                   limite: int) -> Tuple[CursorPerguntas, List[Tuple[str, int]]]:
+        return ultimo_id, []
+
+    def buscar_consultas(self, texto: str, usuario: Optional[str] = None, categoria: Optional[str] = None,
+                         inicio: Optional[str] = None, fim: Optional[str] = None,
+                         limite: int = 20) -> List[Dict[str, Any]]:
+        return []
+
+    def buscar_respostas(self, texto: str, limite: int = 10) -> List[Dict[str, Any]]:
+        return []
+
+
+def mesclar_agregados(relatorio: str, partes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combina os agregados de vários backends num só (médias ponderadas pelo total de cada parte)
+
+    Usuários distintos são somados (cada usuário grava num único fragmento); as
+    perguntas frequentes são aproximadas, pois somam só as mais frequentes de cada parte.
+    """
+    mesclado = agregados_vazios(relatorio)
+    if relatorio == "geral":
+        analises = sum(parte["analises"] for parte in partes)
+        return {
+            "consultas": sum(parte["consultas"] for parte in partes),
+            "analises": analises,
+            "score_medio": sum(parte["score_medio"] * parte["analises"] for parte in partes) / analises
+            if analises else 0
+        }
+    
+    if relatorio == "consultas":
+        categorias: Counter = Counter()
+        frequentes: Counter = Counter()
+        for parte in partes:
+            categorias.update(dict(parte["por_categoria"]))
+            frequentes.update(dict(parte["frequentes"]))
+            mesclado["usuarios"] += parte["usuarios"]
+        mesclado["por_categoria"] = categorias.most_common()
+        mesclado["frequentes"] = frequentes.most_common(10)
+        return mesclado
+    
+    if relatorio == "conformidade":
+        partes = [parte for parte in partes if parte["total"]]
+        if not partes:
+            return mesclado
+        total = sum(parte["total"] for parte in partes)
+        faixas: Counter = Counter()
+        por_operacao: Dict[str, List[float]] = {}
+        for parte in partes:
+            faixas.update(dict(parte["faixas"]))
+            for operacao, quantidade, media in parte["por_operacao"]:
+                acumulado = por_operacao.setdefault(operacao, [0, 0.0])
+                acumulado[0] += quantidade
+                acumulado[1] += media * quantidade
+        return {
+            "total": total,
+            "score_medio": sum(parte["score_medio"] * parte["total"] for parte in partes) / total,
+            "score_minimo": min(parte["score_minimo"] for parte in partes),
+            "score_maximo": max(parte["score_maximo"] for parte in partes),
+            "conformes": sum(parte["conformes"] for parte in partes),
+            "faixas": sorted(faixas.items(), reverse=True),
+            "por_operacao": sorted(
+                ((operacao, quantidade, soma / quantidade) for operacao, (quantidade, soma) in por_operacao.items()),
+                key=lambda item: -item[1]
+            )
+        }
+    
+    if relatorio == "decisoes":
+        por_tipo: Counter = Counter()
+        for parte in partes:
+            por_tipo.update({(tipo, decisao): quantidade for tipo, decisao, quantidade in parte["por_tipo"]})
+        mesclado["por_tipo"] = sorted(
+            ((tipo, decisao, quantidade) for (tipo, decisao), quantidade in por_tipo.items()),
+            key=lambda item: (item[0], -item[2])
+        )
+        mesclado["recentes"] = heapq.nlargest(
+            10, (linha for parte in partes for linha in parte["recentes"]), key=lambda linha: linha[0]
+        )
+        return mesclado
+    
+    raise ValueError(f"Relatório desconhecido: {relatorio}")
+
+
+class ArmazenamentoFragmentado(ArmazenamentoAuditoria):
+    """Backend multilocatário: um banco SQLite por correspondente (locatário)
+
+    O locatário de cada linha vem do usuário: pelo mapa usuário -> locatário
+    informado (ou `atribuir_locatario`) ou, sem mapeamento, o próprio usuário.
+    Cada fragmento tem conexão e trava próprias, então gravações de
+    correspondentes diferentes não disputam a mesma trava; um lote com vários
+    locatários é gravado em paralelo. Relatórios e buscas consultam os
+    fragmentos em paralelo e mesclam os resultados.
+
+    Os ids expostos são globais: ``indice_do_fragmento * ESPACO_IDS + id_local``,
+    com o índice de cada locatário fixado no catálogo do diretório.
+    """
+
+    ESPACO_IDS = 10 ** 12
+    # Posição do usuário na linha gravada de cada tipo
+    _COLUNA_USUARIO = {"consultas": 3, "analises": 4, "decisoes": 7}
+
+    def __init__(self, diretorio: str, locatarios: Optional[Dict[str, str]] = None,
+                 meses_retencao: Optional[int] = None, max_paralelo: int = 8):
+        self.diretorio = diretorio
+        self.meses_retencao = meses_retencao
+        self._locatarios: Dict[str, str] = dict(locatarios or {})
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_paralelo, thread_name_prefix="fragmentos")
+        os.makedirs(diretorio, exist_ok=True)
+        
+        # Catálogo locatário -> índice: estável entre execuções, define o nome do arquivo e o prefixo dos ids
+        self._catalogo = sqlite3.connect(os.path.join(diretorio, "catalogo.db"), check_same_thread=False)
+        with self._catalogo:
+            self._catalogo.execute('''
+                CREATE TABLE IF NOT EXISTS locatarios (
+                    indice INTEGER PRIMARY KEY AUTOINCREMENT,
+                    locatario TEXT UNIQUE NOT NULL
+                )
+            ''')
+        self._indices: Dict[str, int] = {
+            locatario: indice for indice, locatario in self._catalogo.execute('SELECT indice, locatario FROM locatarios')
+        }
+        self._fragmentos: Dict[int, ArmazenamentoSQLite] = {
+            indice: self._abrir(indice) for indice in self._indices.values()
+        }
+
+    def _abrir(self, indice: int) -> "ArmazenamentoSQLite":
+        return ArmazenamentoSQLite(os.path.join(self.diretorio, f"fragmento_{indice:04d}.db"),
+                                   meses_retencao=self.meses_retencao)
+
+    def atribuir_locatario(self, usuario: str, locatario: str):
+        """Associa o usuário a um locatário explícito (agência ou correspondente)"""
+        self._locatarios[usuario] = locatario
+
+    def locatario(self, usuario: Optional[str]) -> str:
+        """Locatário de um usuário: o mapeado ou o próprio usuário"""
+        usuario = usuario or "sistema"
+        return self._locatarios.get(usuario, usuario)
+
+    def _indice(self, locatario: str, criar: bool = True) -> Optional[int]:
+        """Índice do fragmento do locatário, criando o banco na primeira gravação"""
+        indice = self._indices.get(locatario)
+        if indice is not None or not criar:
+            return indice
+        with self._lock:
+            indice = self._indices.get(locatario)
+            if indice is None:
+                with self._catalogo:
+                    indice = self._catalogo.execute(
+                        'INSERT INTO locatarios (locatario) VALUES (?)', (locatario,)
+                    ).lastrowid
+                self._fragmentos[indice] = self._abrir(indice)
+                self._indices[locatario] = indice
+        return indice
+
+    def _global(self, indice: int, id_local: Optional[int]) -> Optional[int]:
+        return None if id_local is None else indice * self.ESPACO_IDS + id_local
+
+    def _local(self, id_global: int) -> Tuple[int, int]:
+        return divmod(id_global, self.ESPACO_IDS)
+
+    def _em_paralelo(self, funcao: Callable[[int, "ArmazenamentoSQLite"], Any],
+                     indices: Optional[List[int]] = None) -> List[Any]:
+        """Aplica `funcao(indice, fragmento)` aos fragmentos em paralelo, na ordem dos índices"""
+        if indices is None:
+            indices = sorted(self._fragmentos)
+        if len(indices) == 1:
+            return [funcao(indices[0], self._fragmentos[indices[0]])]
+        futuros = [self._executor.submit(funcao, indice, self._fragmentos[indice]) for indice in indices]
+        return [futuro.result() for futuro in futuros]
+
+    def _indices_do_usuario(self, usuario: Optional[str]) -> List[int]:
+        """Só o fragmento do usuário quando a leitura filtra por ele; senão, todos"""
+        if usuario is None:
+            return sorted(self._fragmentos)
+        indice = self._indice(self.locatario(usuario), criar=False)
+        return [] if indice is None else [indice]
+
+    def gravar(self, tipo: str, linhas: List[Tuple[Any, ...]]):
+        if tipo not in self._COLUNA_USUARIO:
+            raise ValueError(f"Tipo de auditoria desconhecido: {tipo}")
+        por_fragmento: Dict[int, List[Tuple[Any, ...]]] = {}
+        for linha in linhas:
+            indice = None
+            if tipo == "decisoes" and linha[3] is not None:
+                # Decisão ligada a uma análise: vai para o fragmento dela, com o id local
+                indice, id_local = self._local(linha[3])
+                if indice in self._fragmentos:
+                    linha = linha[:3] + (id_local,) + linha[4:]
+                else:
+                    # Id que não é deste backend: liga-se à última análise da operação no locatário
+                    indice = None
+                    linha = linha[:3] + (None,) + linha[4:]
+            if indice is None:
+                indice = self._indice(self.locatario(linha[self._COLUNA_USUARIO[tipo]]))
+            por_fragmento.setdefault(indice, []).append(linha)
+        self._em_paralelo(lambda indice, fragmento: fragmento.gravar(tipo, por_fragmento[indice]),
+                          sorted(por_fragmento))
+
+    def agregar(self, relatorio: str, inicio: str) -> Dict[str, Any]:
+        return mesclar_agregados(
+            relatorio, self._em_paralelo(lambda _, fragmento: fragmento.agregar(relatorio, inicio))
+        )
+
+    def principais_ocorrencias(self, tipo: str, inicio: str, limite: int = 10) -> List[Tuple[str, int, int]]:
+        """Mensagens mais frequentes somadas entre os fragmentos (código do catálogo do fragmento com mais casos)"""
+        partes = self._em_paralelo(
+            lambda _, fragmento: fragmento.principais_ocorrencias(tipo, inicio, limite)
+        )
+        quantidades: Counter = Counter()
+        codigos: Dict[str, Tuple[int, int]] = {}
+        for parte in partes:
+            for mensagem, codigo, quantidade in parte:
+                quantidades[mensagem] += quantidade
+                codigos[mensagem] = max(codigos.get(mensagem, (0, codigo)), (quantidade, codigo))
+        return [(mensagem, codigos[mensagem][1], quantidade)
+                for mensagem, quantidade in quantidades.most_common(limite)]
+
+    def paginas(self, tabela: str, inicio: Optional[str] = None, fim: Optional[str] = None,
+                usuario: Optional[str] = None, operacao: Optional[str] = None,
+                tamanho_pagina: int = 5000) -> Iterator[List[Tuple[Any, ...]]]:
+        """Intercala as páginas de cada fragmento em ordem (timestamp, id), uma página por vez"""
+        if tabela not in COLUNAS_EXPORTACAO:
+            raise ValueError(f"Tabela não exportável: {tabela}")
+        
+        def linhas(indice: int) -> Iterator[Tuple[Any, ...]]:
+            for pagina in self._fragmentos[indice].paginas(tabela, inicio, fim, usuario, operacao, tamanho_pagina):
+                for linha in pagina:
+                    linha = (self._global(indice, linha[0]),) + linha[1:]
+                    if tabela == "historico_decisoes":
+                        linha = linha[:4] + (self._global(indice, linha[4]),) + linha[5:]
+                    yield linha
+        
+        fluxo = heapq.merge(*(linhas(indice) for indice in self._indices_do_usuario(usuario)),
+                            key=lambda linha: (linha[1], linha[0]))
+        pagina: List[Tuple[Any, ...]] = []
+        for linha in fluxo:
+            pagina.append(linha)
+            if len(pagina) == tamanho_pagina:
+                yield pagina
+                pagina = []
+        if pagina:
+            yield pagina
+
+    def obter_analise(self, id_analise: int) -> Optional[Dict]:
+        indice, id_local = self._local(id_analise)
+        fragmento = self._fragmentos.get(indice)
+        analise = fragmento.obter_analise(id_local) if fragmento is not None else None
+        if analise is not None:
+            analise["id"] = id_analise
+        return analise
+
+    def obter_resposta(self, resposta_hash: str) -> Optional[str]:
+        # Respostas são endereçadas pelo conteúdo: qualquer fragmento que a tenha serve
+        for fragmento in list(self._fragmentos.values()):
+            resposta = fragmento.obter_resposta(resposta_hash)
+            if resposta is not None:
+                return resposta
+        return None
+
+    def historico_consultas(self, usuario: Optional[str] = None, limite: int = 50) -> List[Dict[str, Any]]:
+        partes = self._em_paralelo(
+            lambda indice, fragmento: [
+                {**consulta, "id": self._global(indice, consulta["id"])}
+                for consulta in fragmento.historico_consultas(usuario, limite)
+            ],
+            self._indices_do_usuario(usuario)
+        )
+        return heapq.nlargest(limite, (consulta for parte in partes for consulta in parte),
+                              key=lambda consulta: consulta["timestamp"])
+
+    def perguntas_frequentes_desde(self, ultimo_id: CursorPerguntas,
+                                   limite: int) -> Tuple[CursorPerguntas, List[Tuple[str, int]]]:
+        """Perguntas novas somadas entre os fragmentos
+
+        O cursor é o texto ``"indice:id_local,..."`` com o último id lido de
+        cada fragmento: cabe em qualquer coluna ou JSON, seja qual for o número
+        de fragmentos, e um fragmento novo começa do início.
+        """
+        anteriores = self._decodificar_cursor(ultimo_id)
+        indices = sorted(self._fragmentos)
+        partes = self._em_paralelo(
+            lambda indice, fragmento: fragmento.perguntas_frequentes_desde(anteriores.get(indice, 0), limite),
+            indices
+        )
+        contagem: Counter = Counter()
+        maiores = {}
+        for indice, (maior_id, frequentes) in zip(indices, partes):
+            maiores[indice] = maior_id
+            contagem.update(dict(frequentes))
+        return self._codificar_cursor(maiores), contagem.most_common(limite)
+
+    @staticmethod
+    def _codificar_cursor(maiores: Dict[int, int]) -> str:
+        return ",".join(f"{indice}:{maior_id}" for indice, maior_id in sorted(maiores.items()) if maior_id)
+
+    @staticmethod
+    def _decodificar_cursor(cursor: CursorPerguntas) -> Dict[int, int]:
+        if not cursor:
+            return {}
+        if not isinstance(cursor, str):
+            raise ValueError(f"Cursor inválido para o armazenamento fragmentado: {cursor!r}")
+        indices_ids = (par.split(":") for par in cursor.split(","))
+        return {int(indice): int(maior_id) for indice, maior_id in indices_ids}
+
+    def buscar_consultas(self, texto: str, usuario: Optional[str] = None, categoria: Optional[str] = None,
+                         inicio: Optional[str] = None, fim: Optional[str] = None,
+                         limite: int = 20) -> List[Dict[str, Any]]:
+        """Busca em cada fragmento e mescla pela relevância (BM25 calculado por fragmento)"""
+        partes = self._em_paralelo(
+            lambda indice, fragmento: [
+                {**consulta, "id": self._global(indice, consulta["id"])}
+                for consulta in fragmento.buscar_consultas(texto, usuario, categoria, inicio, fim, limite)
+            ],
+            self._indices_do_usuario(usuario)
+        )
+        return heapq.nlargest(limite, (consulta for parte in partes for consulta in parte),
+                              key=lambda consulta: consulta["relevancia"])
+
+    def buscar_respostas(self, texto: str, limite: int = 10) -> List[Dict[str, Any]]:
+        melhores: Dict[str, Dict[str, Any]] = {}
+        for parte in self._em_paralelo(lambda _, fragmento: fragmento.buscar_respostas(texto, limite)):
+            for resposta in parte:
+                atual = melhores.get(resposta["hash"])
+                if atual is None or resposta["relevancia"] > atual["relevancia"]:
+                    melhores[resposta["hash"]] = resposta
+        return heapq.nlargest(limite, melhores.values(), key=lambda resposta: resposta["relevancia"])
+
+    def rotacionar(self) -> Dict[str, List[str]]:
+        resultado: Dict[str, List[str]] = {"movidas": [], "arquivadas": []}
+        for parte in self._em_paralelo(lambda _, fragmento: fragmento.rotacionar()):
+            resultado["movidas"] = sorted(set(resultado["movidas"]) | set(parte["movidas"]))
+            resultado["arquivadas"].extend(parte["arquivadas"])
+        return resultado
+
+    def compactar(self):
+        self._em_paralelo(lambda _, fragmento: fragmento.compactar())
+
+    def reconstruir_busca(self, tamanho_bloco: int = 5000) -> int:
+        return sum(self._em_paralelo(lambda _, fragmento: fragmento.reconstruir_busca(tamanho_bloco)))
+
+    def fechar(self):
+        for fragmento in self._fragmentos.values():
+            fragmento.fechar()
+        self._catalogo.close()
+        self._executor.shutdown(wait=False)
+
+
+def criar_armazenamento(tipo: str = "sqlite", caminho_bd: str = 'agente_caixa_completo.db',
+                        **opcoes) -> ArmazenamentoAuditoria:
+    """Instancia o backend pelo nome ("sqlite", "fragmentado", "memoria" ou "nulo")
+
+    O fragmentado guarda os bancos dos locatários em ``<caminho_bd sem extensão>_locatarios``.
+    """
+    if tipo == "sqlite":
+        return ArmazenamentoSQLite(caminho_bd, **opcoes)
+    if tipo == "fragmentado":
+        return ArmazenamentoFragmentado(os.path.splitext(caminho_bd)[0] + "_locatarios", **opcoes)
+    if tipo == "memoria":
+        return ArmazenamentoMemoria(**opcoes)
+    if tipo == "nulo":
+        return ArmazenamentoNulo()
+    raise ValueError(f"Backend de armazenamento desconhecido: {tipo}")
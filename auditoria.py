@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gravação assíncrona do log de auditoria do Agente Colaborativo CAIXA
+Fila em memória esvaziada por uma thread dedicada que grava em lotes, uma transação por lote
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class FilaAuditoria:
+    """Fila de auditoria com gravação em lote numa thread dedicada
+
+    Quem registra só enfileira a linha e segue adiante; a thread agrupa o que
+    chegou (até `tamanho_lote` linhas ou `intervalo` segundos) por tipo e chama
+    `gravar_lote(tipo, linhas)` uma vez para cada tipo.
+    """
+
+    def __init__(self, gravar_lote: Callable[[str, List[Tuple[Any, ...]]], None],
+                 tamanho_lote: int = 500, intervalo: float = 0.05):
+        self._gravar_lote = gravar_lote
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._fila: "queue.Queue[Tuple[str, Tuple[Any, ...]]]" = queue.Queue()
+        self._encerrando = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="fila-auditoria", daemon=True)
+        self._thread.start()
+
+    def enfileirar(self, tipo: str, linha: Tuple[Any, ...]):
+        """Agenda a gravação de uma linha de auditoria do tipo informado"""
+        self._fila.put((tipo, linha))
+
+    @property
+    def profundidade(self) -> int:
+        """Linhas aguardando gravação"""
+        return self._fila.qsize()
+
+    def descarregar(self):
+        """Bloqueia até que todas as linhas enfileiradas tenham sido gravadas"""
+        self._fila.join()
+
+    def encerrar(self):
+        """Grava o que falta e finaliza a thread"""
+        self._encerrando.set()
+        self._thread.join()
+
+    def _executar(self):
+        while not (self._encerrando.is_set() and self._fila.empty()):
+            try:
+                primeiro = self._fila.get(timeout=self.intervalo)
+            except queue.Empty:
+                continue
+
+            itens = [primeiro]
+            while len(itens) < self.tamanho_lote:
+                try:
+                    itens.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+
+            por_tipo: Dict[str, List[Tuple[Any, ...]]] = {}
+            for tipo, linha in itens:
+                por_tipo.setdefault(tipo, []).append(linha)
+
+            for tipo, linhas in por_tipo.items():
+                try:
+                    self._gravar_lote(tipo, linhas)
+                except Exception:
+                    logging.exception("Falha ao gravar %d linhas de auditoria (%s)", len(linhas), tipo)
+
+            for _ in itens:
+                self._fila.task_done()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Autocompletar das consultas do Agente Colaborativo CAIXA
+Trie de prefixos com as sugestões mais frequentes pré-calculadas em cada nó
+"""
+
+from typing import Dict, List, Tuple
+
+from normalizacao_texto import normalizar_texto
+
+
+class _NoTrie:
+    __slots__ = ("filhos", "melhores")
+
+    def __init__(self):
+        self.filhos: Dict[str, "_NoTrie"] = {}
+        # [(frequência, chave)] em ordem decrescente de frequência
+        self.melhores: List[Tuple[int, str]] = []
+
+
+class TrieSugestoes:
+    """Trie de prefixos ranqueada por frequência
+
+    Cada nó guarda as `sugestoes_por_no` chaves mais frequentes abaixo dele, então
+    uma consulta custa só a descida pelo prefixo. Como as frequências só crescem,
+    a inserção incremental atualiza essas listas ao longo do caminho da chave.
+    """
+
+    def __init__(self, sugestoes_por_no: int = 10):
+        self.sugestoes_por_no = sugestoes_por_no
+        self._raiz = _NoTrie()
+        self._frequencias: Dict[str, int] = {}
+        self._textos: Dict[str, str] = {}
+
+    @staticmethod
+    def _chave(texto: str) -> str:
+        return normalizar_texto(" ".join(texto.split()))
+
+    def adicionar(self, texto: str, frequencia: int = 1):
+        """Soma `frequencia` ocorrências do texto, inserindo-o se for novo"""
+        chave = self._chave(texto)
+        if not chave:
+            return
+        total = self._frequencias.get(chave, 0) + frequencia
+        self._frequencias[chave] = total
+        self._textos[chave] = " ".join(texto.split())
+
+        no = self._raiz
+        self._promover(no, chave, total)
+        for caractere in chave:
+            no = no.filhos.setdefault(caractere, _NoTrie())
+            self._promover(no, chave, total)
+
+    def _promover(self, no: _NoTrie, chave: str, frequencia: int):
+        """Reposiciona a chave na lista de melhores do nó com a nova frequência"""
+        melhores = no.melhores
+        for i, (_, existente) in enumerate(melhores):
+            if existente == chave:
+                del melhores[i]
+                break
+        else:
+            if len(melhores) >= self.sugestoes_por_no and frequencia <= melhores[-1][0]:
+                return
+
+        posicao = len(melhores)
+        while posicao > 0 and melhores[posicao - 1][0] < frequencia:
+            posicao -= 1
+        melhores.insert(posicao, (frequencia, chave))
+        del melhores[self.sugestoes_por_no:]
+
+    def sugerir(self, prefixo: str, limite: int = 5) -> List[Tuple[str, int]]:
+        """Retorna até `limite` textos que começam com o prefixo, como (texto, frequência)"""
+        no = self._raiz
+        for caractere in self._chave(prefixo):
+            no = no.filhos.get(caractere)
+            if no is None:
+                return []
+        return [(self._textos[chave], frequencia) for frequencia, chave in no.melhores[:limite]]
+
+    def __len__(self) -> int:
+        return len(self._frequencias)
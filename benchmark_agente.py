@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks reprodutíveis do Agente Colaborativo CAIXA
+Mede os caminhos críticos contra um banco temporário e compara execuções para apontar regressões
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from agente_caixa_completo import AgenteCaixaCreditoCompleto
+from armazenamento import BACKENDS_ARMAZENAMENTO, criar_armazenamento
+from carga_sintetica import PERGUNTAS_REALISTAS, GeradorCarga
+from controle_admissao import LIMITES_PADRAO, ControleAdmissao
+
+SEMENTE_PADRAO = 20260101
+LINHAS_PADRAO = [10_000, 100_000]
+TOLERANCIA_PADRAO = 0.10
+TIPOS_RELATORIO = ["geral", "consultas", "conformidade", "decisoes"]
+
+
+def _criar_agente(caminho_bd: str, armazenamento: str = "sqlite") -> AgenteCaixaCreditoCompleto:
+    """Agente sem limites de admissão (o benchmark mede o trabalho, não o rate limit)"""
+    sem_limite = ControleAdmissao(limites={operacao: (1e12, 1e12) for operacao in LIMITES_PADRAO})
+    with contextlib.redirect_stdout(io.StringIO()):
+        return AgenteCaixaCreditoCompleto(caminho_bd, controle_admissao=sem_limite,
+                                          armazenamento=criar_armazenamento(armazenamento, caminho_bd))
+
+
+def corpus_perguntas(agente: AgenteCaixaCreditoCompleto) -> List[str]:
+    """Perguntas curadas da base mais as perguntas realistas da carga sintética"""
+    return [pergunta for pergunta, _ in agente.PERGUNTAS_CURADAS] + PERGUNTAS_REALISTAS
+
+
+def cronometrar(funcao: Callable[[], Any], repeticoes: int, rodadas: int = 5,
+                operacoes_por_chamada: int = 1) -> Dict[str, float]:
+    """Mede `rodadas` blocos de `repeticoes` chamadas (após uma rodada de aquecimento)"""
+    for _ in range(max(1, repeticoes // 10)):
+        funcao()
+
+    tempos = []
+    for _ in range(rodadas):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        tempos.append((time.perf_counter() - inicio) / (repeticoes * operacoes_por_chamada))
+
+    mediana = statistics.median(tempos)
+    return {
+        "mediana_us": mediana * 1e6,
+        "minimo_us": min(tempos) * 1e6,
+        "desvio_us": (statistics.stdev(tempos) if len(tempos) > 1 else 0.0) * 1e6,
+        "ops_por_segundo": 1 / mediana if mediana else 0.0,
+        "repeticoes": repeticoes,
+        "rodadas": rodadas,
+        "operacoes_por_chamada": operacoes_por_chamada
+    }
+
+
+def _ciclo(itens: List[Any]) -> Callable[[], Any]:
+    proximo = itertools.cycle(itens).__next__
+    return proximo
+
+
+def _cenarios_caminho_critico(agente: AgenteCaixaCreditoCompleto, rng: random.Random,
+                              escala: float) -> Iterator[Tuple[str, Callable[[], Any], int, int]]:
+    """Gera (nome, função, repetições, operações por chamada) de cada cenário"""
+    perguntas = corpus_perguntas(agente)
+    perguntas_lower = _ciclo([pergunta.lower() for pergunta in perguntas])
+    proxima_pergunta = _ciclo(perguntas)
+    operacoes = list(GeradorCarga(agente, rng.randrange(2 ** 32)).fluxo_operacoes(200))
+    proxima_operacao = _ciclo(operacoes)
+    repeticoes = lambda n: max(1, int(n * escala))
+
+    yield ("identificar_categoria",
+           lambda: agente._identificar_categoria(perguntas_lower()), repeticoes(5000), 1)
+    yield ("consultar",
+           lambda: agente.consultar(proxima_pergunta(), "benchmark"), repeticoes(500), 1)
+    lote_perguntas = [proxima_pergunta() for _ in range(200)]
+    yield ("consultar_lote_200",
+           lambda: agente.consultar_lote(lote_perguntas, "benchmark"), repeticoes(20), len(lote_perguntas))
+    yield ("analisar",
+           lambda: agente.analisar_conformidade_avancada(proxima_operacao(), "benchmark"),
+           repeticoes(1000), 1)
+    yield ("analisar_rastreado",
+           lambda: agente.analisar_conformidade_avancada(proxima_operacao(), "benchmark", rastrear=True),
+           repeticoes(1000), 1)
+    yield ("analisar_lote_200",
+           lambda: agente.analisar_conformidade_lote(operacoes, "benchmark"), repeticoes(10), len(operacoes))
+
+    linha_consulta = (datetime.now().isoformat(), "pergunta", "resposta", "benchmark", "geral")
+    yield ("auditoria_insercao_unitaria",
+           lambda: agente._gravar_auditoria_lote("consultas", [linha_consulta]), repeticoes(1000), 1)
+    lote_linhas = [linha_consulta] * 500
+    yield ("auditoria_insercao_lote_500",
+           lambda: agente._gravar_auditoria_lote("consultas", lote_linhas), repeticoes(20), len(lote_linhas))
+
+
+def popular_tabelas(agente: AgenteCaixaCreditoCompleto, linhas: int, rng: random.Random,
+                    bloco: int = 50_000):
+    """Acrescenta `linhas` registros sintéticos em cada tabela de auditoria (últimos 120 dias)"""
+    perguntas = corpus_perguntas(agente)
+    categorias = list(agente.SECOES_CONSULTA) + ["geral"]
+    gerador = GeradorCarga(agente, rng.randrange(2 ** 32))
+    agora = datetime.now()
+
+    def carimbo() -> str:
+        return (agora - timedelta(seconds=rng.randrange(120 * 86400))).isoformat()
+
+    for inicio in range(0, linhas, bloco):
+        quantidade = min(bloco, linhas - inicio)
+        consultas = [
+            (carimbo(), rng.choice(perguntas), "resposta sintética", f"usuario{rng.randrange(500)}",
+             rng.choice(categorias))
+            for _ in range(quantidade)
+        ]
+        analises = []
+        for operacao in gerador.fluxo_operacoes(quantidade):
+            linha = agente._linha_analise(operacao, agente._avaliar_conformidade(operacao),
+                                          f"usuario{rng.randrange(500)}")
+            analises.append((carimbo(),) + linha[1:])
+        # Revisões de analistas sobre parte das operações (as decisões automáticas vêm das análises)
+        decisoes = [
+            (carimbo(), "revisao_analista", linha[8], None, "{}",
+             rng.choice(["aprovada", "reprovada", "pendente"]), "sintética", f"analista{rng.randrange(50)}")
+            for linha in analises[:quantidade // 5]
+        ]
+        agente._gravar_auditoria_lote("consultas", consultas)
+        agente._gravar_auditoria_lote("analises", analises)
+        agente._gravar_auditoria_lote("decisoes", decisoes)
+
+
+def executar(linhas: List[int], semente: int = SEMENTE_PADRAO, escala: float = 1.0,
+             filtro: Optional[str] = None, periodo_dias: int = 30,
+             armazenamento: str = "sqlite") -> Dict[str, Any]:
+    """Roda todos os cenários e devolve o resultado no formato gravado em JSON"""
+    rng = random.Random(semente)
+    resultados: Dict[str, Dict[str, float]] = {}
+
+    def selecionado(nome: str) -> bool:
+        return filtro is None or filtro in nome
+
+    with tempfile.TemporaryDirectory(prefix="benchmark_agente_") as diretorio:
+        agente = _criar_agente(os.path.join(diretorio, "caminho_critico.db"), armazenamento)
+        for nome, funcao, repeticoes, por_chamada in _cenarios_caminho_critico(agente, rng, escala):
+            if selecionado(nome):
+                print(f"⏱️  {nome}...", file=sys.stderr)
+                resultados[nome] = cronometrar(funcao, repeticoes, operacoes_por_chamada=por_chamada)
+        agente.armazenamento.fechar()
+
+        # Relatórios: o mesmo banco cresce até cada tamanho pedido
+        agente = _criar_agente(os.path.join(diretorio, "relatorios.db"), armazenamento)
+        existentes = 0
+        for total in sorted(linhas):
+            nomes = [f"relatorio_{tipo}_{total}" for tipo in TIPOS_RELATORIO]
+            if not any(selecionado(nome) for nome in nomes):
+                continue
+            print(f"🗄️  populando {total:,} linhas por tabela...", file=sys.stderr)
+            popular_tabelas(agente, total - existentes, rng)
+            # Meses fechados saem do banco principal, como em produção
+            agente.rotacionar_particoes()
+            existentes = total
+            for tipo, nome in zip(TIPOS_RELATORIO, nomes):
+                if selecionado(nome):
+                    print(f"⏱️  {nome}...", file=sys.stderr)
+                    resultados[nome] = cronometrar(
+                        lambda: agente.gerar_relatorio_detalhado(tipo, periodo_dias), 1, rodadas=3
+                    )
+        agente.armazenamento.fechar()
+
+    return {
+        "data": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semente": semente,
+        "escala": escala,
+        "armazenamento": armazenamento,
+        "resultados": resultados
+    }
+
+
+def comparar(base: Dict[str, Any], atual: Dict[str, Any],
+             tolerancia: float = TOLERANCIA_PADRAO) -> List[Dict[str, Any]]:
+    """Compara as medianas cenário a cenário; acima da tolerância é regressão"""
+    comparacao = []
+    for nome in sorted(set(base["resultados"]) & set(atual["resultados"])):
+        anterior = base["resultados"][nome]["mediana_us"]
+        novo = atual["resultados"][nome]["mediana_us"]
+        razao = novo / anterior if anterior else float("inf")
+        if razao > 1 + tolerancia:
+            situacao = "regressao"
+        elif razao < 1 - tolerancia:
+            situacao = "melhoria"
+        else:
+            situacao = "estavel"
+        comparacao.append({
+            "cenario": nome, "base_us": anterior, "atual_us": novo,
+            "razao": razao, "situacao": situacao
+        })
+    return comparacao
+
+
+def _imprimir_comparacao(comparacao: List[Dict[str, Any]]):
+    icones = {"regressao": "❌", "melhoria": "🚀", "estavel": "✅"}
+    largura = max((len(item["cenario"]) for item in comparacao), default=10)
+    for item in comparacao:
+        print(f"{icones[item['situacao']]} {item['cenario']:<{largura}}  "
+              f"{item['base_us']:>12.1f} µs → {item['atual_us']:>12.1f} µs  ({item['razao']:.2f}x)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do Agente Colaborativo CAIXA")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    execucao = subcomandos.add_parser("executar", help="Roda os benchmarks e grava o resultado em JSON")
+    execucao.add_argument("--saida", default="benchmark.json")
+    execucao.add_argument("--linhas", type=int, nargs="+", default=LINHAS_PADRAO,
+                          help="Tamanhos das tabelas sintéticas dos relatórios (ex.: 10000 1000000 10000000)")
+    execucao.add_argument("--semente", type=int, default=SEMENTE_PADRAO)
+    execucao.add_argument("--escala", type=float, default=1.0,
+                          help="Multiplica as repetições (use 0.1 para uma rodada rápida)")
+    execucao.add_argument("--filtro", default=None, help="Roda só os cenários cujo nome contém o texto")
+    execucao.add_argument("--armazenamento", choices=BACKENDS_ARMAZENAMENTO, default="sqlite",
+                          help="Backend da auditoria (memoria/nulo medem o caminho sem disco)")
+    execucao.add_argument("--comparar-com", default=None, help="Resultado anterior para comparar")
+    execucao.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+
+    comparacao = subcomandos.add_parser("comparar", help="Compara dois resultados e aponta regressões")
+    comparacao.add_argument("base")
+    comparacao.add_argument("atual")
+    comparacao.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "executar":
+        resultado = executar(args.linhas, args.semente, args.escala, args.filtro,
+                             armazenamento=args.armazenamento)
+        with open(args.saida, "w", encoding="utf-8") as saida:
+            json.dump(resultado, saida, ensure_ascii=False, indent=2)
+        print(f"📄 Resultado gravado em {args.saida}", file=sys.stderr)
+        if args.comparar_com is None:
+            return 0
+        with open(args.comparar_com, encoding="utf-8") as entrada:
+            base = json.load(entrada)
+        atual = resultado
+    else:
+        with open(args.base, encoding="utf-8") as entrada:
+            base = json.load(entrada)
+        with open(args.atual, encoding="utf-8") as entrada:
+            atual = json.load(entrada)
+
+    itens = comparar(base, atual, args.tolerancia)
+    _imprimir_comparacao(itens)
+    regressoes = [item for item in itens if item["situacao"] == "regressao"]
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}")
+        return 1
+    print(f"\n✅ Nenhuma regressão acima de {args.tolerancia:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
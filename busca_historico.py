@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Busca textual no histórico do Agente Colaborativo CAIXA
+Monta as expressões FTS5 e destaca os termos encontrados com a mesma normalização dos índices
+"""
+
+import re
+from typing import Iterable, Optional, Set
+
+from normalizacao_texto import normalizar_texto, reduzir_plural, tokenizar
+
+_RE_PALAVRA = re.compile(r"\w+")
+
+
+def termos_indexados(texto: str) -> str:
+    """Forma indexada do texto: tokens sem acento, sem stopwords e no singular"""
+    return " ".join(tokenizar(texto))
+
+
+def expressao_fts(texto: str) -> Optional[str]:
+    """Expressão MATCH com todos os termos da busca (E implícito); None se não sobrar termo"""
+    termos = tokenizar(texto)
+    if not termos:
+        return None
+    return " ".join(f'"{termo}"' for termo in dict.fromkeys(termos))
+
+
+def filtro_coluna(coluna: str, valor: str) -> str:
+    """Filtro de coluna FTS5 para um valor literal (frase entre aspas)"""
+    return f'{coluna} : "{valor.replace(chr(34), chr(34) * 2)}"'
+
+
+def destacar(texto: str, termos: Iterable[str], janela: Optional[int] = None,
+             marcador: str = "**") -> str:
+    """Envolve as palavras que casam com os termos; com `janela`, recorta em volta da primeira"""
+    procurados: Set[str] = set(termos)
+    palavras = list(_RE_PALAVRA.finditer(texto))
+    acertos = [
+        indice for indice, palavra in enumerate(palavras)
+        if reduzir_plural(normalizar_texto(palavra.group())) in procurados
+    ]
+
+    inicio, fim = 0, len(palavras)
+    if janela is not None and len(palavras) > janela:
+        primeiro = acertos[0] if acertos else 0
+        inicio = max(0, min(primeiro - janela // 3, len(palavras) - janela))
+        fim = inicio + janela
+
+    partes = []
+    cursor = palavras[inicio].start() if inicio else 0
+    destacadas = set(acertos)
+    for indice in range(inicio, fim):
+        palavra = palavras[indice]
+        partes.append(texto[cursor:palavra.start()])
+        if indice in destacadas:
+            partes.append(f"{marcador}{palavra.group()}{marcador}")
+        else:
+            partes.append(palavra.group())
+        cursor = palavra.end()
+    if fim == len(palavras):
+        partes.append(texto[cursor:])
+
+    trecho = "".join(partes).strip()
+    return ("… " if inicio else "") + trecho + (" …" if fim < len(palavras) else "")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Busca semântica local do Agente Colaborativo CAIXA
+Índice TF-IDF de palavras e n-gramas de caracteres com busca top-k por similaridade de cosseno
+"""
+
+import heapq
+import math
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Tuple
+
+from normalizacao_texto import tokenizar
+
+
+def extrair_trechos(no: Any, caminho: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], str]]:
+    """Percorre a base de conhecimento devolvendo (caminho, texto) de cada folha"""
+    if isinstance(no, dict):
+        for chave, valor in no.items():
+            yield from extrair_trechos(valor, caminho + (chave,))
+    elif isinstance(no, list):
+        for item in no:
+            yield from extrair_trechos(item, caminho)
+    elif isinstance(no, str):
+        yield caminho, no
+
+
+class IndiceSemantico:
+    """Índice TF-IDF esparso (palavras + n-gramas de caracteres) com busca por cosseno
+
+    A matriz documento x termo é guardada transposta, como listas invertidas
+    termo -> [(documento, peso)], de modo que a consulta só percorre as colunas
+    dos termos que ela contém.
+    """
+
+    def __init__(self, tamanhos_ngrama: Tuple[int, ...] = (3, 4), peso_ngramas: float = 0.5,
+                 df_maximo: float = 0.5):
+        self.tamanhos_ngrama = tamanhos_ngrama
+        self.peso_ngramas = peso_ngramas
+        self.df_maximo = df_maximo
+        self.documentos: List[Dict[str, Any]] = []
+        self._textos: List[str] = []
+        self._idf: Dict[str, float] = {}
+        self._invertido: Dict[str, List[Tuple[int, float]]] = {}
+
+    def adicionar(self, texto: str, metadados: Dict[str, Any]):
+        """Adiciona um documento; o índice só passa a valer após construir()"""
+        self._textos.append(texto)
+        self.documentos.append(dict(metadados, texto=texto))
+
+    def _termos(self, texto: str) -> Counter:
+        """Extrai as frequências de palavras e n-gramas de caracteres do texto"""
+        palavras = tokenizar(texto)
+        termos = Counter(f"p:{p}" for p in palavras)
+
+        # N-gramas com bordas marcam prefixos/sufixos e toleram variações de grafia
+        for palavra in palavras:
+            marcada = f" {palavra} "
+            for n in self.tamanhos_ngrama:
+                for i in range(len(marcada) - n + 1):
+                    termos[f"c:{marcada[i:i + n]}"] += 1
+        return termos
+
+    def _ponderar(self, frequencias: Counter) -> Dict[str, float]:
+        """Aplica TF sublinear x IDF e normaliza o vetor (norma L2)"""
+        vetor = {}
+        for termo, freq in frequencias.items():
+            idf = self._idf.get(termo)
+            if idf is None:
+                continue
+            peso = (1.0 + math.log(freq)) * idf
+            if termo.startswith("c:"):
+                peso *= self.peso_ngramas
+            vetor[termo] = peso
+
+        norma = math.sqrt(sum(p * p for p in vetor.values()))
+        if norma == 0.0:
+            return {}
+        return {termo: peso / norma for termo, peso in vetor.items()}
+
+    def construir(self):
+        """Calcula o IDF e monta as listas invertidas de todos os documentos"""
+        frequencias = [self._termos(texto) for texto in self._textos]
+        total = len(frequencias)
+
+        df = Counter()
+        for termos in frequencias:
+            df.update(termos.keys())
+
+        # Termos presentes em mais da fração df_maximo dos documentos não discriminam
+        limite = max(1, int(total * self.df_maximo))
+        self._idf = {
+            termo: math.log((1 + total) / (1 + n)) + 1.0
+            for termo, n in df.items() if n <= limite
+        }
+
+        invertido: Dict[str, List[Tuple[int, float]]] = {}
+        for doc_id, termos in enumerate(frequencias):
+            for termo, peso in self._ponderar(termos).items():
+                invertido.setdefault(termo, []).append((doc_id, peso))
+        self._invertido = invertido
+
+    def buscar(self, consulta: str, k: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """Retorna os k documentos mais próximos da consulta como (similaridade, documento)"""
+        vetor = self._ponderar(self._termos(consulta))
+        pontuacao: Dict[int, float] = {}
+        for termo, peso_consulta in vetor.items():
+            for doc_id, peso_doc in self._invertido.get(termo, ()):
+                pontuacao[doc_id] = pontuacao.get(doc_id, 0.0) + peso_consulta * peso_doc
+
+        melhores = heapq.nlargest(k, pontuacao.items(), key=lambda item: item[1])
+        return [(score, self.documentos[doc_id]) for doc_id, score in melhores]
+
+    def __len__(self) -> int:
+        return len(self.documentos)
+
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calibração e comparação de modelos de score do Agente Colaborativo CAIXA
+Lê o histórico de análises e revisões de analistas, reescoreia com pesos candidatos e ajusta pesos e limiar
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from armazenamento import BACKENDS_ARMAZENAMENTO, criar_armazenamento
+from modelo_score import REGRA_OUTROS, ModeloScore
+from rastro_analise import REGRAS_ANALISE
+
+try:
+    import numpy as np
+except ImportError:  # Sem numpy o rescore roda em Python puro e a calibração fica indisponível
+    np = None
+
+# Colunas da matriz de contagens: regras do rastro mais as pseudo-regras de mensagens desconhecidas
+COLUNAS_REGRAS: List[str] = [regra[0] for regra in REGRAS_ANALISE] + list(REGRA_OUTROS.values())
+
+# Desfecho da revisão do analista -> rótulo (1: operação aprovada)
+ROTULOS_REVISAO = {"aprovada": 1, "reprovada": 0}
+TIPO_REVISAO = "revisao_analista"
+
+# Padrão: (colunas das mensagens, total de impedimentos, score gravado, conforme gravado)
+Padrao = Tuple[Tuple[int, ...], int, float, bool]
+
+
+def _mensagens(texto: Optional[str]) -> List[str]:
+    return texto.split(" | ") if texto else []
+
+
+class HistoricoScore:
+    """Análises gravadas agrupadas por padrão, prontas para reescorear
+
+    Duas análises com as mesmas mensagens (por regra), o mesmo número de
+    impedimentos e o mesmo resultado gravado pontuam igual em qualquer modelo;
+    o histórico guarda cada padrão uma vez, com quantas análises o repetem e
+    quantas os analistas aprovaram ou reprovaram. Reescorear o histórico
+    inteiro é pontuar os padrões (poucos milhares mesmo com milhões de
+    análises) e pesar o resultado pelas contagens.
+    """
+
+    def __init__(self):
+        self.padroes: List[Padrao] = []
+        self.totais: List[int] = []
+        self.aprovadas: List[int] = []
+        self.reprovadas: List[int] = []
+        # Por análise, na ordem lida: id e posição do padrão
+        self.ids = array("q")
+        self.indices = array("l")
+        self._indice_padrao: Dict[Padrao, int] = {}
+        self._colunas_mensagens: Dict[Tuple[str, str], int] = {}
+        self._matriz = None
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def carregar(cls, armazenamento, inicio: Optional[str] = None, fim: Optional[str] = None,
+                 tamanho_pagina: int = 5000) -> "HistoricoScore":
+        """Lê análises e revisões do período página a página (memória proporcional às análises, não ao texto)"""
+        rotulos: Dict[int, int] = {}
+        for pagina in armazenamento.paginas("historico_decisoes", inicio, fim, tamanho_pagina=tamanho_pagina):
+            # Linhas em ordem cronológica: a última revisão de cada análise prevalece
+            for _, _, tipo_decisao, _, analise_id, decisao, _, _, _ in pagina:
+                if tipo_decisao == TIPO_REVISAO and analise_id is not None:
+                    rotulo = ROTULOS_REVISAO.get(decisao)
+                    if rotulo is None:
+                        rotulos.pop(analise_id, None)
+                    else:
+                        rotulos[analise_id] = rotulo
+
+        historico = cls()
+        for pagina in armazenamento.paginas("analises_conformidade", inicio, fim, tamanho_pagina=tamanho_pagina):
+            for id_analise, _, _, _, score, conforme, impedimentos, alertas, _, _ in pagina:
+                historico.adicionar(id_analise, _mensagens(impedimentos), _mensagens(alertas),
+                                    score, bool(conforme), rotulos.get(id_analise))
+        return historico
+
+    def _coluna(self, tipo: str, mensagem: str) -> int:
+        chave = (tipo, mensagem)
+        coluna = self._colunas_mensagens.get(chave)
+        if coluna is None:
+            coluna = self._colunas_mensagens[chave] = COLUNAS_REGRAS.index(ModeloScore.regra(tipo, mensagem))
+        return coluna
+
+    def adicionar(self, id_analise: int, impedimentos: Sequence[str], alertas: Sequence[str],
+                  score: float, conforme: bool, rotulo: Optional[int] = None):
+        """Acrescenta uma análise gravada; `rotulo` é 1/0 para aprovada/reprovada pelo analista, None sem revisão"""
+        colunas = [self._coluna("impedimento", mensagem) for mensagem in impedimentos]
+        colunas += [self._coluna("alerta", mensagem) for mensagem in alertas]
+        padrao = (tuple(sorted(colunas)), len(impedimentos), float(score or 0.0), conforme)
+        indice = self._indice_padrao.get(padrao)
+        if indice is None:
+            indice = self._indice_padrao[padrao] = len(self.padroes)
+            self.padroes.append(padrao)
+            self.totais.append(0)
+            self.aprovadas.append(0)
+            self.reprovadas.append(0)
+            self._matriz = None
+        self.totais[indice] += 1
+        if rotulo == 1:
+            self.aprovadas[indice] += 1
+        elif rotulo == 0:
+            self.reprovadas[indice] += 1
+        self.ids.append(id_analise)
+        self.indices.append(indice)
+
+    def matriz(self):
+        """Padrões x regras com a contagem de mensagens (numpy)"""
+        if self._matriz is None:
+            matriz = np.zeros((len(self.padroes), len(COLUNAS_REGRAS)))
+            for linha, (colunas, _, _, _) in enumerate(self.padroes):
+                for coluna in colunas:
+                    matriz[linha, coluna] += 1
+            self._matriz = matriz
+        return self._matriz
+
+
+def _vetor_pesos(modelo: ModeloScore) -> List[float]:
+    return [modelo.pesos[regra] for regra in COLUNAS_REGRAS]
+
+
+def rescorear(historico: HistoricoScore, modelo: ModeloScore) -> Tuple[List[float], List[bool]]:
+    """Score e conformidade de cada padrão do histórico sob o modelo"""
+    pesos = _vetor_pesos(modelo)
+    if np is not None and historico.padroes:
+        scores = np.maximum(0.0, 100.0 - historico.matriz() @ np.array(pesos))
+        impedimentos = np.array([padrao[1] for padrao in historico.padroes])
+        conformes = (scores >= modelo.limiar) & (impedimentos == 0)
+        return scores.tolist(), conformes.tolist()
+    scores = [max(0.0, 100.0 - sum(pesos[coluna] for coluna in colunas)) for colunas, _, _, _ in historico.padroes]
+    conformes = [modelo.conforme(score, padrao[1]) for score, padrao in zip(scores, historico.padroes)]
+    return scores, conformes
+
+
+def scores_por_analise(historico: HistoricoScore, modelo: ModeloScore) -> List[Tuple[int, float, bool]]:
+    """(id da análise, score, conforme) de cada análise do histórico sob o modelo"""
+    scores, conformes = rescorear(historico, modelo)
+    return [(id_analise, scores[indice], conformes[indice])
+            for id_analise, indice in zip(historico.ids, historico.indices)]
+
+
+def _razao(numerador: float, denominador: float) -> Optional[float]:
+    return numerador / denominador if denominador else None
+
+
+def _acuracia_balanceada(vp: int, fp: int, vn: int, fn: int) -> Optional[float]:
+    sensibilidade = _razao(vp, vp + fn)
+    especificidade = _razao(vn, vn + fp)
+    if sensibilidade is None or especificidade is None:
+        return None
+    return (sensibilidade + especificidade) / 2
+
+
+def avaliar(historico: HistoricoScore, modelo: ModeloScore) -> Dict[str, Any]:
+    """Métricas do modelo no histórico: conformidade, concordância com os analistas e mudanças frente ao gravado
+
+    Conforme conta como aprovação prevista: `verdadeiros_positivos` são
+    conformes aprovadas, `falsos_positivos` conformes reprovadas, e assim por diante.
+    """
+    inicio = time.perf_counter()
+    scores, conformes = rescorear(historico, modelo)
+    duracao = time.perf_counter() - inicio
+
+    vp = fp = vn = fn = 0
+    total_conformes = passaram = deixaram = 0
+    soma_scores = soma_variacao = 0.0
+    for padrao, total, aprovadas, reprovadas, score, conforme in zip(
+            historico.padroes, historico.totais, historico.aprovadas, historico.reprovadas, scores, conformes):
+        _, _, score_gravado, conforme_gravado = padrao
+        soma_scores += total * score
+        soma_variacao += total * (score - score_gravado)
+        if conforme:
+            total_conformes += total
+            vp += aprovadas
+            fp += reprovadas
+            if not conforme_gravado:
+                passaram += total
+        else:
+            fn += aprovadas
+            vn += reprovadas
+            if conforme_gravado:
+                deixaram += total
+
+    analises = len(historico)
+    revisadas = vp + fp + vn + fn
+    return {
+        "modelo": modelo.nome,
+        "limiar": modelo.limiar,
+        "analises": analises,
+        "padroes": len(historico.padroes),
+        "score_medio": _razao(soma_scores, analises),
+        "variacao_media_score": _razao(soma_variacao, analises),
+        "taxa_conformidade": _razao(total_conformes, analises),
+        "passaram_a_conformes": passaram,
+        "deixaram_de_ser_conformes": deixaram,
+        "revisadas": revisadas,
+        "verdadeiros_positivos": vp,
+        "falsos_positivos": fp,
+        "verdadeiros_negativos": vn,
+        "falsos_negativos": fn,
+        "concordancia_analistas": _razao(vp + vn, revisadas),
+        "acuracia_balanceada": _acuracia_balanceada(vp, fp, vn, fn),
+        "tempo_rescore_ms": round(duracao * 1000, 3)
+    }
+
+
+def comparar(historico: HistoricoScore, modelos: Sequence[ModeloScore]) -> List[Dict[str, Any]]:
+    """Métricas de cada modelo candidato no mesmo histórico (teste A/B offline)"""
+    return [avaliar(historico, modelo) for modelo in modelos]
+
+
+def calibrar(historico: HistoricoScore, base: Optional[ModeloScore] = None, nome: str = "calibrado",
+             iteracoes: int = 3000, taxa: float = 0.5, regularizacao: float = 1e-3) -> ModeloScore:
+    """Ajusta pesos por regra e limiar às revisões dos analistas (exige numpy)
+
+    Uma regressão logística de P(aprovada) sobre as contagens por regra, com
+    coeficientes não negativos (uma ocorrência nunca melhora o score), dá o
+    peso relativo das regras; os pesos são escalados para que o maior fique
+    igual à maior penalidade do modelo base. Regras sem ocorrência nas análises
+    revisadas mantêm o peso do modelo base. O limiar é o score que maximiza a
+    acurácia balanceada contra as revisões.
+    """
+    if np is None:
+        raise RuntimeError("Calibração do score exige numpy")
+    base = base or ModeloScore()
+    aprovadas = np.array(historico.aprovadas, dtype=float)
+    reprovadas = np.array(historico.reprovadas, dtype=float)
+    revisadas = aprovadas + reprovadas
+    total_revisadas = revisadas.sum()
+    if not aprovadas.sum() or not reprovadas.sum():
+        raise ValueError("Calibração exige análises aprovadas e reprovadas por analistas no período")
+
+    matriz = historico.matriz()
+    observadas = (matriz[revisadas > 0] > 0).any(axis=0)
+    # Gradiente descendente projetado sobre os padrões, pesados pelas revisões de cada um
+    coeficientes = np.zeros(len(COLUNAS_REGRAS))
+    intercepto = 0.0
+    for _ in range(iteracoes):
+        probabilidades = 1.0 / (1.0 + np.exp(-(intercepto - matriz @ coeficientes)))
+        erro = (revisadas * probabilidades - aprovadas) / total_revisadas
+        intercepto -= taxa * erro.sum()
+        coeficientes -= taxa * (-(matriz.T @ erro) + regularizacao * coeficientes)
+        np.maximum(coeficientes, 0.0, out=coeficientes)
+
+    pesos_base = np.array(_vetor_pesos(base))
+    maior = coeficientes[observadas].max() if observadas.any() else 0.0
+    escala = pesos_base.max() / maior if maior > 0 else 1.0
+    pesos = np.where(observadas, np.round(coeficientes * escala, 2), pesos_base)
+    modelo = ModeloScore(dict(zip(COLUNAS_REGRAS, pesos.tolist())), base.limiar, nome, base.pesos_tipo)
+
+    # Limiar: candidatos são os scores atingidos por padrões revisados sem impedimentos
+    scores, _ = rescorear(historico, modelo)
+    scores = np.array(scores)
+    sem_impedimentos = np.array([padrao[1] == 0 for padrao in historico.padroes])
+    melhor: Tuple[float, float] = (-1.0, modelo.limiar)
+    for limiar in np.unique(scores[sem_impedimentos & (revisadas > 0)]):
+        conformes = sem_impedimentos & (scores >= limiar)
+        acuracia = _acuracia_balanceada(int(aprovadas[conformes].sum()), int(reprovadas[conformes].sum()),
+                                        int(reprovadas[~conformes].sum()), int(aprovadas[~conformes].sum()))
+        # Empate: o limiar mais alto (mais conservador)
+        if acuracia is not None and acuracia >= melhor[0]:
+            melhor = (acuracia, float(limiar))
+    modelo.limiar = melhor[1]
+    return modelo
+
+
+def _imprimir_comparacao(metricas: List[Dict[str, Any]]):
+    def percentual(valor: Optional[float]) -> str:
+        return "     -" if valor is None else f"{valor:6.1%}"
+
+    print(f"{'modelo':<24} {'limiar':>6} {'conf.':>6} {'concord.':>8} {'ac.bal.':>7} "
+          f"{'+conf.':>8} {'-conf.':>8} {'rescore':>10}")
+    for item in metricas:
+        print(f"{item['modelo'][:24]:<24} {item['limiar']:6.1f} {percentual(item['taxa_conformidade'])} "
+              f"{percentual(item['concordancia_analistas']):>8} {percentual(item['acuracia_balanceada']):>7} "
+              f"{item['passaram_a_conformes']:>8} {item['deixaram_de_ser_conformes']:>8} "
+              f"{item['tempo_rescore_ms']:>8.1f}ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Calibração e teste A/B de modelos de score do Agente CAIXA")
+    parser.add_argument("--bd", default="agente_caixa_completo.db", help="Banco SQLite de auditoria")
+    parser.add_argument("--armazenamento", choices=BACKENDS_ARMAZENAMENTO, default="sqlite")
+    parser.add_argument("--dias", type=int, default=None, help="Só o histórico dos últimos N dias")
+    parser.add_argument("--modelo", action="append", default=[],
+                        help="JSON de um modelo candidato (repita para comparar vários)")
+    parser.add_argument("--saida", default=None, help="Calibra pesos e limiar e grava o modelo neste JSON")
+    parser.add_argument("--relatorio", default=None, help="Grava as métricas de cada modelo em JSON")
+    args = parser.parse_args(argv)
+    if args.saida is not None and np is None:
+        parser.error("--saida (calibração) exige numpy instalado")
+
+    inicio = (datetime.now() - timedelta(days=args.dias)).isoformat() if args.dias else None
+    with contextlib.redirect_stdout(sys.stderr):
+        armazenamento = criar_armazenamento(args.armazenamento, args.bd)
+    carga = time.perf_counter()
+    try:
+        historico = HistoricoScore.carregar(armazenamento, inicio)
+    finally:
+        armazenamento.fechar()
+    print(f"📚 {len(historico)} análises em {len(historico.padroes)} padrões "
+          f"({time.perf_counter() - carga:.1f}s)", file=sys.stderr)
+
+    modelos = [ModeloScore()] + [ModeloScore.carregar(caminho) for caminho in args.modelo]
+    if args.saida is not None:
+        calibrado = calibrar(historico, modelos[0])
+        calibrado.salvar(args.saida)
+        print(f"📄 Modelo calibrado gravado em {args.saida}", file=sys.stderr)
+        modelos.append(calibrado)
+
+    metricas = comparar(historico, modelos)
+    _imprimir_comparacao(metricas)
+    if args.relatorio is not None:
+        with open(args.relatorio, "w", encoding="utf-8") as saida:
+            json.dump(metricas, saida, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga sintética do Agente Colaborativo CAIXA
+Gera fluxos de perguntas (popularidade Zipf) e operações para análise, e os reproduz numa vazão alvo
+"""
+
+import argparse
+import asyncio
+import bisect
+import contextlib
+import http.client
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agente_caixa_completo import AgenteCaixaCreditoCompleto
+
+# Perguntas como chegam dos usuários: paráfrases, abreviações e erros de digitação
+PERGUNTAS_REALISTAS = [
+    "Quais são as exigências específicas para imóveis no Distrito Federal?",
+    "Como funciona o redutor de taxa para cotistas do FGTS?",
+    "Quais são os impedimentos para imóveis com características de hotel?",
+    "Qual documentação é necessária para modalidade de construção individual?",
+    "Quais são as tarifas aplicáveis em operações SBPE?",
+    "posso usar o fundo de garantia pra comprar apartamento",
+    "qual a taxa de juros do financiamento",
+    "documentos do vendedor pessoa juridica",
+    "imovel com onus pode ser financiado?",
+    "quanto tempo de fgts preciso ter",
+    "prazo maximo do financiamento habitacional",
+    "como abrir uma reclamação na ouvidoria",
+    "documentasao necessaria para o tomador",
+    "exigencias do imovel em area rural",
+    "tarifa de avaliação do imovel",
+    "o que é PLD e prevenção a lavagem de dinheiro"
+]
+
+MODELOS_PERGUNTA = [
+    "quais as regras de {termo}?",
+    "como funciona {termo}",
+    "{termo} e {outro}",
+    "o que preciso saber sobre {termo}?",
+    "documentos para {termo}",
+    "{termo}"
+]
+
+# Probabilidade de cada pendência numa operação sintética (proporções típicas da esteira)
+TAXAS_PENDENCIA = {
+    "tomador_cpf_irregular": 0.03,
+    "tomador_estrangeiro": 0.04,
+    "tomador_estrangeiro_sem_rnm": 0.3,
+    "tomador_sem_idoneidade": 0.02,
+    "tomador_sem_residencia": 0.01,
+    "vendedor_menor": 0.01,
+    "vendedor_cpf_irregular": 0.03,
+    "vendedor_cnpj_irregular": 0.05,
+    "imovel_area_rural": 0.02,
+    "imovel_sem_infraestrutura": 0.08,
+    "imovel_com_onus": 0.1,
+    "imovel_matricula_irregular": 0.03,
+    "imovel_impedimento_catalogado": 0.02,
+    "imovel_impedimento_desconhecido": 0.01,
+    "fgts_menos_3_anos": 0.1,
+    "fgts_saldo_insuficiente": 0.15,
+    "pmcmv_renda_incompativel": 0.1,
+    "documentacao_tomador_incompleta": 0.12,
+    "documentacao_vendedor_incompleta": 0.1,
+    "documentacao_imovel_incompleta": 0.08,
+    "componente_ausente": 0.03
+}
+
+DISTRIBUICAO_PROGRAMAS = [("FGTS", 0.45), ("PMCMV", 0.3), ("SBPE", 0.2), ("Recursos Livres", 0.05)]
+DISTRIBUICAO_VENDEDORES = [("PF", 0.75), ("PJ", 0.23), (None, 0.02)]
+
+
+class GeradorCarga:
+    """Perguntas e operações sintéticas reprodutíveis a partir da base do agente
+
+    A popularidade das perguntas segue uma lei de Zipf (a k-ésima pergunta mais
+    popular aparece com peso 1/k^s); a ordem de popularidade é embaralhada pela
+    semente para não favorecer sempre as mesmas categorias.
+    """
+
+    def __init__(self, agente: AgenteCaixaCreditoCompleto, semente: int = 20260101,
+                 expoente_zipf: float = 1.1, perguntas_geradas: int = 400,
+                 taxa_erros_digitacao: float = 0.05, taxas_pendencia: Optional[Dict[str, float]] = None):
+        self.rng = random.Random(semente)
+        self.taxa_erros_digitacao = taxa_erros_digitacao
+        self.taxas = {**TAXAS_PENDENCIA, **(taxas_pendencia or {})}
+        self.impedimentos = list(agente.base_conhecimento["exigencias_imovel"]["impedimentos"])
+
+        self.perguntas = self._catalogo_perguntas(agente, perguntas_geradas)
+        self.rng.shuffle(self.perguntas)
+        acumulado = 0.0
+        self._pesos_acumulados = []
+        for posicao in range(1, len(self.perguntas) + 1):
+            acumulado += 1 / posicao ** expoente_zipf
+            self._pesos_acumulados.append(acumulado)
+
+    def _catalogo_perguntas(self, agente: AgenteCaixaCreditoCompleto, quantidade: int) -> List[str]:
+        """Perguntas curadas e realistas mais combinações do vocabulário de roteamento"""
+        catalogo = [pergunta for pergunta, _ in agente.PERGUNTAS_CURADAS] + PERGUNTAS_REALISTAS
+        termos = sorted({termo for termos in agente.PALAVRAS_CHAVE_CATEGORIAS.values() for termo in termos})
+        vistos = set(catalogo)
+        alvo = len(catalogo) + quantidade
+        for _ in range(quantidade * 3):
+            if len(catalogo) >= alvo:
+                break
+            modelo = self.rng.choice(MODELOS_PERGUNTA)
+            pergunta = modelo.format(termo=self.rng.choice(termos), outro=self.rng.choice(termos))
+            if pergunta not in vistos:
+                vistos.add(pergunta)
+                catalogo.append(pergunta)
+        return catalogo
+
+    def _com_erro_digitacao(self, pergunta: str) -> str:
+        """Troca, omite ou duplica uma letra de uma palavra longa"""
+        palavras = pergunta.split()
+        longas = [i for i, palavra in enumerate(palavras) if len(palavra) >= 5]
+        if not longas:
+            return pergunta
+        i = self.rng.choice(longas)
+        palavra = palavras[i]
+        j = self.rng.randrange(1, len(palavra) - 1)
+        erro = self.rng.randrange(3)
+        if erro == 0:
+            palavra = palavra[:j] + palavra[j + 1] + palavra[j] + palavra[j + 2:]
+        elif erro == 1:
+            palavra = palavra[:j] + palavra[j + 1:]
+        else:
+            palavra = palavra[:j] + palavra[j] + palavra[j:]
+        palavras[i] = palavra
+        return " ".join(palavras)
+
+    def pergunta(self) -> str:
+        """Sorteia uma pergunta pela popularidade Zipf, às vezes com erro de digitação"""
+        indice = bisect.bisect_left(self._pesos_acumulados, self.rng.random() * self._pesos_acumulados[-1])
+        pergunta = self.perguntas[indice]
+        if self.rng.random() < self.taxa_erros_digitacao:
+            pergunta = self._com_erro_digitacao(pergunta)
+        return pergunta
+
+    def fluxo_perguntas(self, quantidade: int) -> Iterator[str]:
+        for _ in range(quantidade):
+            yield self.pergunta()
+
+    def _ocorre(self, pendencia: str) -> bool:
+        return self.rng.random() < self.taxas[pendencia]
+
+    def _sortear(self, distribuicao: List[Tuple[Any, float]]) -> Any:
+        valores, pesos = zip(*distribuicao)
+        return self.rng.choices(valores, weights=pesos)[0]
+
+    def operacao(self) -> Dict[str, Dict[str, Any]]:
+        """Gera `dados_operacao` exercitando todos os ramos das cinco análises"""
+        estrangeiro = self._ocorre("tomador_estrangeiro")
+        tomador = {
+            "cpf_regular": not self._ocorre("tomador_cpf_irregular"),
+            "brasileiro": not estrangeiro,
+            "idoneidade_cadastral": not self._ocorre("tomador_sem_idoneidade"),
+            "residencia_brasil": not self._ocorre("tomador_sem_residencia"),
+            "renda_comprovada": True
+        }
+        if estrangeiro:
+            tomador["rnm_valida"] = not self._ocorre("tomador_estrangeiro_sem_rnm")
+
+        tipo_vendedor = self._sortear(DISTRIBUICAO_VENDEDORES)
+        vendedor: Dict[str, Any] = {"tipo": tipo_vendedor}
+        if tipo_vendedor == "PF":
+            vendedor.update(maior_idade=not self._ocorre("vendedor_menor"),
+                            cpf_regular=not self._ocorre("vendedor_cpf_irregular"),
+                            capacidade_civil=True)
+        elif tipo_vendedor == "PJ":
+            vendedor["cnpj_regular"] = not self._ocorre("vendedor_cnpj_irregular")
+
+        impedimentos = []
+        if self._ocorre("imovel_impedimento_catalogado"):
+            impedimentos.append(self.rng.choice(self.impedimentos))
+        if self._ocorre("imovel_impedimento_desconhecido"):
+            impedimentos.append("Impedimento não catalogado")
+        imovel = {
+            "area_urbana": not self._ocorre("imovel_area_rural"),
+            "infraestrutura_completa": not self._ocorre("imovel_sem_infraestrutura"),
+            "possui_onus": self._ocorre("imovel_com_onus"),
+            "matricula_regular": not self._ocorre("imovel_matricula_irregular"),
+            "impedimentos": impedimentos,
+            "localizado_df": self.rng.random() < 0.04
+        }
+
+        tipo_programa = self._sortear(DISTRIBUICAO_PROGRAMAS)
+        programa: Dict[str, Any] = {"tipo": tipo_programa}
+        if tipo_programa == "FGTS":
+            programa.update(
+                tempo_fgts_anos=self.rng.randint(0, 2) if self._ocorre("fgts_menos_3_anos") else self.rng.randint(3, 30),
+                saldo_suficiente=not self._ocorre("fgts_saldo_insuficiente"),
+                cotista=True
+            )
+        elif tipo_programa == "PMCMV":
+            programa["renda_familiar_compativel"] = not self._ocorre("pmcmv_renda_incompativel")
+
+        documentacao = {
+            "tomador_completa": not self._ocorre("documentacao_tomador_incompleta"),
+            "vendedor_completa": not self._ocorre("documentacao_vendedor_incompleta"),
+            "imovel_completa": not self._ocorre("documentacao_imovel_incompleta"),
+            "programa_especifica": True
+        }
+
+        operacao = {
+            "tomador": tomador,
+            "vendedor": vendedor,
+            "imovel": imovel,
+            "programa": programa,
+            "documentacao": documentacao
+        }
+        # Algumas operações chegam sem um dos componentes
+        if self._ocorre("componente_ausente"):
+            del operacao[self.rng.choice(list(operacao))]
+        return operacao
+
+    def fluxo_operacoes(self, quantidade: int) -> Iterator[Dict[str, Dict[str, Any]]]:
+        for _ in range(quantidade):
+            yield self.operacao()
+
+
+class AlvoLocal:
+    """Chama o agente no próprio processo"""
+
+    def __init__(self, agente: AgenteCaixaCreditoCompleto):
+        self.agente = agente
+
+    def consultar(self, pergunta: str, usuario: str):
+        resposta = self.agente.consultar(pergunta, usuario)
+        if resposta == self.agente.RESPOSTA_OCUPADO:
+            raise RuntimeError("ocupado")
+
+    def analisar(self, dados_operacao: Dict, usuario: str):
+        if self.agente.analisar_conformidade_avancada(dados_operacao, usuario).get("ocupado"):
+            raise RuntimeError("ocupado")
+
+
+class AlvoHTTP:
+    """Chama a API HTTP do agente com uma conexão keep-alive por thread"""
+
+    def __init__(self, host: str, porta: int, timeout: float = 30.0):
+        self.host = host
+        self.porta = porta
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _post(self, caminho: str, corpo: Dict[str, Any]):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = self._local.conexao = http.client.HTTPConnection(self.host, self.porta, timeout=self.timeout)
+        dados = json.dumps(corpo).encode("utf-8")
+        try:
+            conexao.request("POST", caminho, dados, {"Content-Type": "application/json"})
+            resposta = conexao.getresponse()
+            resposta.read()
+        except (OSError, http.client.HTTPException):
+            conexao.close()
+            self._local.conexao = None
+            raise
+        if resposta.status != 200:
+            raise RuntimeError(f"http_{resposta.status}")
+
+    def consultar(self, pergunta: str, usuario: str):
+        self._post("/consultar", {"pergunta": pergunta, "usuario": usuario, "prioridade": "interativa"})
+
+    def analisar(self, dados_operacao: Dict, usuario: str):
+        self._post("/analisar", {"dados_operacao": dados_operacao, "usuario": usuario, "prioridade": "interativa"})
+
+
+def _percentis(latencias: List[float]) -> Dict[str, float]:
+    if not latencias:
+        return {}
+    ordenadas = sorted(latencias)
+
+    def percentil(p: float) -> float:
+        return ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))] * 1000
+
+    return {
+        "p50_ms": percentil(50),
+        "p90_ms": percentil(90),
+        "p99_ms": percentil(99),
+        "p999_ms": percentil(99.9),
+        "max_ms": ordenadas[-1] * 1000,
+        "media_ms": sum(ordenadas) / len(ordenadas) * 1000
+    }
+
+
+def executar_carga(alvo, gerador: GeradorCarga, qps: float, duracao: float,
+                   fracao_analises: float = 0.2, usuarios: int = 200,
+                   concorrencia: int = 64) -> Dict[str, Any]:
+    """Dispara requisições em malha aberta na vazão `qps` por `duracao` segundos
+
+    A latência é contada a partir do horário agendado de cada requisição, de
+    modo que a fila formada quando o alvo não acompanha a vazão entra na medida
+    (sem "coordinated omission").
+    """
+    total = int(qps * duracao)
+    plano = []
+    for i in range(total):
+        usuario = f"carga{gerador.rng.randrange(usuarios)}"
+        if gerador.rng.random() < fracao_analises:
+            plano.append((i / qps, "analisar", gerador.operacao(), usuario))
+        else:
+            plano.append((i / qps, "consultar", gerador.pergunta(), usuario))
+
+    latencias: Dict[str, List[float]] = {"consultar": [], "analisar": []}
+    erros: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def disparar(agendado: float, operacao: str, carga: Any, usuario: str):
+        try:
+            getattr(alvo, operacao)(carga, usuario)
+        except Exception as erro:
+            with lock:
+                chave = f"{operacao}:{erro}"[:80]
+                erros[chave] = erros.get(chave, 0) + 1
+            return
+        with lock:
+            latencias[operacao].append(time.perf_counter() - agendado)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix="carga") as executor:
+        for deslocamento, operacao, carga, usuario in plano:
+            agendado = inicio + deslocamento
+            espera = agendado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            executor.submit(disparar, agendado, operacao, carga, usuario)
+    decorrido = time.perf_counter() - inicio
+
+    concluidas = sum(len(valores) for valores in latencias.values())
+    return {
+        "qps_alvo": qps,
+        "duracao_s": decorrido,
+        "enviadas": total,
+        "concluidas": concluidas,
+        "erros": sum(erros.values()),
+        "erros_por_tipo": erros,
+        "qps_alcancado": concluidas / decorrido if decorrido else 0.0,
+        "latencia": {operacao: _percentis(valores) for operacao, valores in latencias.items() if valores},
+        "latencia_total": _percentis(list(itertools.chain.from_iterable(latencias.values())))
+    }
+
+
+@contextlib.contextmanager
+def servidor_embutido(agente: AgenteCaixaCreditoCompleto) -> Iterator[AlvoHTTP]:
+    """Sobe a API HTTP numa thread, em porta livre, enquanto durar o bloco"""
+    from servidor_http import ServidorAgente
+
+    servidor_agente = ServidorAgente(agente, "127.0.0.1", 0)
+    laco = asyncio.new_event_loop()
+    servidor = laco.run_until_complete(servidor_agente.iniciar())
+    thread = threading.Thread(target=laco.run_forever, name="servidor-carga", daemon=True)
+    thread.start()
+    try:
+        yield AlvoHTTP("127.0.0.1", servidor_agente.porta)
+    finally:
+        laco.call_soon_threadsafe(servidor.close)
+        laco.call_soon_threadsafe(laco.stop)
+        thread.join()
+        servidor_agente.encerrar()
+
+
+def _imprimir_relatorio(relatorio: Dict[str, Any]):
+    print(f"🚦 {relatorio['concluidas']}/{relatorio['enviadas']} requisições em {relatorio['duracao_s']:.1f}s "
+          f"({relatorio['qps_alcancado']:.0f} QPS, alvo {relatorio['qps_alvo']:.0f})")
+    for operacao, percentis in sorted(relatorio["latencia"].items()):
+        print(f"⏱️  {operacao:<10} p50 {percentis['p50_ms']:.2f} ms | p90 {percentis['p90_ms']:.2f} ms | "
+              f"p99 {percentis['p99_ms']:.2f} ms | máx {percentis['max_ms']:.2f} ms")
+    if relatorio["erros"]:
+        print(f"❌ {relatorio['erros']} erros:")
+        for tipo, quantidade in sorted(relatorio["erros_por_tipo"].items()):
+            print(f"   • {tipo}: {quantidade}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga sintética do Agente Colaborativo CAIXA")
+    parser.add_argument("--semente", type=int, default=20260101)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Expoente da popularidade das perguntas")
+    parser.add_argument("--bd", default=":memory:", help="Banco SQLite de auditoria do agente")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    geracao = subcomandos.add_parser("gerar", help="Grava perguntas ou operações sintéticas em JSONL")
+    geracao.add_argument("tipo", choices=["perguntas", "operacoes"])
+    geracao.add_argument("--quantidade", type=int, default=10000)
+    geracao.add_argument("--saida", default="-")
+
+    execucao = subcomandos.add_parser("executar", help="Reproduz a carga numa vazão alvo")
+    execucao.add_argument("--qps", type=float, default=100.0)
+    execucao.add_argument("--duracao", type=float, default=10.0, help="Segundos de carga")
+    execucao.add_argument("--fracao-analises", type=float, default=0.2)
+    execucao.add_argument("--usuarios", type=int, default=200)
+    execucao.add_argument("--concorrencia", type=int, default=64)
+    execucao.add_argument("--modo", choices=["local", "http"], default="local",
+                          help="No próprio processo ou pela API HTTP")
+    execucao.add_argument("--url", default=None,
+                          help="host:porta de uma API já em execução (modo http); sem ela, sobe uma embutida")
+    execucao.add_argument("--saida", default=None, help="Grava o relatório em JSON")
+
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        agente = AgenteCaixaCreditoCompleto(args.bd)
+    gerador = GeradorCarga(agente, args.semente, args.zipf)
+
+    if args.comando == "gerar":
+        saida = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8")
+        try:
+            if args.tipo == "perguntas":
+                for i, pergunta in enumerate(gerador.fluxo_perguntas(args.quantidade), 1):
+                    saida.write(json.dumps({"id": i, "pergunta": pergunta}, ensure_ascii=False) + "\n")
+            else:
+                for i, operacao in enumerate(gerador.fluxo_operacoes(args.quantidade), 1):
+                    saida.write(json.dumps({"id": i, "dados_operacao": operacao}, ensure_ascii=False) + "\n")
+        finally:
+            if saida is not sys.stdout:
+                saida.close()
+        return
+
+    parametros = (gerador, args.qps, args.duracao, args.fracao_analises, args.usuarios, args.concorrencia)
+    if args.modo == "local":
+        relatorio = executar_carga(AlvoLocal(agente), *parametros)
+    elif args.url:
+        host, _, porta = args.url.replace("http://", "").rstrip("/").partition(":")
+        relatorio = executar_carga(AlvoHTTP(host, int(porta or 80)), *parametros)
+    else:
+        with servidor_embutido(agente) as alvo:
+            relatorio = executar_carga(alvo, *parametros)
+
+    _imprimir_relatorio(relatorio)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as saida:
+            json.dump(relatorio, saida, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
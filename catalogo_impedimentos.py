@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Catálogo de impedimentos do imóvel do Agente Colaborativo CAIXA
+Códigos estáveis, sinônimos e índice texto normalizado -> código para casar códigos ou texto livre em O(1)
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from normalizacao_texto import tokenizar
+
+# Código -> (texto do manual, sinônimos aceitos); códigos novos entram no fim, nunca são reaproveitados
+IMPEDIMENTOS_IMOVEL: Dict[str, Tuple[str, Sequence[str]]] = {
+    "IMV01": ("Bens ou imóveis com contaminação por substâncias químicas",
+              ("imóvel contaminado", "contaminação química", "passivo ambiental")),
+    "IMV02": ("Bens de hospitais filantrópicos e Santas Casas de Misericórdia",
+              ("santa casa", "hospital filantrópico")),
+    "IMV03": ("Propriedade(s) cuja(s) matrícula(s) haja averbação de cancelamento, suspensão ou bloqueio",
+              ("matrícula bloqueada", "matrícula cancelada", "matrícula suspensa")),
+    "IMV04": ("Gravado com cláusula de usufruto",
+              ("usufruto", "cláusula de usufruto")),
+    "IMV05": ("Tombado ou em fase de tombamento pelo Patrimônio Histórico e Artístico",
+              ("tombado", "tombamento", "patrimônio histórico")),
+    "IMV06": ("Alienado/hipotecado em garantia de operação de crédito em outra instituição",
+              ("hipotecado", "alienado em outra instituição", "garantia em outro banco")),
+    "IMV07": ("Gravado com cláusula de inalienabilidade ou outro ônus",
+              ("inalienabilidade", "cláusula de inalienabilidade")),
+    "IMV08": ("Com destinação agrícola, inclusive sítios, glebas ou granjas",
+              ("imóvel agrícola", "sítio", "gleba", "granja")),
+    "IMV09": ("Com características de imóvel multifamiliar",
+              ("multifamiliar",)),
+    "IMV10": ("Próprio da União, Estado, Município ou Autarquia",
+              ("imóvel público", "imóvel da união", "imóvel de autarquia")),
+    "IMV11": ("Que já tenha sido de propriedade do proponente nos últimos 02 anos",
+              ("já foi do proponente", "propriedade anterior do proponente")),
+    "IMV12": ("Cujo vendedor seja pessoa jurídica e o proponente seja sócio ou representante legal",
+              ("proponente sócio da vendedora", "proponente representante da vendedora")),
+    "IMV13": ("Sem nenhuma área construída averbada (exceto lote urbanizado)",
+              ("sem área construída", "construção não averbada")),
+    "IMV14": ("Localizado em condomínio com características de loteamento irregular",
+              ("loteamento irregular",)),
+    "IMV15": ("Sob regime de ocupação",
+              ("regime de ocupação",)),
+    "IMV16": ("Registrados como imóvel do tipo 'Laje'",
+              ("laje", "direito de laje")),
+    "IMV17": ("Cuja edificação possua característica de hotel/apart hotel",
+              ("hotel", "apart hotel", "flat")),
+    "IMV18": ("Sob regime de enfiteuse não permitida",
+              ("enfiteuse não permitida", "aforamento não permitido"))
+}
+
+
+def chave_texto(texto: str) -> str:
+    """Forma normalizada usada no índice: tokens sem acento, sem stopwords e no singular"""
+    return " ".join(tokenizar(texto))
+
+
+class CatalogoImpedimentos:
+    """Impedimentos com código estável, consultáveis por código, texto do manual ou sinônimo
+
+    Código, texto e sinônimos passam pela mesma normalização e vão para um
+    único dicionário chave -> código, então casar um item informado custa uma
+    busca em dicionário, sem depender de acentos, caixa ou plural.
+    """
+
+    def __init__(self, entradas: Dict[str, Tuple[str, Sequence[str]]]):
+        self._descricoes: Dict[str, str] = {}
+        self._indice: Dict[str, str] = {}
+        for codigo, (descricao, sinonimos) in entradas.items():
+            self._descricoes[codigo] = descricao
+            for texto in (codigo, descricao, *sinonimos):
+                chave = chave_texto(texto)
+                anterior = self._indice.setdefault(chave, codigo)
+                if anterior != codigo:
+                    raise ValueError(f"'{texto}' aponta para {anterior} e {codigo}")
+
+    def __len__(self) -> int:
+        return len(self._descricoes)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """(código, texto do manual), na ordem do catálogo"""
+        return iter(self._descricoes.items())
+
+    def descricoes(self) -> List[str]:
+        """Textos do manual, na ordem do catálogo"""
+        return list(self._descricoes.values())
+
+    def descricao(self, codigo: str) -> str:
+        return self._descricoes[codigo]
+
+    def codigo(self, texto: str) -> Optional[str]:
+        """Código de um código, texto do manual ou sinônimo; None se não catalogado"""
+        return self._indice.get(chave_texto(texto))
+
+    def resolver(self, itens: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Códigos (sem repetição, na ordem informada) e itens não catalogados"""
+        codigos: Dict[str, None] = {}
+        desconhecidos = []
+        for item in itens:
+            codigo = self.codigo(item)
+            if codigo is None:
+                desconhecidos.append(item)
+            else:
+                codigos[codigo] = None
+        return list(codigos), desconhecidos
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Controle de admissão do Agente Colaborativo CAIXA
+Limites por usuário e tipo de operação (token bucket) e fila de prioridade para as vagas de execução
+"""
+
+import contextlib
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PRIORIDADE_INTERATIVA = 0
+PRIORIDADE_LOTE = 1
+
+# Tipo de operação -> (tokens por segundo, capacidade do balde) para cada usuário
+LIMITES_PADRAO: Dict[str, Tuple[float, float]] = {
+    "consultar": (5.0, 20.0),
+    "consultar_lote": (500.0, 5000.0),
+    "analisar": (2.0, 10.0),
+    "analisar_lote": (200.0, 2000.0)
+}
+
+# Espera máxima por uma vaga, em segundos; tráfego em lote desiste antes
+ESPERA_MAXIMA_PADRAO: Dict[int, float] = {
+    PRIORIDADE_INTERATIVA: 5.0,
+    PRIORIDADE_LOTE: 1.0
+}
+
+
+class BaldeTokens:
+    """Token bucket: acumula `taxa` tokens por segundo até `capacidade`"""
+
+    __slots__ = ("taxa", "capacidade", "tokens", "atualizado")
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = capacidade
+        self.atualizado = time.monotonic()
+
+    def _repor(self, agora: float):
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    def consumir(self, custo: float = 1.0) -> bool:
+        """Retira `custo` tokens se houver saldo; não bloqueia"""
+        self._repor(time.monotonic())
+        if self.tokens < custo:
+            return False
+        self.tokens -= custo
+        return True
+
+    def cheio(self) -> bool:
+        self._repor(time.monotonic())
+        return self.tokens >= self.capacidade
+
+
+class ControleAdmissao:
+    """Admite ou rejeita rapidamente chamadas ao agente
+
+    Cada par (usuário, operação) tem seu token bucket. As chamadas admitidas
+    disputam `max_simultaneas` vagas de execução; quem espera fica numa fila
+    de prioridade em que sessões interativas passam à frente do tráfego em
+    lote. Fila cheia ou espera esgotada resultam em rejeição imediata ("ocupado").
+    """
+
+    MAX_BALDES = 10000
+
+    def __init__(self, limites: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_simultaneas: Optional[int] = None, max_fila: int = 256,
+                 espera_maxima: Optional[Dict[int, float]] = None):
+        self.limites = {**LIMITES_PADRAO, **(limites or {})}
+        self.max_simultaneas = max_simultaneas or os.cpu_count() or 4
+        self.max_fila = max_fila
+        self.espera_maxima = {**ESPERA_MAXIMA_PADRAO, **(espera_maxima or {})}
+
+        self._lock = threading.Lock()
+        self._condicao = threading.Condition(self._lock)
+        self._baldes: Dict[Tuple[str, str], BaldeTokens] = {}
+        self._fila: List[Tuple[int, int]] = []
+        self._sequencia = itertools.count()
+        self._em_execucao = 0
+        self.contadores = {
+            "admitidas": 0,
+            "rejeitadas_limite": 0,
+            "rejeitadas_fila": 0,
+            "rejeitadas_espera": 0
+        }
+
+    def verificar_limite(self, usuario: str, operacao: str, custo: float = 1.0) -> bool:
+        """Consome tokens do balde do usuário para a operação; False se o limite foi atingido"""
+        limite = self.limites.get(operacao)
+        if limite is None:
+            return True
+
+        with self._lock:
+            balde = self._baldes.get((usuario, operacao))
+            if balde is None:
+                if len(self._baldes) >= self.MAX_BALDES:
+                    self._descartar_baldes_cheios()
+                balde = self._baldes[(usuario, operacao)] = BaldeTokens(*limite)
+            # Um lote maior que a capacidade nunca caberia: cobra o balde inteiro
+            if balde.consumir(min(custo, balde.capacidade)):
+                return True
+            self.contadores["rejeitadas_limite"] += 1
+            return False
+
+    def _descartar_baldes_cheios(self):
+        """Remove baldes de usuários ociosos (cheios equivalem a um balde novo)"""
+        for chave in [chave for chave, balde in self._baldes.items() if balde.cheio()]:
+            del self._baldes[chave]
+
+    @contextlib.contextmanager
+    def vaga(self, prioridade: int = PRIORIDADE_INTERATIVA) -> Iterator[bool]:
+        """Ocupa uma vaga de execução, esperando pela prioridade; produz False se rejeitado"""
+        admitida = self._ocupar(prioridade)
+        try:
+            yield admitida
+        finally:
+            if admitida:
+                with self._condicao:
+                    self._em_execucao -= 1
+                    self._condicao.notify_all()
+
+    @contextlib.contextmanager
+    def admitir(self, usuario: str, operacao: str, prioridade: int = PRIORIDADE_INTERATIVA,
+                custo: float = 1.0) -> Iterator[bool]:
+        """Aplica o limite do usuário e ocupa uma vaga; produz False quando a chamada deve ser recusada"""
+        if not self.verificar_limite(usuario, operacao, custo):
+            yield False
+            return
+        with self.vaga(prioridade) as admitida:
+            yield admitida
+
+    def _ocupar(self, prioridade: int) -> bool:
+        with self._condicao:
+            # Atalho: vaga livre e ninguém esperando
+            if not self._fila and self._em_execucao < self.max_simultaneas:
+                self._em_execucao += 1
+                self.contadores["admitidas"] += 1
+                return True
+
+            if len(self._fila) >= self.max_fila:
+                self.contadores["rejeitadas_fila"] += 1
+                return False
+
+            entrada = (prioridade, next(self._sequencia))
+            heapq.heappush(self._fila, entrada)
+            prazo = time.monotonic() + self.espera_maxima.get(prioridade, 1.0)
+
+            while not (self._fila[0] == entrada and self._em_execucao < self.max_simultaneas):
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    self._fila.remove(entrada)
+                    heapq.heapify(self._fila)
+                    self._condicao.notify_all()
+                    self.contadores["rejeitadas_espera"] += 1
+                    return False
+                self._condicao.wait(restante)
+
+            heapq.heappop(self._fila)
+            self._em_execucao += 1
+            self.contadores["admitidas"] += 1
+            # O próximo da fila pode ter vaga também
+            self._condicao.notify_all()
+            return True
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Fotografia dos contadores de admissão e da ocupação atual"""
+        with self._lock:
+            return dict(
+                self.contadores,
+                em_execucao=self._em_execucao,
+                na_fila=len(self._fila),
+                usuarios_monitorados=len({usuario for usuario, _ in self._baldes})
+            )
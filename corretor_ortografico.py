@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Correção ortográfica das consultas do Agente Colaborativo CAIXA
+Dicionário de deleções simétricas (estilo SymSpell) sobre o vocabulário da base de conhecimento
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from normalizacao_texto import normalizar_texto
+
+try:
+    from spellchecker import SpellChecker
+except ImportError:  # O léxico geral é opcional: sem ele valem o vocabulário e PALAVRAS_COMUNS
+    SpellChecker = None
+
+_RE_PALAVRA = re.compile(r"[^\W\d_]+")
+
+# Radicais de sentido oposto: uma correção nunca troca um pelo outro ("máximo" não vira "mínimo")
+RADICAIS_ANTONIMOS: Tuple[Tuple[str, str], ...] = (
+    ("maxim", "minim"),
+    ("maior", "menor"),
+    ("super", "infer"),
+    ("acima", "abaixo"),
+    ("antes", "depois"),
+    ("aument", "diminu"),
+    ("inclu", "exclu"),
+    ("permit", "proib"),
+    ("aprov", "reprov"),
+    ("credit", "debit")
+)
+
+
+# Palavras comuns do português que, mesmo com as regras de _erro_de_digitacao, ainda
+# passariam por erro de um termo da base ("ciente" -> "cliente"): as que o corretor
+# alterava entre as 20 mil mais frequentes do dicionário do pyspellchecker.
+PALAVRAS_COMUNS = frozenset(normalizar_texto(palavra) for palavra in """
+    estão pessoas vais fora foram possa cara quis peço meia ouro presença registo pare vitória
+    rico temo amas mina escrita pares tomado valia ciente sobe gesto leal perco põem direto
+    partículas registado soco milho caia consumir mito podre orações permita riso veado vitórias
+    suspenso fitas registada melhora atar feias simular permito contudo receia more socos ente
+    envolvia cota aviação caía registados conceda envolvas permitia financia garanta crentes
+    comeria receios marina rena aceso construa construo sérvios
+""".split())
+
+
+def _antonimos(a: str, b: str) -> bool:
+    return any(
+        (a.startswith(um) and b.startswith(outro)) or (a.startswith(outro) and b.startswith(um))
+        for um, outro in RADICAIS_ANTONIMOS
+    )
+
+
+def _erro_de_digitacao(termo: str, candidato: str) -> bool:
+    """Indica se o termo parece o candidato digitado às pressas
+
+    Valem letras omitidas, duas letras vizinhas trocadas e uma letra repetida,
+    sempre com a primeira letra certa. Trocas de letra ("cada"/"casa"),
+    flexões e derivações ("poder"/"poderia") ficam de fora: é assim que
+    palavras válidas fora do vocabulário costumam se parecer com as dele.
+    """
+    if termo[0] != candidato[0] or candidato.startswith(termo) or termo.startswith(candidato):
+        return False
+    if len(candidato) > len(termo):
+        letras = iter(candidato)
+        return all(letra in letras for letra in termo)
+    if len(candidato) == len(termo):
+        diferentes = [i for i, (a, b) in enumerate(zip(termo, candidato)) if a != b]
+        return (len(diferentes) == 2 and diferentes[1] == diferentes[0] + 1
+                and termo[diferentes[0]] == candidato[diferentes[1]]
+                and termo[diferentes[1]] == candidato[diferentes[0]])
+    return len(termo) == len(candidato) + 1 and any(
+        termo[i] == termo[i - 1] and termo[:i] + termo[i + 1:] == candidato for i in range(1, len(termo))
+    )
+
+
+class LexicoPortugues:
+    """Palavras do português (sem acentos), do dicionário do pyspellchecker
+
+    O dicionário (~400 mil palavras) é carregado no primeiro uso e
+    compartilhado por todas as instâncias do processo.
+    """
+
+    _palavras: Optional[Set[str]] = None
+    _lock = threading.Lock()
+
+    @property
+    def disponivel(self) -> bool:
+        return SpellChecker is not None
+
+    def _carregar(self) -> Set[str]:
+        with self._lock:
+            if LexicoPortugues._palavras is None:
+                LexicoPortugues._palavras = {
+                    palavra if palavra.isascii() else normalizar_texto(palavra)
+                    for palavra in SpellChecker(language="pt").word_frequency.dictionary
+                }
+        return LexicoPortugues._palavras
+
+    def __contains__(self, termo: str) -> bool:
+        return self.disponivel and termo in (self._palavras or self._carregar())
+
+
+def distancia_edicao(a: str, b: str, limite: int) -> int:
+    """Distância de Damerau-Levenshtein restrita (transposições adjacentes contam 1)
+
+    Retorna limite + 1 assim que a distância ultrapassa o limite.
+    """
+    # Prefixo e sufixo comuns não alteram a distância e encurtam a matriz
+    inicio = 0
+    while inicio < len(a) and inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    fim_a, fim_b = len(a), len(b)
+    while fim_a > inicio and fim_b > inicio and a[fim_a - 1] == b[fim_b - 1]:
+        fim_a -= 1
+        fim_b -= 1
+    a, b = a[inicio:fim_a], b[inicio:fim_b]
+
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    if not a or not b:
+        return max(len(a), len(b))
+
+    anterior2: List[int] = []
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        atual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            custo = 0 if a[i - 1] == b[j - 1] else 1
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                atual[j] = min(atual[j], anterior2[j - 2] + 1)
+        if min(atual) > limite:
+            return limite + 1
+        anterior2, anterior = anterior, atual
+    return anterior[-1]
+
+
+def _niveis_delecoes(palavra: str, distancia: int) -> Iterator[Set[str]]:
+    """Gera, sob demanda, as variantes da palavra com 0, 1, ... `distancia` letras removidas"""
+    nivel = {palavra}
+    yield nivel
+    for _ in range(distancia):
+        proxima = set()
+        for termo in nivel:
+            if len(termo) <= 1:
+                continue
+            for i in range(len(termo)):
+                proxima.add(termo[:i] + termo[i + 1:])
+        nivel = proxima
+        yield nivel
+
+
+class CorretorOrtografico:
+    """Corretor por deleções simétricas: dicionário e consulta geram só remoções de letras
+
+    As palavras são comparadas sem acentos; a correção devolve a grafia canônica
+    (a forma acentuada mais frequente no vocabulário), o que também restaura
+    acentos omitidos como em "amortizaçao" -> "amortização".
+
+    Só é corrigida por distância de edição a palavra desconhecida do
+    vocabulário, de PALAVRAS_COMUNS e do léxico geral do português (se o
+    pyspellchecker estiver instalado), e só quando o candidato explica o erro
+    como digitação (_erro_de_digitacao).
+    """
+
+    TAMANHO_MAXIMO_CACHE = 10000
+    # Palavras até este tamanho admitem só uma edição
+    TAMANHO_MAXIMO_UMA_EDICAO = 6
+    # O candidato precisa ser ao menos tantas vezes mais frequente que o segundo à mesma distância
+    MARGEM_FREQUENCIA = 2.0
+
+    def __init__(self, distancia_maxima: int = 2, tamanho_minimo: int = 4,
+                 lexico: Optional[LexicoPortugues] = None):
+        self.distancia_maxima = distancia_maxima
+        self.tamanho_minimo = tamanho_minimo
+        self.lexico = lexico
+        self._frequencias: Counter = Counter()
+        self._grafias: Dict[str, Counter] = {}
+        self._delecoes: Dict[str, List[str]] = {}
+        self._cache: Dict[str, Optional[str]] = {}
+        self.acertos_cache = 0
+        self.falhas_cache = 0
+
+    def adicionar(self, palavra: str, frequencia: int = 1):
+        """Adiciona uma palavra ao dicionário, indexando suas deleções"""
+        forma = palavra.lower()
+        termo = normalizar_texto(forma)
+        if termo not in self._frequencias:
+            for nivel in _niveis_delecoes(termo, self.distancia_maxima):
+                for delecao in nivel:
+                    self._delecoes.setdefault(delecao, []).append(termo)
+        self._frequencias[termo] += frequencia
+        self._grafias.setdefault(termo, Counter())[forma] += frequencia
+        self._cache.clear()
+
+    def adicionar_texto(self, texto: str, frequencia: int = 1):
+        """Adiciona todas as palavras de um texto ao dicionário"""
+        for palavra in _RE_PALAVRA.findall(texto):
+            self.adicionar(palavra, frequencia)
+
+    def _grafia_canonica(self, termo: str) -> str:
+        return self._grafias[termo].most_common(1)[0][0]
+
+    def sugerir(self, palavra: str) -> Optional[str]:
+        """Retorna a grafia corrigida da palavra, ou None se não houver correção"""
+        forma = palavra.lower()
+        if forma in self._cache:
+            self.acertos_cache += 1
+            return self._cache[forma]
+        self.falhas_cache += 1
+
+        termo = normalizar_texto(forma)
+        sugestao = None
+        if termo in self._frequencias:
+            canonica = self._grafia_canonica(termo)
+            if canonica != forma and forma not in self._grafias[termo]:
+                sugestao = canonica
+        elif (len(termo) >= self.tamanho_minimo and not self._conhecida(termo)):
+            sugestao = self._buscar_candidato(termo)
+
+        if len(self._cache) >= self.TAMANHO_MAXIMO_CACHE:
+            self._cache.clear()
+        self._cache[forma] = sugestao
+        return sugestao
+
+    def _conhecida(self, termo: str) -> bool:
+        """Indica se a palavra, fora do vocabulário, é uma palavra válida do português"""
+        return termo in PALAVRAS_COMUNS or (self.lexico is not None and termo in self.lexico)
+
+    def _buscar_candidato(self, termo: str) -> Optional[str]:
+        """Procura a palavra do dicionário mais próxima pelas deleções compartilhadas
+
+        Sem um candidato claramente mais frequente que os demais à mesma
+        distância, a palavra fica como está.
+        """
+        # Palavras curtas admitem só uma edição para não virarem outra palavra válida
+        limite = 1 if len(termo) <= self.TAMANHO_MAXIMO_UMA_EDICAO else self.distancia_maxima
+        candidatos: Dict[str, int] = {}
+        avaliados: Set[str] = set()
+
+        for removidas, nivel in enumerate(_niveis_delecoes(termo, limite)):
+            # Candidatos vindos de mais remoções não podem superar uma correção já mais próxima
+            if candidatos and removidas > min(candidatos.values()):
+                break
+            for delecao in nivel:
+                for candidato in self._delecoes.get(delecao, ()):
+                    if candidato in avaliados:
+                        continue
+                    avaliados.add(candidato)
+                    if _antonimos(termo, candidato) or not _erro_de_digitacao(termo, candidato):
+                        continue
+                    distancia = distancia_edicao(termo, candidato, limite)
+                    if distancia <= limite:
+                        candidatos[candidato] = distancia
+
+        if not candidatos:
+            return None
+        menor = min(candidatos.values())
+        frequencias = sorted((self._frequencias[candidato], candidato)
+                             for candidato, distancia in candidatos.items() if distancia == menor)
+        if len(frequencias) > 1 and frequencias[-1][0] < self.MARGEM_FREQUENCIA * frequencias[-2][0]:
+            return None
+        return self._grafia_canonica(frequencias[-1][1])
+
+    def corrigir(self, texto: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Corrige as palavras do texto e informa as correções aplicadas como (original, corrigida)"""
+        correcoes: List[Tuple[str, str]] = []
+
+        def substituir(encontrada: re.Match) -> str:
+            palavra = encontrada.group(0)
+            sugestao = self.sugerir(palavra)
+            if sugestao is None:
+                return palavra
+            correcoes.append((palavra, sugestao))
+            return sugestao
+
+        return _RE_PALAVRA.sub(substituir, texto), correcoes
+
+    def __len__(self) -> int:
+        return len(self._frequencias)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportação em fluxo da auditoria do Agente Colaborativo CAIXA
+CSV, NDJSON ou Parquet (com pyarrow) escritos página a página, com memória constante
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Iterable, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional
+    pa = None
+    pq = None
+
+# Formato -> (tipo MIME, extensão)
+FORMATOS_EXPORTACAO = {
+    "csv": ("text/csv", ".csv"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet")
+}
+
+
+def formatos_disponiveis() -> List[str]:
+    """Formatos suportados neste ambiente (Parquet só com pyarrow instalado)"""
+    return [formato for formato in FORMATOS_EXPORTACAO if formato != "parquet" or pa is not None]
+
+
+def escrever_paginas(paginas: Iterable[List[Tuple[Any, ...]]], colunas: List[Tuple[str, str]],
+                     formato: str, destino: BinaryIO) -> int:
+    """Escreve as páginas no destino binário à medida que chegam; retorna o total de linhas"""
+    if formato not in formatos_disponiveis():
+        raise ValueError(f"Formato de exportação indisponível: {formato}")
+    nomes = [nome for nome, _ in colunas]
+    total = 0
+
+    if formato == "parquet":
+        tipos = {"inteiro": pa.int64(), "real": pa.float64(), "texto": pa.string()}
+        esquema = pa.schema([(nome, tipos[tipo]) for nome, tipo in colunas])
+        # Um grupo de linhas por página: o arquivo nunca é montado inteiro na memória
+        with pq.ParquetWriter(destino, esquema) as escritor:
+            for pagina in paginas:
+                valores = list(zip(*pagina))
+                escritor.write_table(pa.Table.from_arrays(
+                    [pa.array(coluna, type=esquema.field(i).type) for i, coluna in enumerate(valores)],
+                    schema=esquema
+                ))
+                total += len(pagina)
+        return total
+
+    texto = io.TextIOWrapper(destino, encoding="utf-8", newline="")
+    try:
+        if formato == "csv":
+            escritor_csv = csv.writer(texto)
+            escritor_csv.writerow(nomes)
+            for pagina in paginas:
+                escritor_csv.writerows(pagina)
+                total += len(pagina)
+        else:
+            for pagina in paginas:
+                texto.writelines(
+                    json.dumps(dict(zip(nomes, linha)), ensure_ascii=False) + "\n" for linha in pagina
+                )
+                total += len(pagina)
+        texto.flush()
+    finally:
+        # Solta o destino sem fechá-lo: quem o abriu decide quando fechar
+        texto.detach()
+    return total
+
+
+def exportar_auditoria(agente, tabela: str, formato: str, destino: BinaryIO,
+                       inicio: Optional[str] = None, fim: Optional[str] = None,
+                       usuario: Optional[str] = None, tamanho_pagina: int = 5000) -> int:
+    """Exporta uma tabela de auditoria filtrada por período e usuário para `destino`"""
+    paginas = agente.paginas_auditoria(tabela, inicio, fim, usuario, tamanho_pagina)
+    return escrever_paginas(paginas, agente.COLUNAS_EXPORTACAO[tabela], formato, destino)
+
+
+def exportar_para_arquivo(agente, tabela: str, formato: str, caminho: Optional[str] = None,
+                          **filtros) -> Tuple[str, int]:
+    """Exporta para `caminho` (ou um arquivo temporário); retorna o caminho e o total de linhas"""
+    if caminho is None:
+        descritor, caminho = tempfile.mkstemp(prefix=f"{tabela}_", suffix=FORMATOS_EXPORTACAO[formato][1])
+        os.close(descritor)
+    try:
+        with open(caminho, "wb") as destino:
+            total = exportar_auditoria(agente, tabela, formato, destino, **filtros)
+    except Exception:
+        os.remove(caminho)
+        raise
+    return caminho, total
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentação de latência do Agente Colaborativo CAIXA
+Histogramas de baldes fixos por etapa, com percentis e vazão, e custo quase nulo quando desativada
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List
+
+# Limites superiores dos baldes, em segundos: de 1 µs a ~70 s, razão 2^(1/4) (erro de percentil <= 19%)
+LIMITES_BALDES: List[float] = [1e-6 * 2 ** (i / 4) for i in range(105)]
+
+
+class HistogramaLatencia:
+    """Histograma de latências com baldes fixos em escala logarítmica"""
+
+    __slots__ = ("contagens", "total", "soma", "maximo", "_lock")
+
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES_BALDES) + 1)
+        self.total = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos: float):
+        indice = bisect.bisect_left(LIMITES_BALDES, segundos)
+        with self._lock:
+            self.contagens[indice] += 1
+            self.total += 1
+            self.soma += segundos
+            if segundos > self.maximo:
+                self.maximo = segundos
+
+    def percentil(self, p: float) -> float:
+        """Limite superior do balde que contém o percentil p (0-100), em segundos"""
+        if self.total == 0:
+            return 0.0
+        alvo = self.total * p / 100.0
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo and contagem:
+                if indice >= len(LIMITES_BALDES):
+                    return self.maximo
+                return min(LIMITES_BALDES[indice], self.maximo)
+        return self.maximo
+
+
+class _EtapaMedida:
+    """Context manager que mede uma etapa e registra no histograma correspondente"""
+
+    __slots__ = ("_histograma", "_inicio")
+
+    def __init__(self, histograma: HistogramaLatencia):
+        self._histograma = histograma
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histograma.registrar(time.perf_counter() - self._inicio)
+        return False
+
+
+class _EtapaInativa:
+    """Context manager vazio usado quando a instrumentação está desligada"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_ETAPA_INATIVA = _EtapaInativa()
+
+
+class Instrumentacao:
+    """Registro de latência por etapa com fotografia de percentis e vazão
+
+    Uso: ``with instrumentacao.etapa("consultar.rotear"): ...``. Desligada, a
+    chamada devolve um context manager vazio compartilhado, sem medir o tempo.
+    """
+
+    def __init__(self, ativa: bool = False):
+        self.ativa = ativa
+        self._histogramas: Dict[str, HistogramaLatencia] = {}
+        self._lock = threading.Lock()
+        self._inicio = time.monotonic()
+
+    def ativar(self):
+        self.ativa = True
+
+    def desativar(self):
+        self.ativa = False
+
+    def etapa(self, nome: str):
+        """Context manager que mede a etapa `nome` (sem efeito se desativada)"""
+        if not self.ativa:
+            return _ETAPA_INATIVA
+        return _EtapaMedida(self._histograma(nome))
+
+    def registrar(self, nome: str, segundos: float):
+        """Registra uma duração já medida para a etapa `nome`"""
+        if self.ativa:
+            self._histograma(nome).registrar(segundos)
+
+    def _histograma(self, nome: str) -> HistogramaLatencia:
+        histograma = self._histogramas.get(nome)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(nome, HistogramaLatencia())
+        return histograma
+
+    def reiniciar(self):
+        """Descarta as medições acumuladas"""
+        with self._lock:
+            self._histogramas = {}
+            self._inicio = time.monotonic()
+
+    def instantaneo(self) -> Dict[str, Dict[str, float]]:
+        """Fotografia por etapa: contagem, vazão, média, p50/p95/p99 e máximo (em ms)"""
+        decorrido = max(time.monotonic() - self._inicio, 1e-9)
+        fotografia = {}
+        for nome, histograma in sorted(self._histogramas.items()):
+            if not histograma.total:
+                continue
+            fotografia[nome] = {
+                "contagem": histograma.total,
+                "por_segundo": histograma.total / decorrido,
+                "media_ms": histograma.soma / histograma.total * 1000,
+                "p50_ms": histograma.percentil(50) * 1000,
+                "p95_ms": histograma.percentil(95) * 1000,
+                "p99_ms": histograma.percentil(99) * 1000,
+                "max_ms": histograma.maximo * 1000
+            }
+        return fotografia
@@ -7,9 +7,33 @@ Sistema completo de consultas e análise de conformidade
 
 import streamlit as st
 import json
+import os
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 from agente_caixa_completo import AgenteCaixaCreditoCompleto
+from exportacao import FORMATOS_EXPORTACAO, exportar_para_arquivo, formatos_disponiveis
+from rastro_analise import descrever_rastro
+from validador_documentos import OPERACOES_COM_VENDEDOR, OPERACOES_DOCUMENTACAO, TIPOS_VENDEDOR
+
+ROTULOS_EXPORTACAO = {
+    "consultas": "Consultas",
+    "analises_conformidade": "Análises de conformidade",
+    "historico_decisoes": "Histórico de decisões"
+}
+
+ROTULOS_OPERACOES = {
+    "aquisicao": "Aquisição",
+    "construcao_individual": "Construção individual",
+    "reforma_ampliacao": "Reforma / ampliação"
+}
+
+ROTULOS_GRUPOS_DOCUMENTOS = {
+    "tomador": "Tomador",
+    "vendedor": "Vendedor",
+    "imovel": "Imóvel",
+    "modalidade": "Obra",
+    "programa": "Programa"
+}
 
 # Configuração da página
 st.set_page_config(
@@ -95,6 +119,7 @@ def main():
             [
                 "🔍 Consultas Inteligentes",
                 "📊 Análise de Conformidade",
+                "🔎 Busca no Histórico",
                 "📈 Relatórios e Métricas",
                 "📚 Base de Conhecimento",
                 "🛠️ Ferramentas Avançadas"
@@ -117,6 +142,8 @@ def main():
         consultas_inteligentes(agente, usuario)
     elif opcao == "📊 Análise de Conformidade":
         analise_conformidade(agente, usuario)
+    elif opcao == "🔎 Busca no Histórico":
+        busca_historico(agente)
     elif opcao == "📈 Relatórios e Métricas":
         relatorios_metricas(agente)
     elif opcao == "📚 Base de Conhecimento":
@@ -124,9 +151,16 @@ def main():
     elif opcao == "🛠️ Ferramentas Avançadas":
         ferramentas_avancadas(agente, usuario)
 
+def usar_sugestao(texto):
+    """Copia a sugestão escolhida para o campo de consulta"""
+    st.session_state.pergunta = texto
+
 def consultas_inteligentes(agente, usuario):
     st.header("🔍 Consultas Inteligentes")
     
+    # Incorpora ao autocompletar as consultas registradas desde a última execução
+    agente.atualizar_sugestoes()
+    
     col1, col2 = st.columns([2, 1])
     
     with col1:
@@ -141,9 +175,18 @@ def consultas_inteligentes(agente, usuario):
         pergunta = st.text_area(
             "Digite sua pergunta:",
             placeholder="Ex: Quais são as exigências para imóveis no Distrito Federal?",
-            height=100
+            height=100,
+            key="pergunta"
         )
         
+        # Sugestões por prefixo a partir do histórico e do vocabulário da base
+        if pergunta:
+            sugestoes = [s for s in agente.sugerir_perguntas(pergunta, limite=5) if s != pergunta]
+            if sugestoes:
+                st.caption("Sugestões:")
+                for i, sugestao in enumerate(sugestoes):
+                    st.button(f"↳ {sugestao}", key=f"sug_{i}", on_click=usar_sugestao, args=(sugestao,))
+        
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
             consultar = st.button("🔍 Consultar", type="primary")
@@ -167,21 +210,11 @@ def consultas_inteligentes(agente, usuario):
     with col2:
         st.markdown("### 🎯 Exemplos de Consultas")
         
-        exemplos = [
-            "Quais são os programas habitacionais disponíveis?",
-            "Quais exigências para o tomador?",
-            "Que imóveis são aceitos como garantia?",
-            "Como funciona o redutor FGTS?",
-            "Quais documentos para construção individual?",
-            "Quais são as tarifas aplicáveis?",
-            "Como funciona a conformidade proativa?",
-            "Quais impedimentos para imóveis?"
-        ]
+        # Perguntas mais frequentes (histórico + perguntas curadas do agente)
+        exemplos = agente.sugerir_perguntas("", limite=8)
         
         for exemplo in exemplos:
-            if st.button(f"💬 {exemplo}", key=f"ex_{hash(exemplo)}"):
-                st.session_state.pergunta_exemplo = exemplo
-                st.rerun()
+            st.button(f"💬 {exemplo}", key=f"ex_{hash(exemplo)}", on_click=usar_sugestao, args=(exemplo,))
 
 def analise_conformidade(agente, usuario):
     st.header("📊 Análise de Conformidade")
@@ -252,7 +285,11 @@ def analise_conformidade(agente, usuario):
             dados_operacao["programa"]["saldo_suficiente"] = saldo_suficiente
         
         with st.spinner("Analisando conformidade..."):
-            resultado = agente.analisar_conformidade_avancada(dados_operacao, usuario)
+            resultado = agente.analisar_conformidade_avancada(dados_operacao, usuario, rastrear=True)
+        
+        if resultado.get("ocupado"):
+            st.warning("⏳ Sistema ocupado no momento. Aguarde alguns instantes e repita a análise.")
+            return
         
         # Exibir resultados
         col1, col2, col3 = st.columns(3)
@@ -308,6 +345,81 @@ def analise_conformidade(agente, usuario):
             st.markdown("### 💡 Recomendações")
             for recomendacao in resultado['recomendacoes']:
                 st.markdown(f"• {recomendacao}")
+        
+        st.session_state.ultima_operacao = agente.chave_operacao(dados_operacao)
+        st.session_state.ultimo_rastro = (resultado["detalhes_analise"].get("rastro"), dados_operacao)
+    
+    # Rastro por regra da última análise, descrito só quando o analista pede
+    rastro, dados_rastreados = st.session_state.get("ultimo_rastro") or (None, None)
+    if rastro and st.checkbox("🔎 Mostrar regras avaliadas"):
+        st.dataframe([
+            {
+                "Regra": linha["descricao"],
+                "Entradas": ", ".join(f"{campo} = {valor}" for campo, valor in linha["entradas"].items()),
+                "Resultado": linha["resultado"],
+                "Contribuição": linha["contribuicao"]
+            }
+            for linha in descrever_rastro(rastro, dados_rastreados, agente.modelo_score.pesos)
+        ])
+    
+    # Revisão do analista sobre a última operação analisada
+    if st.session_state.get("ultima_operacao"):
+        operacao = st.session_state.ultima_operacao
+        with st.form("decisao_analista"):
+            st.subheader("✍️ Decisão do Analista")
+            decisao = st.selectbox("Decisão", ["aprovada", "reprovada", "pendente"])
+            justificativa = st.text_area("Justificativa")
+            registrar = st.form_submit_button("💾 Registrar Decisão")
+        
+        if registrar:
+            if justificativa.strip():
+                agente.registrar_decisao(operacao, decisao, justificativa.strip(), usuario)
+                st.success("✅ Decisão registrada no histórico")
+            else:
+                st.warning("Informe a justificativa da decisão")
+        
+        with st.expander(f"⚖️ Histórico de decisões da operação {operacao}"):
+            for registro in agente.historico_operacao(operacao):
+                st.markdown(f"• {registro['timestamp'][:16]} | {registro['tipo_decisao']} → "
+                            f"**{registro['decisao']}** ({registro['usuario']}): {registro['justificativa']}")
+
+def busca_historico(agente):
+    st.header("🔎 Busca no Histórico de Consultas")
+    
+    with st.form("busca_historico"):
+        texto = st.text_input("Termos da busca:", placeholder="Ex: imóveis DF")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            filtro_usuario = st.text_input("Usuário (opcional)")
+        with col2:
+            categoria = st.selectbox("Categoria", ["Todas"] + list(agente.SECOES_CONSULTA) + ["geral"])
+        with col3:
+            periodo = st.selectbox("Período", [7, 30, 90, 365, 0],
+                                   format_func=lambda dias: f"Últimos {dias} dias" if dias else "Todo o histórico")
+        buscar = st.form_submit_button("🔎 Buscar", type="primary")
+    
+    if not buscar or not texto.strip():
+        return
+    
+    inicio = (datetime.now() - timedelta(days=periodo)).isoformat() if periodo else None
+    consultas = agente.buscar_consultas(
+        texto, usuario=filtro_usuario.strip() or None,
+        categoria=None if categoria == "Todas" else categoria, inicio=inicio, limite=50
+    )
+    
+    st.subheader(f"💬 Perguntas ({len(consultas)})")
+    if not consultas:
+        st.info("Nenhuma consulta encontrada com esses termos e filtros.")
+    for registro in consultas:
+        st.markdown(f"• {registro['trecho']}")
+        st.caption(f"{registro['timestamp'][:16]} | {registro['usuario']} | {registro['categoria']}")
+    
+    respostas = agente.buscar_respostas(texto, limite=5)
+    if respostas:
+        st.subheader("📄 Respostas já dadas que mencionam os termos")
+        for registro in respostas:
+            with st.expander(registro["trecho"][:120]):
+                st.markdown(agente.obter_resposta(registro["hash"]))
 
 def relatorios_metricas(agente):
     st.header("📈 Relatórios e Métricas")
@@ -336,16 +448,30 @@ def relatorios_metricas(agente):
     with col2:
         st.subheader("📈 Métricas do Sistema")
         
-        # Métricas simuladas (em produção, viriam do banco de dados)
+        # Contadores em memória do agente (sem consultas ao banco)
+        metricas = agente.metricas.instantaneo()
         col_m1, col_m2 = st.columns(2)
         
         with col_m1:
-            st.metric("Total de Consultas", "1,234", "+12%")
-            st.metric("Análises de Conformidade", "567", "+8%")
+            st.metric("Total de Consultas", f"{metricas['consultas_total']:,}")
+            st.metric("Análises de Conformidade", f"{metricas['analises_total']:,}")
+            st.metric("Fila de Auditoria", metricas["medidores"]["agente_fila_auditoria_profundidade"])
         
         with col_m2:
-            st.metric("Score Médio", "87.3%", "+2.1%")
-            st.metric("Taxa de Aprovação", "73.2%", "-1.5%")
+            st.metric("Score Médio", f"{metricas['score_medio']:.1f}%")
+            st.metric("Taxa de Aprovação", f"{metricas['taxa_aprovacao']:.1%}")
+            gravacoes = metricas["gravacao_bd_ms"].get("consultas")
+            st.metric("Gravação no Banco (p99)", f"{gravacoes['p99_ms']:.2f} ms" if gravacoes else "—")
+        
+        if metricas["consultas_por_categoria"]:
+            st.markdown("**Consultas por categoria**")
+            st.bar_chart(metricas["consultas_por_categoria"])
+        
+        if metricas["caches"]:
+            st.markdown("**Taxa de acerto dos caches**")
+            for nome, cache in sorted(metricas["caches"].items()):
+                st.progress(cache["taxa_acerto"], text=f"{nome}: {cache['taxa_acerto']:.1%} "
+                            f"({cache['acertos']:,} acertos / {cache['falhas']:,} falhas)")
 
 def base_conhecimento(agente):
     st.header("📚 Base de Conhecimento")
@@ -410,8 +536,8 @@ def base_conhecimento(agente):
         
         with tab3:
             st.markdown("**Impedimentos:**")
-            for impedimento in agente.base_conhecimento["exigencias_imovel"]["impedimentos"]:
-                st.markdown(f"❌ {impedimento}")
+            for codigo, impedimento in agente.catalogo_impedimentos:
+                st.markdown(f"❌ `{codigo}` {impedimento}")
 
 def ferramentas_avancadas(agente, usuario):
     st.header("🛠️ Ferramentas Avançadas")
@@ -429,13 +555,88 @@ def ferramentas_avancadas(agente, usuario):
         st.subheader("✅ Validador de Documentos")
         st.info("Valide se a documentação está completa para cada tipo de operação.")
         
-        # Implementar validador
-        st.markdown("*Funcionalidade em desenvolvimento*")
+        validador = agente.validador_documentos
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            programa = st.selectbox("Programa", list(agente.base_conhecimento["programas"]))
+        with col2:
+            operacao = st.selectbox("Operação", list(OPERACOES_DOCUMENTACAO),
+                                    format_func=lambda nome: ROTULOS_OPERACOES[nome])
+        with col3:
+            tipo_vendedor = st.selectbox("Vendedor", TIPOS_VENDEDOR,
+                                         format_func=lambda tipo: tipo or (
+                                             "Não informado" if operacao in OPERACOES_COM_VENDEDOR
+                                             else "Sem vendedor"))
+        
+        # Um checkbox por documento exigido na combinação, agrupados como na matriz do validador
+        entregues = {}
+        for grupo, documento in validador.documentos_exigidos(programa, operacao, tipo_vendedor):
+            if st.checkbox(f"{ROTULOS_GRUPOS_DOCUMENTOS[grupo]}: {documento}", key=f"doc_{grupo}_{documento}"):
+                entregues.setdefault(grupo, []).append(documento)
+        
+        validacao = validador.validar(programa, operacao, tipo_vendedor, entregues)
+        if validacao["completa"]:
+            st.success("✅ Documentação completa para esta operação")
+        else:
+            for grupo, faltantes in validacao["faltantes"].items():
+                st.warning(f"📄 **{ROTULOS_GRUPOS_DOCUMENTOS[grupo]}** — faltam: " + "; ".join(faltantes))
+        
+        st.markdown("**Fila de pedidos (JSONL)**")
+        st.caption('Uma linha por pedido: {"id", "programa", "operacao", "tipo_vendedor", "documentos"}')
+        arquivo_fila = st.file_uploader("Arquivo da fila", type=["jsonl", "json"])
+        if arquivo_fila is not None:
+            pedidos = [json.loads(linha) for linha in arquivo_fila.getvalue().decode("utf-8").splitlines()
+                       if linha.strip()]
+            resultados = agente.validar_documentos_lote(pedidos)
+            completos = sum(resultado["completa"] for resultado in resultados)
+            st.metric("Pedidos completos", f"{completos}/{len(resultados)}")
+            st.dataframe([
+                {
+                    "id": pedido.get("id", numero),
+                    "completa": resultado["completa"],
+                    "faltantes": "; ".join(doc for docs in resultado["faltantes"].values() for doc in docs),
+                    "erro": resultado.get("erro", "")
+                }
+                for numero, (pedido, resultado) in enumerate(zip(pedidos, resultados), 1)
+            ])
     
     with tab3:
         st.subheader("📤 Exportar Dados")
         st.info("Exporte relatórios e análises em diferentes formatos.")
         
+        with st.form("exportar_auditoria"):
+            col1, col2 = st.columns(2)
+            with col1:
+                tabela = st.selectbox("Dados", list(agente.COLUNAS_EXPORTACAO),
+                                      format_func=lambda nome: ROTULOS_EXPORTACAO[nome])
+                formato = st.selectbox("Formato", formatos_disponiveis(), format_func=str.upper)
+            with col2:
+                periodo = st.number_input("Últimos N dias", min_value=1, max_value=3650, value=30)
+                filtro_usuario = st.text_input("Usuário (opcional)")
+            caminho_disco = st.text_input("Salvar também em (caminho no servidor, opcional)")
+            exportar = st.form_submit_button("📤 Gerar Exportação", type="primary")
+        
+        if exportar:
+            filtros = {
+                "inicio": (datetime.now() - timedelta(days=int(periodo))).isoformat(),
+                "usuario": filtro_usuario.strip() or None
+            }
+            # As linhas vão página a página para o disco; só o arquivo final é entregue ao navegador
+            with st.spinner("Exportando..."):
+                caminho, total = exportar_para_arquivo(agente, tabela, formato,
+                                                       caminho_disco.strip() or None, **filtros)
+            st.success(f"✅ {total:,} linhas exportadas" + (f" para {caminho}" if caminho_disco.strip() else ""))
+            mime, extensao = FORMATOS_EXPORTACAO[formato]
+            with open(caminho, "rb") as arquivo:
+                st.download_button(
+                    label=f"💾 Download {formato.upper()}",
+                    data=arquivo,
+                    file_name=f"{tabela}{extensao}",
+                    mime=mime
+                )
+            if not caminho_disco.strip():
+                os.remove(caminho)
+        
         if st.button("📊 Exportar Base de Conhecimento (JSON)"):
             dados_export = json.dumps(agente.base_conhecimento, ensure_ascii=False, indent=2)
             st.download_button(
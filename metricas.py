@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas operacionais do Agente Colaborativo CAIXA
+Contadores e medidores em memória, exportados no formato de texto do Prometheus sem consultar o banco
+"""
+
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from instrumentacao import LIMITES_BALDES, HistogramaLatencia
+
+# Um a cada quatro baldes da instrumentação: potências de 2 de 1 µs a ~70 s
+_PASSO_BALDES_EXPORTADOS = 4
+
+
+class MetricasAgente:
+    """Contadores sempre ligados das operações do agente
+
+    Cada atualização é um incremento sob uma trava curta; a fotografia e a
+    exportação leem apenas a memória, então o monitoramento não disputa o
+    SQLite com a auditoria. Valores mantidos por outros componentes (caches
+    próprios, profundidade da fila) entram como funções lidas na exportação.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.consultas_por_categoria: Counter = Counter()
+        self.analises = 0
+        self.analises_conformes = 0
+        self.soma_scores = 0.0
+        # Nome do cache -> [acertos, falhas]
+        self.caches: Dict[str, List[int]] = {}
+        self.gravacoes: Dict[str, HistogramaLatencia] = {}
+        self._fontes_cache: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._medidores: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+    def registrar_fonte_cache(self, nome: str, leitura: Callable[[], Tuple[int, int]]):
+        """Cache que mantém os próprios contadores; `leitura` retorna (acertos, falhas)"""
+        self._fontes_cache[nome] = leitura
+
+    def registrar_medidor(self, nome: str, descricao: str, leitura: Callable[[], float]):
+        """Medidor (gauge) cujo valor é lido no momento da exportação"""
+        self._medidores[nome] = (descricao, leitura)
+
+    def _contagens_cache(self) -> Dict[str, Tuple[int, int]]:
+        with self._lock:
+            caches = {nome: tuple(contagem) for nome, contagem in self.caches.items()}
+        for nome, leitura in self._fontes_cache.items():
+            caches[nome] = tuple(leitura())
+        return caches
+
+    def contar_consultas(self, categorias: Iterable[str]):
+        """Soma uma consulta para cada categoria informada"""
+        with self._lock:
+            self.consultas_por_categoria.update(categorias)
+
+    def contar_analise(self, conforme: bool, score: float):
+        with self._lock:
+            self.analises += 1
+            self.analises_conformes += bool(conforme)
+            self.soma_scores += score
+
+    def contar_cache(self, nome: str, acertos: int = 0, falhas: int = 0):
+        with self._lock:
+            contagem = self.caches.setdefault(nome, [0, 0])
+            contagem[0] += acertos
+            contagem[1] += falhas
+
+    def observar_gravacao(self, tipo: str, segundos: float):
+        """Registra a duração de uma transação de auditoria do tipo informado"""
+        histograma = self.gravacoes.get(tipo)
+        if histograma is None:
+            with self._lock:
+                histograma = self.gravacoes.setdefault(tipo, HistogramaLatencia())
+        histograma.registrar(segundos)
+
+    def instantaneo(self) -> Dict:
+        """Fotografia dos contadores com as taxas já calculadas"""
+        with self._lock:
+            consultas = dict(self.consultas_por_categoria)
+            analises, conformes, soma_scores = self.analises, self.analises_conformes, self.soma_scores
+
+        caches = self._contagens_cache()
+        return {
+            "consultas_total": sum(consultas.values()),
+            "consultas_por_categoria": consultas,
+            "analises_total": analises,
+            "analises_conformes": conformes,
+            "taxa_aprovacao": conformes / analises if analises else 0.0,
+            "score_medio": soma_scores / analises if analises else 0.0,
+            "caches": {
+                nome: {
+                    "acertos": acertos,
+                    "falhas": falhas,
+                    "taxa_acerto": acertos / (acertos + falhas) if acertos + falhas else 0.0
+                }
+                for nome, (acertos, falhas) in caches.items()
+            },
+            "gravacao_bd_ms": {
+                tipo: {
+                    "contagem": histograma.total,
+                    "media_ms": histograma.soma / histograma.total * 1000,
+                    "p99_ms": histograma.percentil(99) * 1000
+                }
+                for tipo, histograma in list(self.gravacoes.items()) if histograma.total
+            },
+            "medidores": {nome: leitura() for nome, (_, leitura) in self._medidores.items()}
+        }
+
+    def exportar_prometheus(self) -> str:
+        """Texto no formato de exposição do Prometheus (0.0.4)"""
+        with self._lock:
+            consultas = sorted(self.consultas_por_categoria.items())
+            analises, conformes, soma_scores = self.analises, self.analises_conformes, self.soma_scores
+
+        linhas = [
+            "# HELP agente_consultas_total Consultas respondidas por categoria",
+            "# TYPE agente_consultas_total counter"
+        ]
+        linhas += [f'agente_consultas_total{{categoria="{_rotulo(c)}"}} {n}' for c, n in consultas]
+
+        linhas += [
+            "# HELP agente_analises_total Análises de conformidade por resultado",
+            "# TYPE agente_analises_total counter",
+            f'agente_analises_total{{conforme="true"}} {conformes}',
+            f'agente_analises_total{{conforme="false"}} {analises - conformes}',
+            "# HELP agente_taxa_aprovacao Fração das análises consideradas conformes",
+            "# TYPE agente_taxa_aprovacao gauge",
+            f"agente_taxa_aprovacao {conformes / analises if analises else 0.0}",
+            "# HELP agente_score_conformidade_soma Soma dos scores de conformidade",
+            "# TYPE agente_score_conformidade_soma counter",
+            f"agente_score_conformidade_soma {soma_scores}"
+        ]
+
+        linhas += [
+            "# HELP agente_cache_requisicoes_total Consultas aos caches do agente por resultado",
+            "# TYPE agente_cache_requisicoes_total counter"
+        ]
+        for nome, (acertos, falhas) in sorted(self._contagens_cache().items()):
+            linhas.append(f'agente_cache_requisicoes_total{{cache="{_rotulo(nome)}",resultado="acerto"}} {acertos}')
+            linhas.append(f'agente_cache_requisicoes_total{{cache="{_rotulo(nome)}",resultado="falha"}} {falhas}')
+
+        linhas += [
+            "# HELP agente_gravacao_bd_segundos Duração das transações de auditoria no SQLite",
+            "# TYPE agente_gravacao_bd_segundos histogram"
+        ]
+        for tipo, histograma in sorted(self.gravacoes.items()):
+            linhas += _linhas_histograma("agente_gravacao_bd_segundos", f'tipo="{_rotulo(tipo)}"', histograma)
+
+        for nome, (descricao, leitura) in sorted(self._medidores.items()):
+            linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} gauge", f"{nome} {leitura()}"]
+
+        return "\n".join(linhas) + "\n"
+
+
+def _rotulo(valor: str) -> str:
+    """Escapa um valor de rótulo do Prometheus"""
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _linhas_histograma(nome: str, rotulos: str, histograma: HistogramaLatencia) -> List[str]:
+    """Baldes cumulativos (le), _sum e _count de um histograma de latência"""
+    contagens = list(histograma.contagens)
+    linhas = []
+    acumulado = 0
+    for indice, limite in enumerate(LIMITES_BALDES):
+        acumulado += contagens[indice]
+        if indice % _PASSO_BALDES_EXPORTADOS == 0:
+            linhas.append(f'{nome}_bucket{{{rotulos},le="{limite:.6g}"}} {acumulado}')
+    acumulado += contagens[-1]
+    linhas += [
+        f'{nome}_bucket{{{rotulos},le="+Inf"}} {acumulado}',
+        f"{nome}_sum{{{rotulos}}} {histograma.soma}",
+        f"{nome}_count{{{rotulos}}} {acumulado}"
+    ]
+    return linhas
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modelo de score de conformidade do Agente Colaborativo CAIXA
+Penalidade por regra e limiar de conformidade, carregáveis de um arquivo JSON de configuração
+"""
+
+import json
+from typing import Dict, Iterable, Optional, Tuple
+
+from rastro_analise import REGRAS_ANALISE, regra_da_mensagem
+
+# Penalidade por ocorrência de cada tipo (valores históricos do agente)
+PESOS_TIPO_PADRAO = {"impedimento": 25.0, "alerta": 5.0, "recomendacao": 0.0}
+LIMIAR_PADRAO = 70.0
+
+# Pseudo-regras das mensagens que nenhuma regra conhecida gera (histórico antigo, textos alterados)
+REGRA_OUTROS = {"impedimento": "outros.impedimento", "alerta": "outros.alerta"}
+
+
+class ModeloScore:
+    """Penalidade por regra (`rastro_analise.REGRAS_ANALISE`) e limiar de conformidade
+
+    Regras sem peso próprio usam o peso do seu tipo; o score é 100 menos a soma
+    das penalidades das mensagens, nunca abaixo de 0. A operação é conforme com
+    score no limiar ou acima e nenhum impedimento.
+    """
+
+    # Mensagens distintas com penalidade memorizada
+    LIMITE_CACHE_MENSAGENS = 10000
+
+    def __init__(self, pesos: Optional[Dict[str, float]] = None, limiar: float = LIMIAR_PADRAO,
+                 nome: str = "padrao", pesos_tipo: Optional[Dict[str, float]] = None):
+        pesos_tipo = {**PESOS_TIPO_PADRAO, **(pesos_tipo or {})}
+        desconhecidas = set(pesos or {}) - {regra[0] for regra in REGRAS_ANALISE} - set(REGRA_OUTROS.values())
+        if desconhecidas:
+            raise ValueError(f"Regras desconhecidas no modelo de score: {sorted(desconhecidas)}")
+        self.nome = nome
+        self.limiar = float(limiar)
+        self.pesos_tipo = pesos_tipo
+        self.pesos: Dict[str, float] = {regra: pesos_tipo[tipo] for regra, _, _, tipo, _ in REGRAS_ANALISE}
+        self.pesos.update({regra: pesos_tipo[tipo] for tipo, regra in REGRA_OUTROS.items()})
+        self.pesos.update({regra: float(peso) for regra, peso in (pesos or {}).items()})
+        # Mensagem -> penalidade, preenchido sob demanda (as mensagens se repetem a partir de poucos modelos)
+        self._penalidades: Dict[Tuple[str, str], float] = {}
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "ModeloScore":
+        """Lê {"nome", "limiar", "pesos_tipo", "pesos": {regra: penalidade}} de um arquivo JSON"""
+        with open(caminho, encoding="utf-8") as arquivo:
+            configuracao = json.load(arquivo)
+        return cls(configuracao.get("pesos"), configuracao.get("limiar", LIMIAR_PADRAO),
+                   configuracao.get("nome", caminho), configuracao.get("pesos_tipo"))
+
+    def para_dict(self) -> Dict:
+        return {"nome": self.nome, "limiar": self.limiar, "pesos_tipo": self.pesos_tipo, "pesos": self.pesos}
+
+    def salvar(self, caminho: str):
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(self.para_dict(), arquivo, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def regra(tipo: str, mensagem: str) -> str:
+        """Regra (ou pseudo-regra "outros.<tipo>") à qual a mensagem é atribuída"""
+        return regra_da_mensagem(mensagem) or REGRA_OUTROS[tipo]
+
+    def penalidade(self, tipo: str, mensagem: str) -> float:
+        chave = (tipo, mensagem)
+        penalidade = self._penalidades.get(chave)
+        if penalidade is None:
+            penalidade = self.pesos[self.regra(tipo, mensagem)]
+            # Mensagens com parte variável (impedimentos do catálogo, erros do validador) não crescem sem limite
+            if len(self._penalidades) < self.LIMITE_CACHE_MENSAGENS:
+                self._penalidades[chave] = penalidade
+        return penalidade
+
+    def pontuar(self, impedimentos: Iterable[str], alertas: Iterable[str]) -> float:
+        """Score de 0 a 100 das mensagens de uma análise"""
+        penalidade = sum(self.penalidade("impedimento", mensagem) for mensagem in impedimentos)
+        penalidade += sum(self.penalidade("alerta", mensagem) for mensagem in alertas)
+        return max(0.0, 100.0 - penalidade)
+
+    def conforme(self, score: float, total_impedimentos: int) -> bool:
+        return score >= self.limiar and total_impedimentos == 0
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Normalização de texto compartilhada pelos índices do Agente Colaborativo CAIXA
+Remove acentos, separa tokens e reduz plurais para que pergunta e base usem a mesma forma
+"""
+
+import re
+import unicodedata
+from typing import List
+
+STOPWORDS = frozenset({
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "em",
+    "essa", "esse", "esta", "este", "eu", "meu", "minha", "na", "nas", "no", "nos",
+    "o", "os", "ou", "para", "pela", "pelo", "por", "qual", "quais", "que", "quem",
+    "se", "sao", "ser", "sobre", "um", "uma", "existem", "funciona", "posso",
+    "pode", "sua", "seu", "ha", "tem", "sem", "quando", "onde"
+})
+
+_RE_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Plurais regulares do português, do sufixo mais longo para o mais curto
+_SUFIXOS_PLURAL = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("eis", "el"),
+    ("ais", "al"),
+    ("ois", "ol"),
+    ("ns", "m"),
+    ("res", "r"),
+    ("s", ""),
+)
+
+
+def remover_acentos(texto: str) -> str:
+    """Remove acentos e cedilhas preservando as demais letras"""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def normalizar_texto(texto: str) -> str:
+    """Converte o texto para minúsculas sem acentos"""
+    return remover_acentos(texto.lower())
+
+
+def reduzir_plural(token: str) -> str:
+    """Reduz um token ao singular pelas regras regulares de plural"""
+    if len(token) <= 3:
+        return token
+    for sufixo, troca in _SUFIXOS_PLURAL:
+        if token.endswith(sufixo) and len(token) - len(sufixo) >= 3:
+            return token[:-len(sufixo)] + troca
+    return token
+
+
+def tokenizar(texto: str, remover_stopwords: bool = True) -> List[str]:
+    """Quebra o texto em tokens normalizados e no singular"""
+    tokens = _RE_TOKEN.findall(normalizar_texto(texto))
+    if remover_stopwords:
+        tokens = [t for t in tokens if t not in STOPWORDS]
+    return [reduzir_plural(t) for t in tokens]
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Particionamento mensal da auditoria do Agente Colaborativo CAIXA
+O banco principal guarda só o mês corrente; meses anteriores viram arquivos anexados sob demanda
+"""
+
+import contextlib
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+_RE_PARTICAO = re.compile(r"^auditoria_(\d{4})_(\d{2})\.db$")
+
+
+def _mes(timestamp: str) -> Tuple[int, int]:
+    return int(timestamp[:4]), int(timestamp[5:7])
+
+
+def _inicio_mes(ano: int, mes: int) -> str:
+    return f"{ano:04d}-{mes:02d}-01T00:00:00"
+
+
+def _mes_seguinte(ano: int, mes: int) -> Tuple[int, int]:
+    return (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+
+
+class GerenciadorParticoes:
+    """Rotaciona, anexa e arquiva as partições mensais das tabelas de auditoria
+
+    Escritas vão sempre para as tabelas do banco principal, que só contém o mês
+    corrente. Na virada do mês, `rotacionar` move os meses fechados para
+    arquivos ``auditoria_AAAA_MM.db``; leituras por período anexam só as
+    partições que se sobrepõem ao intervalo e as unem às tabelas principais.
+    Os ids continuam globais porque o AUTOINCREMENT do banco principal não recua.
+    """
+
+    # O SQLite anexa no máximo 10 bancos por conexão (limite de compilação padrão)
+    MAX_ANEXADAS = 10
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock, diretorio: str,
+                 tabelas: Sequence[str], meses_retencao: Optional[int] = None,
+                 ao_arquivar: Optional[Callable[[int, int], None]] = None):
+        self.conn = conn
+        self.lock = lock
+        self.diretorio = diretorio
+        self.diretorio_arquivo = os.path.join(diretorio, "arquivo")
+        self.tabelas = list(tabelas)
+        self.meses_retencao = meses_retencao
+        self.ao_arquivar = ao_arquivar
+        # Só conhecido após a primeira rotação: a primeira gravação rotaciona o que estiver pendente
+        self._mes_corrente: Optional[Tuple[int, int]] = None
+
+    def particoes(self) -> List[Tuple[int, int]]:
+        """Meses (ano, mês) com arquivo de partição ativo, do mais antigo ao mais recente"""
+        if not os.path.isdir(self.diretorio):
+            return []
+        meses = []
+        for nome in os.listdir(self.diretorio):
+            encontrado = _RE_PARTICAO.match(nome)
+            if encontrado:
+                meses.append((int(encontrado.group(1)), int(encontrado.group(2))))
+        return sorted(meses)
+
+    def particoes_no_periodo(self, inicio: Optional[str] = None,
+                             fim: Optional[str] = None) -> List[Tuple[int, int]]:
+        """Partições cujo mês se sobrepõe a [inicio, fim)"""
+        return [
+            (ano, mes) for ano, mes in self.particoes()
+            if (inicio is None or _inicio_mes(*_mes_seguinte(ano, mes)) > inicio)
+            and (fim is None or _inicio_mes(ano, mes) < fim)
+        ]
+
+    def _caminho(self, ano: int, mes: int) -> str:
+        return os.path.join(self.diretorio, f"auditoria_{ano:04d}_{mes:02d}.db")
+
+    @staticmethod
+    def _esquema(ano: int, mes: int) -> str:
+        return f"p_{ano:04d}_{mes:02d}"
+
+    def _colunas(self, esquema: str, tabela: str) -> List[str]:
+        return [coluna[1] for coluna in self.conn.execute(f'PRAGMA {esquema}.table_info({tabela})')]
+
+    # --- Rotação -----------------------------------------------------------
+
+    def verificar_virada(self):
+        """Rotaciona se o mês mudou desde a última verificação (custo de uma comparação)"""
+        mes = _mes(datetime.now().isoformat())
+        if mes != self._mes_corrente:
+            self.rotacionar()
+            self.aplicar_retencao()
+
+    def rotacionar(self) -> List[Tuple[int, int]]:
+        """Move os meses fechados do banco principal para suas partições"""
+        self._mes_corrente = _mes(datetime.now().isoformat())
+        inicio_corrente = _inicio_mes(*self._mes_corrente)
+        movidos = []
+        with self.lock:
+            meses = set()
+            for tabela in self.tabelas:
+                linha = self.conn.execute(
+                    f'SELECT MIN(timestamp) FROM main.{tabela} WHERE timestamp < ?', (inicio_corrente,)
+                ).fetchone()
+                if linha[0]:
+                    ano, mes = _mes(linha[0])
+                    while _inicio_mes(ano, mes) < inicio_corrente:
+                        meses.add((ano, mes))
+                        ano, mes = _mes_seguinte(ano, mes)
+            for ano, mes in sorted(meses):
+                if self._mover_mes(ano, mes):
+                    movidos.append((ano, mes))
+        return movidos
+
+    def _mover_mes(self, ano: int, mes: int) -> bool:
+        inicio, fim = _inicio_mes(ano, mes), _inicio_mes(*_mes_seguinte(ano, mes))
+        esquema = self._esquema(ano, mes)
+        os.makedirs(self.diretorio, exist_ok=True)
+        total = 0
+        with self._anexada(ano, mes, criar=True):
+            with self.conn:
+                for tabela in self.tabelas:
+                    self._garantir_tabela(esquema, tabela)
+                    colunas = ", ".join(self._colunas("main", tabela))
+                    cursor = self.conn.execute(f'''
+                        INSERT INTO {esquema}.{tabela} ({colunas})
+                        SELECT {colunas} FROM main.{tabela} WHERE timestamp >= ? AND timestamp < ?
+                        ORDER BY rowid
+                    ''', (inicio, fim))
+                    total += cursor.rowcount
+                    self.conn.execute(
+                        f'DELETE FROM main.{tabela} WHERE timestamp >= ? AND timestamp < ?', (inicio, fim)
+                    )
+        if total:
+            logging.info("Partição %04d-%02d: %d linhas movidas", ano, mes, total)
+        return total > 0
+
+    def _garantir_tabela(self, esquema: str, tabela: str):
+        """Cria a tabela na partição com as colunas e índices atuais da principal (e acrescenta os novos)"""
+        colunas_principal = self.conn.execute(f'PRAGMA main.table_info({tabela})').fetchall()
+        existentes = set(self._colunas(esquema, tabela))
+        if not existentes:
+            definicoes = ", ".join(f"{nome} {tipo}" for _, nome, tipo, *_ in colunas_principal)
+            self.conn.execute(f'CREATE TABLE {esquema}.{tabela} ({definicoes})')
+            if "id" in {nome for _, nome, *_ in colunas_principal}:
+                self.conn.execute(f'CREATE INDEX {esquema}.idx_{tabela}_id ON {tabela} (id)')
+        else:
+            for _, nome, tipo, *_ in colunas_principal:
+                if nome not in existentes:
+                    self.conn.execute(f'ALTER TABLE {esquema}.{tabela} ADD COLUMN {nome} {tipo}')
+        
+        # Índices secundários da principal (origem "c" = CREATE INDEX) valem também na partição
+        por_timestamp = False
+        for _, indice, unico, origem, *_ in self.conn.execute(f'PRAGMA main.index_list({tabela})').fetchall():
+            if origem != "c":
+                continue
+            colunas = [coluna[2] for coluna in self.conn.execute(f'PRAGMA main.index_info({indice})')]
+            por_timestamp = por_timestamp or colunas[0] == "timestamp"
+            self.conn.execute(
+                f'CREATE {"UNIQUE " if unico else ""}INDEX IF NOT EXISTS {esquema}.{indice} '
+                f'ON {tabela} ({", ".join(colunas)})'
+            )
+        # A rotação e as leituras por período recortam sempre pelo timestamp
+        if not por_timestamp:
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS {esquema}.idx_{tabela}_timestamp ON {tabela} (timestamp)')
+
+    # --- Leitura -----------------------------------------------------------
+
+    @contextlib.contextmanager
+    def _anexada(self, ano: int, mes: int, criar: bool = False) -> Iterator[str]:
+        caminho = self._caminho(ano, mes)
+        if not criar and not os.path.exists(caminho):
+            raise FileNotFoundError(caminho)
+        esquema = self._esquema(ano, mes)
+        self.conn.execute('ATTACH DATABASE ? AS ' + esquema, (caminho,))
+        try:
+            yield esquema
+        finally:
+            self.conn.execute('DETACH DATABASE ' + esquema)
+
+    @contextlib.contextmanager
+    def anexar(self, ano: int, mes: int) -> Iterator[str]:
+        """Trava o banco e anexa uma única partição, produzindo o nome do esquema"""
+        with self.lock, self._anexada(ano, mes) as esquema:
+            yield esquema
+
+    def lotes(self, inicio: Optional[str] = None) -> List[List[Tuple[int, int]]]:
+        """Partições do período em lotes de até `MAX_ANEXADAS`, do mais recente ao mais antigo
+
+        Sempre há ao menos um lote (vazio quando só o banco principal cobre o período).
+        """
+        meses = list(reversed(self.particoes_no_periodo(inicio)))
+        return [meses[posicao:posicao + self.MAX_ANEXADAS]
+                for posicao in range(0, len(meses), self.MAX_ANEXADAS)] or [[]]
+
+    @contextlib.contextmanager
+    def fontes(self, inicio: Optional[str] = None, meses: Optional[Sequence[Tuple[int, int]]] = None,
+               principal: bool = True) -> Iterator[Dict[str, str]]:
+        """Anexa as partições que cobrem o período e produz tabela -> expressão SQL para o FROM
+
+        Sem partições no período, a expressão é o próprio nome da tabela; com
+        elas, uma subconsulta UNION ALL (o SQLite empurra o WHERE para cada
+        ramo, preservando o uso dos índices). Períodos com mais partições que
+        `MAX_ANEXADAS` são lidos por `lotes`, com `principal=False` em todos
+        os lotes menos um para não contar o banco principal duas vezes.
+        """
+        if meses is None:
+            meses = self.particoes_no_periodo(inicio)
+        if not meses and not principal:
+            raise ValueError("Fonte sem partições nem banco principal")
+        if len(meses) > self.MAX_ANEXADAS:
+            raise ValueError(f"O período abrange {len(meses)} partições mensais; "
+                             f"o máximo consultado de uma vez é {self.MAX_ANEXADAS}")
+        with self.lock, contextlib.ExitStack() as pilha:
+            esquemas = [pilha.enter_context(self._anexada(ano, mes)) for ano, mes in meses]
+            fontes = {}
+            for tabela in self.tabelas:
+                if not esquemas:
+                    fontes[tabela] = tabela
+                    continue
+                colunas = self._colunas("main", tabela)
+                ramos = [f"SELECT {', '.join(colunas)} FROM main.{tabela}"] if principal else []
+                for esquema in esquemas:
+                    presentes = set(self._colunas(esquema, tabela))
+                    if not presentes:
+                        continue
+                    selecao = ", ".join(c if c in presentes else f"NULL AS {c}" for c in colunas)
+                    ramos.append(f"SELECT {selecao} FROM {esquema}.{tabela}")
+                if not ramos:
+                    ramos.append(f"SELECT {', '.join(colunas)} FROM main.{tabela} WHERE 0")
+                fontes[tabela] = "(" + " UNION ALL ".join(ramos) + ")"
+            yield fontes
+
+    # --- Retenção ----------------------------------------------------------
+
+    def aplicar_retencao(self) -> List[str]:
+        """Comprime e retira das consultas as partições mais antigas que a retenção"""
+        if self.meses_retencao is None:
+            return []
+        ano, mes = _mes(datetime.now().isoformat())
+        indice_limite = ano * 12 + (mes - 1) - self.meses_retencao
+        return [self.arquivar(a, m) for a, m in self.particoes() if a * 12 + (m - 1) < indice_limite]
+
+    def arquivar(self, ano: int, mes: int) -> str:
+        """Comprime a partição em gzip na pasta de arquivo e remove o arquivo ativo"""
+        os.makedirs(self.diretorio_arquivo, exist_ok=True)
+        origem = self._caminho(ano, mes)
+        destino = os.path.join(self.diretorio_arquivo, os.path.basename(origem) + ".gz")
+        with self.lock:
+            with open(origem, "rb") as entrada, gzip.open(destino, "wb") as saida:
+                shutil.copyfileobj(entrada, saida)
+            os.remove(origem)
+        logging.info("Partição %04d-%02d arquivada em %s", ano, mes, destino)
+        if self.ao_arquivar is not None:
+            self.ao_arquivar(ano, mes)
+        return destino
+
+    def restaurar(self, ano: int, mes: int) -> str:
+        """Descomprime uma partição arquivada de volta para consulta"""
+        destino = self._caminho(ano, mes)
+        origem = os.path.join(self.diretorio_arquivo, os.path.basename(destino) + ".gz")
+        with self.lock:
+            with gzip.open(origem, "rb") as entrada, open(destino, "wb") as saida:
+                shutil.copyfileobj(entrada, saida)
+            os.remove(origem)
+        return destino
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfilamento sob demanda do Agente Colaborativo CAIXA
+cProfile ou amostragem de pilhas numa fração das chamadas (ou de um usuário), agregados por janela de tempo
+"""
+
+import contextlib
+import cProfile
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+MODOS_PERFIL = ("cprofile", "amostragem")
+
+
+class _AmostradorPilhas:
+    """Thread que fotografa periodicamente as pilhas das threads em perfilamento"""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.pilhas: Counter = Counter()
+        self.threads: Set[int] = set()
+        self._lock = threading.Lock()
+        self._encerrando = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="amostrador-pilhas", daemon=True)
+        self._thread.start()
+
+    def _executar(self):
+        while not self._encerrando.wait(self.intervalo):
+            with self._lock:
+                alvos = set(self.threads)
+            if not alvos:
+                continue
+            for ident, quadro in sys._current_frames().items():
+                if ident in alvos:
+                    pilha = _pilha_colapsada(quadro)
+                    with self._lock:
+                        self.pilhas[pilha] += 1
+
+    @contextlib.contextmanager
+    def amostrar(self):
+        ident = threading.get_ident()
+        with self._lock:
+            self.threads.add(ident)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.threads.discard(ident)
+
+    def coletar(self) -> Counter:
+        """Devolve as pilhas acumuladas e recomeça a contagem"""
+        with self._lock:
+            pilhas, self.pilhas = self.pilhas, Counter()
+        return pilhas
+
+    def encerrar(self):
+        self._encerrando.set()
+        self._thread.join()
+
+
+def _pilha_colapsada(quadro) -> str:
+    """Pilha no formato "raiz;...;folha" usado pelas ferramentas de flamegraph"""
+    nomes = []
+    while quadro is not None:
+        codigo = quadro.f_code
+        nomes.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+        quadro = quadro.f_back
+    return ";".join(reversed(nomes))
+
+
+class Perfilador:
+    """Perfila uma amostra das chamadas e grava o agregado ao fim de cada janela
+
+    Modo "cprofile" gera arquivos .pstats (``python -m pstats``, snakeviz,
+    gprof2dot); modo "amostragem" gera pilhas colapsadas .folded
+    (flamegraph.pl, speedscope). Como o cProfile só admite um perfil ativo
+    por vez, chamadas concorrentes àquela em perfilamento seguem sem perfil.
+    """
+
+    def __init__(self, fracao: float = 0.0, usuario: Optional[str] = None,
+                 modo: str = "cprofile", janela: float = 60.0, diretorio: str = "perfis",
+                 intervalo_amostragem: float = 0.001):
+        if modo not in MODOS_PERFIL:
+            raise ValueError(f"Modo de perfilamento desconhecido: {modo}")
+        self.fracao = fracao
+        self.usuario = usuario
+        self.modo = modo
+        self.janela = janela
+        self.diretorio = diretorio
+        self.contadores = {"perfiladas": 0, "ignoradas_concorrencia": 0, "arquivos": 0}
+
+        self._lock = threading.Lock()
+        self._lock_cprofile = threading.Lock()
+        self._estatisticas: Optional[pstats.Stats] = None
+        self._amostrador = _AmostradorPilhas(intervalo_amostragem) if modo == "amostragem" else None
+        self._inicio_janela = time.monotonic()
+
+    def deve_perfilar(self, usuario: str) -> bool:
+        """Sorteia a chamada pela fração configurada, ou a escolhe pelo usuário"""
+        if self.usuario is not None and usuario == self.usuario:
+            return True
+        return self.fracao > 0 and random.random() < self.fracao
+
+    @contextlib.contextmanager
+    def perfilar(self, usuario: str):
+        """Perfila o bloco se a chamada for sorteada; caso contrário não faz nada"""
+        if not self.deve_perfilar(usuario):
+            yield
+            return
+
+        if self._amostrador is not None:
+            with self._amostrador.amostrar():
+                yield
+        elif self._lock_cprofile.acquire(blocking=False):
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+                try:
+                    yield
+                finally:
+                    perfil.disable()
+                self._acumular(perfil)
+            finally:
+                self._lock_cprofile.release()
+        else:
+            with self._lock:
+                self.contadores["ignoradas_concorrencia"] += 1
+            yield
+            return
+
+        with self._lock:
+            self.contadores["perfiladas"] += 1
+        if time.monotonic() - self._inicio_janela >= self.janela:
+            self.gravar()
+
+    def _acumular(self, perfil: cProfile.Profile):
+        with self._lock:
+            if self._estatisticas is None:
+                self._estatisticas = pstats.Stats(perfil)
+            else:
+                self._estatisticas.add(perfil)
+
+    def gravar(self) -> Optional[str]:
+        """Grava o agregado da janela atual e abre uma nova; retorna o arquivo gerado"""
+        with self._lock:
+            self._inicio_janela = time.monotonic()
+            estatisticas, self._estatisticas = self._estatisticas, None
+        pilhas = self._amostrador.coletar() if self._amostrador is not None else None
+        if estatisticas is None and not pilhas:
+            return None
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        base = os.path.join(self.diretorio, f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+        if estatisticas is not None:
+            arquivo = base + ".pstats"
+            estatisticas.dump_stats(arquivo)
+        else:
+            arquivo = base + ".folded"
+            with open(arquivo, "w", encoding="utf-8") as saida:
+                for pilha, amostras in pilhas.most_common():
+                    saida.write(f"{pilha} {amostras}\n")
+
+        with self._lock:
+            self.contadores["arquivos"] += 1
+        logging.info("Perfil gravado em %s", arquivo)
+        return arquivo
+
+    def encerrar(self) -> Optional[str]:
+        """Grava o que restou da janela e para o amostrador"""
+        arquivo = self.gravar()
+        if self._amostrador is not None:
+            self._amostrador.encerrar()
+        return arquivo
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.contadores)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rastro das análises de conformidade do Agente Colaborativo CAIXA
+Um vetor pré-alocado com as ocorrências de cada regra; entradas e contribuições são montadas só na exibição
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# (regra, descrição, campos lidos de dados_operacao, tipo de ocorrência, mensagens que a regra gera), na ordem do vetor
+REGRAS_ANALISE: Tuple[Tuple[str, str, Tuple[str, ...], str, Tuple[str, ...]], ...] = (
+    ("tomador.cpf", "CPF regular junto à Receita Federal", ("tomador.cpf_regular",), "impedimento",
+     ("CPF irregular junto à Receita Federal",)),
+    ("tomador.nacionalidade", "Brasileiro ou estrangeiro com RNM/RNE válida",
+     ("tomador.brasileiro", "tomador.rnm_valida"), "impedimento", ("Estrangeiro sem RNM/RNE válida",)),
+    ("tomador.idoneidade", "Idoneidade cadastral", ("tomador.idoneidade_cadastral",), "impedimento",
+     ("Falta de idoneidade cadastral",)),
+    ("tomador.residencia", "Residência no Brasil", ("tomador.residencia_brasil",), "impedimento",
+     ("Não comprova residência no Brasil",)),
+    ("vendedor.maioridade", "Vendedor PF maior de idade ou emancipado", ("vendedor.maior_idade",), "impedimento",
+     ("Vendedor menor de idade sem emancipação",)),
+    ("vendedor.cpf", "CPF do vendedor PF regular", ("vendedor.cpf_regular",), "impedimento",
+     ("CPF do vendedor irregular",)),
+    ("vendedor.cnpj", "CNPJ do vendedor PJ regular", ("vendedor.cnpj_regular",), "impedimento",
+     ("CNPJ do vendedor irregular",)),
+    ("imovel.area_urbana", "Imóvel em área urbana", ("imovel.area_urbana",), "impedimento",
+     ("Imóvel não localizado em área urbana",)),
+    ("imovel.infraestrutura", "Infraestrutura básica completa", ("imovel.infraestrutura_completa",), "alerta",
+     ("Verificar infraestrutura básica (água, esgoto, energia)",)),
+    ("imovel.onus", "Imóvel sem ônus", ("imovel.possui_onus",), "alerta",
+     ("Imóvel possui ônus - verificar se impeditivo",)),
+    ("imovel.matricula", "Matrícula regular", ("imovel.matricula_regular",), "impedimento",
+     ("Matrícula irregular ou inexistente",)),
+    ("imovel.impedimentos", "Impedimentos do catálogo do imóvel", ("imovel.impedimentos",), "impedimento", ()),
+    ("imovel.regiao", "Exigências da UF/município",
+     ("imovel.uf", "imovel.codigo_municipio", "imovel.localizado_df"), "recomendacao", ()),
+    ("programa.fgts_tempo", "FGTS: 3 anos ou mais sob regime FGTS", ("programa.tempo_fgts_anos",), "impedimento",
+     ("FGTS: Menos de 3 anos de trabalho sob regime FGTS",)),
+    ("programa.fgts_saldo", "FGTS: saldo mínimo de 10% da avaliação", ("programa.saldo_suficiente",), "alerta",
+     ("FGTS: Verificar saldo mínimo de 10% do valor de avaliação",)),
+    ("programa.pmcmv_renda", "PMCMV: renda familiar compatível", ("programa.renda_familiar_compativel",), "alerta",
+     ("PMCMV: Verificar compatibilidade da renda familiar",)),
+    ("documentacao.tomador", "Documentação do tomador completa", ("documentacao.tomador_completa",
+     "documentacao.documentos"), "alerta", ("Documentação do tomador incompleta",)),
+    ("documentacao.vendedor", "Documentação do vendedor completa", ("documentacao.vendedor_completa",
+     "documentacao.documentos"), "alerta", ("Documentação do vendedor incompleta",)),
+    ("documentacao.imovel", "Documentação do imóvel completa", ("documentacao.imovel_completa",
+     "documentacao.documentos"), "alerta", ("Documentação do imóvel incompleta",)),
+    ("documentacao.documentos", "Documentos da obra e do programa exigidos pelo validador",
+     ("documentacao.operacao", "documentacao.documentos"), "alerta",
+     ("Documentação da obra incompleta", "Documentação específica do programa incompleta"))
+)
+
+# Mensagens com parte variável: prefixo -> regra
+PREFIXOS_MENSAGENS: Tuple[Tuple[str, str], ...] = (
+    ("Imóvel: ", "imovel.impedimentos"),
+    ("Documentação não validada", "documentacao.documentos")
+)
+
+# Regra -> posição no vetor do rastro
+INDICE_REGRA: Dict[str, int] = {regra[0]: posicao for posicao, regra in enumerate(REGRAS_ANALISE)}
+
+_REGRA_POR_MENSAGEM: Dict[str, str] = {
+    mensagem: regra for regra, _, _, _, mensagens in REGRAS_ANALISE for mensagem in mensagens
+}
+
+
+def novo_rastro() -> List[Optional[int]]:
+    """Vetor do rastro: uma posição por regra, None enquanto a regra não for avaliada
+
+    Cada regra avaliada grava na sua posição quantas ocorrências gerou
+    (bool vale 0/1). Registrar é uma atribuição por índice; nada de tuplas,
+    cópias das entradas ou texto no caminho da análise.
+    """
+    return [None] * len(REGRAS_ANALISE)
+
+
+def _valor_campo(dados_operacao: Dict, campo: str) -> Any:
+    secao, nome = campo.split(".", 1)
+    return (dados_operacao.get(secao) or {}).get(nome)
+
+
+def regra_da_mensagem(mensagem: str) -> Optional[str]:
+    """Regra que gera a mensagem de impedimento ou alerta; None se nenhuma regra conhecida a gera"""
+    regra = _REGRA_POR_MENSAGEM.get(mensagem)
+    if regra is None:
+        for prefixo, regra_prefixo in PREFIXOS_MENSAGENS:
+            if mensagem.startswith(prefixo):
+                return regra_prefixo
+    return regra
+
+
+def descrever_rastro(rastro: Sequence[Optional[int]], dados_operacao: Dict,
+                     pesos: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Regras avaliadas com as entradas lidas, o resultado e a contribuição no score (para exibição)
+
+    `pesos` é regra -> penalidade por ocorrência (`ModeloScore.pesos`).
+    """
+    descritas = []
+    for (regra, descricao, campos, tipo, _), ocorrencias in zip(REGRAS_ANALISE, rastro):
+        if ocorrencias is None:
+            continue
+        ocorrencias = int(ocorrencias)
+        descritas.append({
+            "regra": regra,
+            "descricao": descricao,
+            "entradas": {campo: _valor_campo(dados_operacao, campo) for campo in campos},
+            "resultado": f"{tipo} ({ocorrencias})" if ocorrencias else "ok",
+            "contribuicao": -ocorrencias * pesos.get(regra, 0.0)
+        })
+    return descritas
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice regional das exigências de imóvel do Agente Colaborativo CAIXA
+Resolve por UF e código IBGE de município as exigências aplicáveis com buscas em dicionário
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from normalizacao_texto import tokenizar
+
+# Sigla -> (código IBGE da UF, nome)
+UFS: Dict[str, Tuple[str, str]] = {
+    "RO": ("11", "Rondônia"), "AC": ("12", "Acre"), "AM": ("13", "Amazonas"), "RR": ("14", "Roraima"),
+    "PA": ("15", "Pará"), "AP": ("16", "Amapá"), "TO": ("17", "Tocantins"), "MA": ("21", "Maranhão"),
+    "PI": ("22", "Piauí"), "CE": ("23", "Ceará"), "RN": ("24", "Rio Grande do Norte"),
+    "PB": ("25", "Paraíba"), "PE": ("26", "Pernambuco"), "AL": ("27", "Alagoas"), "SE": ("28", "Sergipe"),
+    "BA": ("29", "Bahia"), "MG": ("31", "Minas Gerais"), "ES": ("32", "Espírito Santo"),
+    "RJ": ("33", "Rio de Janeiro"), "SP": ("35", "São Paulo"), "PR": ("41", "Paraná"),
+    "SC": ("42", "Santa Catarina"), "RS": ("43", "Rio Grande do Sul"), "MS": ("50", "Mato Grosso do Sul"),
+    "MT": ("51", "Mato Grosso"), "GO": ("52", "Goiás"), "DF": ("53", "Distrito Federal")
+}
+
+_SIGLA_POR_CODIGO = {codigo: sigla for sigla, (codigo, _) in UFS.items()}
+
+# Chave regional: (sigla da UF, código IBGE do município ou None para a UF inteira)
+ChaveRegional = Tuple[str, Optional[str]]
+
+
+class RegrasRegionais:
+    """Exigências aplicáveis a uma UF ou município, já combinadas e formatadas"""
+
+    def __init__(self, chave: ChaveRegional, nome: str, exigencias: List[str]):
+        self.chave = chave
+        self.nome = nome
+        self.exigencias = tuple(exigencias)
+        # Texto das recomendações montado uma vez por região
+        self.recomendacoes = tuple(f"Exigência regional ({nome}): {exigencia}" for exigencia in exigencias)
+
+
+class IndiceRegional:
+    """Índice das exigências regionais por UF e código IBGE de município
+
+    `exigencias_regionais` segue a base: sigla -> {"nome", "exigencias",
+    "municipios": {código IBGE -> {"nome", "exigencias"}}, "termos"}. As regras
+    de cada chave (UF, ou UF + município com as exigências da UF somadas às
+    locais) são montadas na construção; resolver uma operação ou pergunta é
+    só uma busca em dicionário.
+    """
+
+    def __init__(self, exigencias_regionais: Dict[str, Dict]):
+        self._regras: Dict[ChaveRegional, RegrasRegionais] = {}
+        # Termo ou sequência de termos normalizados -> chave regional citada
+        self._termos: Dict[str, ChaveRegional] = {}
+        self._maior_termo = 1
+
+        for sigla, regiao in exigencias_regionais.items():
+            nome_uf = regiao.get("nome", UFS.get(sigla, ("", sigla))[1])
+            exigencias_uf = list(regiao.get("exigencias", []))
+            self._regras[(sigla, None)] = RegrasRegionais((sigla, None), nome_uf, exigencias_uf)
+            self._indexar_termos((sigla, None), [sigla, nome_uf] + list(regiao.get("termos", [])))
+
+            for codigo, municipio in regiao.get("municipios", {}).items():
+                chave = (sigla, codigo)
+                self._regras[chave] = RegrasRegionais(
+                    chave, f"{municipio['nome']}/{sigla}", exigencias_uf + list(municipio.get("exigencias", []))
+                )
+                self._indexar_termos(chave, [municipio["nome"]] + list(municipio.get("termos", [])))
+
+    def _indexar_termos(self, chave: ChaveRegional, textos: Iterable[str]):
+        for texto in textos:
+            termos = tokenizar(texto)
+            if termos:
+                self._termos[" ".join(termos)] = chave
+                self._maior_termo = max(self._maior_termo, len(termos))
+
+    @staticmethod
+    def chave(uf: Optional[str] = None, municipio: Optional[str] = None) -> Optional[ChaveRegional]:
+        """Normaliza UF (sigla ou código IBGE) e município (código IBGE de 7 dígitos)"""
+        municipio = str(municipio).strip() if municipio else None
+        sigla = None
+        if uf:
+            uf = str(uf).strip().upper()
+            sigla = uf if uf in UFS else _SIGLA_POR_CODIGO.get(uf)
+        if sigla is None and municipio:
+            # Os dois primeiros dígitos do código do município são os da UF
+            sigla = _SIGLA_POR_CODIGO.get(municipio[:2])
+        if sigla is None:
+            return None
+        return sigla, municipio
+
+    def regras(self, chave: Optional[ChaveRegional]) -> Optional[RegrasRegionais]:
+        """Regras da chave; município sem regras próprias cai nas da UF"""
+        if chave is None:
+            return None
+        return self._regras.get(chave) or self._regras.get((chave[0], None))
+
+    def chave_operacao(self, dados_imovel: Dict) -> Optional[ChaveRegional]:
+        """Região do imóvel: `uf`/`codigo_municipio` ou o indicador legado `localizado_df`"""
+        uf = dados_imovel.get("uf") or ("DF" if dados_imovel.get("localizado_df") else None)
+        return self.chave(uf, dados_imovel.get("codigo_municipio"))
+
+    def regiao_na_pergunta(self, pergunta: str) -> Optional[ChaveRegional]:
+        """Região com regras próprias citada na pergunta (a sequência de termos mais longa vence)"""
+        termos = tokenizar(pergunta)
+        for tamanho in range(min(self._maior_termo, len(termos)), 0, -1):
+            for inicio in range(len(termos) - tamanho + 1):
+                chave = self._termos.get(" ".join(termos[inicio:inicio + tamanho]))
+                if chave is not None:
+                    return chave
+        return None
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API HTTP/JSON do Agente Colaborativo CAIXA
+Servidor asyncio (somente biblioteca padrão) com processamento em executor e coalescência de requisições
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from agente_caixa_completo import AgenteCaixaCreditoCompleto
+from armazenamento import BACKENDS_ARMAZENAMENTO, ArmazenamentoFragmentado, criar_armazenamento
+from controle_admissao import PRIORIDADE_INTERATIVA, PRIORIDADE_LOTE
+from modelo_score import ModeloScore
+from perfilamento import MODOS_PERFIL
+
+_PRIORIDADES = {"interativa": PRIORIDADE_INTERATIVA, "lote": PRIORIDADE_LOTE}
+
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+
+_MOTIVOS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+
+class ErroHTTP(Exception):
+    """Erro de requisição convertido diretamente em resposta HTTP"""
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class ServidorAgente:
+    """Expõe consultar, consultar_lote e analisar_conformidade_avancada via HTTP/JSON
+
+    O laço de eventos só faz E/S: respostas e análises rodam num executor, e
+    requisições idênticas em andamento compartilham a mesma computação. A
+    auditoria vai para a fila assíncrona do agente, sem bloquear a resposta.
+    """
+
+    def __init__(self, agente: AgenteCaixaCreditoCompleto, host: str = "127.0.0.1",
+                 porta: int = 8080, max_workers: Optional[int] = None):
+        self.agente = agente
+        self.host = host
+        self.porta = porta
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agente")
+        self._em_andamento: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.estatisticas = {"requisicoes": 0, "coalescidas": 0, "erros": 0}
+        self._rotas: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+            ("GET", "/saude"): self._saude,
+            ("GET", "/metricas"): self._metricas,
+            ("POST", "/consultar"): self._consultar,
+            ("POST", "/consultar_lote"): self._consultar_lote,
+            ("POST", "/analisar"): self._analisar,
+            ("POST", "/decisao"): self._decisao,
+            ("POST", "/historico_decisoes"): self._historico_decisoes
+        }
+
+    async def iniciar(self) -> asyncio.AbstractServer:
+        """Ativa a auditoria assíncrona e começa a aceitar conexões"""
+        self.agente.ativar_auditoria_assincrona()
+        servidor = await asyncio.start_server(self._atender_conexao, self.host, self.porta,
+                                              backlog=4096)
+        self.porta = servidor.sockets[0].getsockname()[1]
+        return servidor
+
+    def encerrar(self):
+        """Libera o executor e grava a auditoria pendente"""
+        self.executor.shutdown(wait=True)
+        self.agente.encerrar_auditoria_assincrona()
+
+    def _usuario(self, corpo: Dict[str, Any]) -> str:
+        """Usuário da requisição; com `locatario`, associa-o ao banco daquele correspondente"""
+        usuario = corpo.get("usuario", "api")
+        locatario = corpo.get("locatario")
+        if locatario is not None:
+            if not isinstance(locatario, str) or not locatario.strip():
+                raise ErroHTTP(400, "Campo 'locatario' deve ser um texto")
+            if isinstance(self.agente.armazenamento, ArmazenamentoFragmentado):
+                self.agente.armazenamento.atribuir_locatario(usuario, locatario)
+        return usuario
+
+    def _admitir(self, corpo: Dict[str, Any], operacao: str, custo: float = 1.0) -> int:
+        """Aplica o limite do usuário antes de enfileirar trabalho; retorna a prioridade da requisição"""
+        prioridade = _PRIORIDADES.get(corpo.get("prioridade", "lote"))
+        if prioridade is None:
+            raise ErroHTTP(400, "Campo 'prioridade' deve ser 'interativa' ou 'lote'")
+        usuario = self._usuario(corpo)
+        if not self.agente.controle_admissao.verificar_limite(usuario, operacao, custo):
+            raise ErroHTTP(429, "Limite de requisições do usuário atingido")
+        return prioridade
+
+    def _executar_com_vaga(self, prioridade: int, usuario: str, funcao: Callable[..., Any], *args) -> Any:
+        """Roda no executor: espera uma vaga de execução pela prioridade antes de chamar `funcao`"""
+        with self.agente.controle_admissao.vaga(prioridade) as admitida:
+            if not admitida:
+                raise ErroHTTP(503, "Sistema ocupado, tente novamente")
+            perfilador = self.agente.perfilador
+            if perfilador is not None:
+                with perfilador.perfilar(usuario):
+                    return funcao(*args)
+            return funcao(*args)
+
+    async def _coalescer(self, chave: Hashable, funcao: Callable[..., Any], *args) -> Any:
+        """Executa `funcao` no executor, reaproveitando a execução em andamento com a mesma chave"""
+        futuro = self._em_andamento.get(chave)
+        if futuro is not None:
+            self.estatisticas["coalescidas"] += 1
+            return await asyncio.shield(futuro)
+
+        laco = asyncio.get_running_loop()
+        futuro = laco.run_in_executor(self.executor, funcao, *args)
+        self._em_andamento[chave] = futuro
+        try:
+            return await asyncio.shield(futuro)
+        finally:
+            self._em_andamento.pop(chave, None)
+
+    # --- Rotas -------------------------------------------------------------
+
+    async def _saude(self, corpo: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "versao": self.agente.versao,
+            "em_andamento": len(self._em_andamento),
+            "admissao": self.agente.estatisticas_admissao(),
+            "latencia": self.agente.metricas_latencia(),
+            **self.estatisticas
+        }
+
+    async def _metricas(self, corpo: Dict[str, Any]) -> str:
+        """Exposição no formato Prometheus: contadores do agente e do servidor"""
+        linhas = [self.agente.exportar_metricas_prometheus()]
+        for nome, valor in sorted(self.estatisticas.items()):
+            linhas.append(
+                f"# HELP agente_http_{nome}_total Requisições HTTP ({nome})\n"
+                f"# TYPE agente_http_{nome}_total counter\n"
+                f"agente_http_{nome}_total {valor}\n"
+            )
+        return "".join(linhas)
+
+    async def _consultar(self, corpo: Dict[str, Any]) -> Dict[str, Any]:
+        pergunta = _campo_texto(corpo, "pergunta")
+        usuario = self._usuario(corpo)
+        prioridade = self._admitir(corpo, "consultar")
+        chave = ("consultar", " ".join(pergunta.lower().split()))
+        resposta, categoria = await self._coalescer(chave, self._executar_com_vaga, prioridade,
+                                                    usuario, self.agente._responder, pergunta)
+        self.agente._registrar_consulta(pergunta, resposta, usuario, categoria)
+        return {"resposta": resposta, "categoria": categoria}
+
+    async def _consultar_lote(self, corpo: Dict[str, Any]) -> Dict[str, Any]:
+        perguntas = corpo.get("perguntas")
+        if not isinstance(perguntas, list) or not all(isinstance(p, str) for p in perguntas):
+            raise ErroHTTP(400, "Campo 'perguntas' deve ser uma lista de textos")
+        usuario = self._usuario(corpo)
+        prioridade = self._admitir(corpo, "consultar_lote", custo=len(perguntas))
+        laco = asyncio.get_running_loop()
+        resultados = await laco.run_in_executor(
+            self.executor, self._executar_com_vaga, prioridade, usuario,
+            self.agente._consultar_lote, perguntas, usuario, {}
+        )
+        return {"respostas": [
+            {"resposta": resposta, "categoria": categoria} for resposta, categoria in resultados
+        ]}
+
+    async def _analisar(self, corpo: Dict[str, Any]) -> Dict[str, Any]:
+        dados_operacao = corpo.get("dados_operacao")
+        if not isinstance(dados_operacao, dict):
+            raise ErroHTTP(400, "Campo 'dados_operacao' deve ser um objeto")
+        rastrear = corpo.get("rastrear", self.agente.rastrear_analises)
+        if not isinstance(rastrear, bool):
+            raise ErroHTTP(400, "Campo 'rastrear' deve ser booleano")
+        usuario = self._usuario(corpo)
+        prioridade = self._admitir(corpo, "analisar")
+        chave = ("analisar", rastrear, json.dumps(dados_operacao, sort_keys=True))
+        resultado = await self._coalescer(chave, self._executar_com_vaga, prioridade,
+                                          usuario, self.agente._avaliar_conformidade, dados_operacao,
+                                          None, rastrear)
+        self.agente._registrar_analise_avancada(dados_operacao, resultado, usuario)
+        return {**resultado, "operacao": self.agente.chave_operacao(dados_operacao)}
+
+    async def _decisao(self, corpo: Dict[str, Any]) -> Dict[str, Any]:
+        """Revisão do analista sobre uma operação já analisada"""
+        operacao = _campo_texto(corpo, "operacao")
+        decisao = _campo_texto(corpo, "decisao")
+        justificativa = _campo_texto(corpo, "justificativa")
+        id_analise = corpo.get("analise_id")
+        if id_analise is not None and not isinstance(id_analise, int):
+            raise ErroHTTP(400, "Campo 'analise_id' deve ser um inteiro")
+        usuario = self._usuario(corpo)
+        laco = asyncio.get_running_loop()
+        await laco.run_in_executor(self.executor, self.agente.registrar_decisao,
+                                   operacao, decisao, justificativa, usuario, id_analise)
+        return {"registrada": True, "operacao": operacao}
+
+    async def _historico_decisoes(self, corpo: Dict[str, Any]) -> Dict[str, Any]:
+        operacao = _campo_texto(corpo, "operacao")
+        laco = asyncio.get_running_loop()
+        decisoes = await laco.run_in_executor(self.executor, self.agente.historico_operacao, operacao)
+        return {"operacao": operacao, "decisoes": decisoes}
+
+    # --- Protocolo HTTP/1.1 ------------------------------------------------
+
+    async def _atender_conexao(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende requisições em sequência na mesma conexão (keep-alive)"""
+        try:
+            while True:
+                try:
+                    cabecalho = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._responder(writer, 413, {"erro": "Cabeçalho muito grande"}, False)
+                    break
+
+                manter_conexao = await self._processar(reader, writer, cabecalho)
+                if not manter_conexao:
+                    break
+        finally:
+            with contextlib.suppress(ConnectionError):
+                writer.close()
+                await writer.wait_closed()
+
+    async def _processar(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         cabecalho: bytes) -> bool:
+        """Lê o corpo, despacha para a rota e escreve a resposta; retorna se a conexão continua"""
+        self.estatisticas["requisicoes"] += 1
+        linhas = cabecalho.decode("latin-1").split("\r\n")
+        try:
+            metodo, caminho, versao = linhas[0].split(" ", 2)
+        except ValueError:
+            await self._responder(writer, 400, {"erro": "Linha de requisição inválida"}, False)
+            return False
+
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if ":" in linha:
+                nome, valor = linha.split(":", 1)
+                cabecalhos[nome.strip().lower()] = valor.strip()
+
+        conexao = cabecalhos.get("connection", "").lower()
+        manter_conexao = conexao != "close" if versao == "HTTP/1.1" else conexao == "keep-alive"
+
+        try:
+            try:
+                tamanho = int(cabecalhos.get("content-length", "0"))
+            except ValueError:
+                manter_conexao = False
+                raise ErroHTTP(400, "Content-Length inválido")
+            if tamanho > TAMANHO_MAXIMO_CORPO:
+                # O corpo não lido impede reaproveitar a conexão
+                manter_conexao = False
+                raise ErroHTTP(413, "Corpo da requisição muito grande")
+            dados = await reader.readexactly(tamanho) if tamanho else b""
+
+            caminho = caminho.split("?", 1)[0]
+            rota = self._rotas.get((metodo, caminho))
+            if rota is None:
+                caminhos = {c for _, c in self._rotas}
+                raise ErroHTTP(405 if caminho in caminhos else 404, f"{metodo} {caminho} não disponível")
+
+            try:
+                corpo = json.loads(dados) if dados else {}
+            except ValueError:
+                raise ErroHTTP(400, "Corpo não é um JSON válido")
+            if not isinstance(corpo, dict):
+                raise ErroHTTP(400, "Corpo deve ser um objeto JSON")
+
+            await self._responder(writer, 200, await rota(corpo), manter_conexao)
+        except ErroHTTP as erro:
+            self.estatisticas["erros"] += 1
+            await self._responder(writer, erro.status, {"erro": erro.mensagem}, manter_conexao)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return False
+        except Exception:
+            self.estatisticas["erros"] += 1
+            logging.exception("Erro ao processar %s %s", metodo, caminho)
+            await self._responder(writer, 500, {"erro": "Erro interno"}, False)
+            return False
+
+        return manter_conexao
+
+    async def _responder(self, writer: asyncio.StreamWriter, status: int, conteudo: Any,
+                         manter_conexao: bool):
+        if isinstance(conteudo, str):
+            corpo = conteudo.encode("utf-8")
+            tipo = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            corpo = json.dumps(conteudo, ensure_ascii=False).encode("utf-8")
+            tipo = "application/json; charset=utf-8"
+        writer.write(
+            f"HTTP/1.1 {status} {_MOTIVOS.get(status, '')}\r\n"
+            f"Content-Type: {tipo}\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: {'keep-alive' if manter_conexao else 'close'}\r\n\r\n".encode("latin-1")
+            + corpo
+        )
+        await writer.drain()
+
+
+def _campo_texto(corpo: Dict[str, Any], campo: str) -> str:
+    valor = corpo.get(campo)
+    if not isinstance(valor, str) or not valor.strip():
+        raise ErroHTTP(400, f"Campo '{campo}' é obrigatório")
+    return valor
+
+
+async def _servir(servidor_agente: ServidorAgente):
+    servidor = await servidor_agente.iniciar()
+    print(f"🌐 API do agente em http://{servidor_agente.host}:{servidor_agente.porta}", file=sys.stderr)
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP do Agente Colaborativo CAIXA")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="Threads do executor")
+    parser.add_argument("--bd", default="agente_caixa_completo.db", help="Banco SQLite de auditoria")
+    parser.add_argument("--armazenamento", choices=BACKENDS_ARMAZENAMENTO, default="sqlite",
+                        help="Backend da auditoria (fragmentado: um banco por correspondente)")
+    parser.add_argument("--locatarios", default=None,
+                        help="JSON usuário -> locatário para o backend fragmentado")
+    parser.add_argument("--instrumentar", action="store_true", help="Mede a latência de cada etapa do agente")
+    parser.add_argument("--rastrear", action="store_true",
+                        help="Inclui o rastro por regra nas análises (padrão do campo 'rastrear')")
+    parser.add_argument("--modelo-score", default=None,
+                        help="JSON com pesos por regra e limiar do score (ex.: saída de calibracao_score.py)")
+    parser.add_argument("--perfilar-fracao", type=float, default=0.0,
+                        help="Fração das chamadas a perfilar (0 desliga)")
+    parser.add_argument("--perfilar-usuario", default=None, help="Perfila todas as chamadas deste usuário")
+    parser.add_argument("--perfilar-modo", choices=MODOS_PERFIL, default="cprofile")
+    parser.add_argument("--perfilar-janela", type=float, default=60.0,
+                        help="Segundos agregados em cada arquivo de perfil")
+    parser.add_argument("--perfilar-diretorio", default="perfis")
+    args = parser.parse_args(argv)
+
+    opcoes = {}
+    if args.locatarios is not None:
+        if args.armazenamento != "fragmentado":
+            parser.error("--locatarios exige --armazenamento fragmentado")
+        with open(args.locatarios, encoding="utf-8") as arquivo:
+            opcoes["locatarios"] = json.load(arquivo)
+    with contextlib.redirect_stdout(sys.stderr):
+        agente = AgenteCaixaCreditoCompleto(
+            args.bd, instrumentar=args.instrumentar, rastrear_analises=args.rastrear,
+            modelo_score=ModeloScore.carregar(args.modelo_score) if args.modelo_score else None,
+            armazenamento=criar_armazenamento(args.armazenamento, args.bd, **opcoes)
+        )
+    if args.perfilar_fracao > 0 or args.perfilar_usuario:
+        agente.ativar_perfilamento(args.perfilar_fracao, args.perfilar_usuario, args.perfilar_modo,
+                                   args.perfilar_janela, args.perfilar_diretorio)
+
+    servidor_agente = ServidorAgente(agente, args.host, args.porta, args.workers)
+    try:
+        asyncio.run(_servir(servidor_agente))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor_agente.encerrar()
+        agente.desativar_perfilamento()
+
+
+if __name__ == "__main__":
+    main()
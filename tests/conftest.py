@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""Fixtures compartilhadas dos testes do Agente Colaborativo CAIXA"""
+
+import pytest
+
+from agente_caixa_completo import AgenteCaixaCreditoCompleto
+from armazenamento import ArmazenamentoMemoria
+
+
+@pytest.fixture(scope="session")
+def agente():
+    """Agente com auditoria em memória (a base e os índices são montados uma vez por sessão)"""
+    return AgenteCaixaCreditoCompleto(armazenamento=ArmazenamentoMemoria())
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Impedimentos e alertas em tabelas filhas: gravação, leitura e migração de bancos antigos"""
+
+import json
+import sqlite3
+
+from armazenamento import ArmazenamentoSQLite, mensagens_resultado, resultado_sem_mensagens
+
+IMPEDIMENTO = "Imóvel em área de risco"
+ALERTA = "Renda comprometida acima de 25%"
+
+
+def _resultado(impedimentos, alertas, score):
+    return {"conforme": not impedimentos and score >= 70, "score_conformidade": score,
+            "impedimentos": impedimentos, "alertas": alertas,
+            "recomendacoes": ["Revisar a documentação"], "detalhes_analise": {"programa": "SBPE"}}
+
+
+def _linha(timestamp, resultado, operacao):
+    return (timestamp, "SBPE", json.dumps(resultado_sem_mensagens(resultado)), "obs", "ana",
+            resultado["score_conformidade"], int(resultado["conforme"]),
+            tuple(mensagens_resultado(resultado)), operacao)
+
+
+def test_mensagens_ficam_no_catalogo_uma_vez_e_a_analise_e_reconstruida():
+    armazenamento = ArmazenamentoSQLite(":memory:")
+    primeira = _resultado([IMPEDIMENTO], [ALERTA], 70.0)
+    segunda = _resultado([], [ALERTA], 95.0)
+    armazenamento.gravar("analises", [_linha("2026-10-01T10:00:00", primeira, "op-1"),
+                                      _linha("2026-10-01T10:00:01", segunda, "op-2")])
+
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM mensagens_conformidade").fetchone()[0] == 2
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM ocorrencias_conformidade").fetchone()[0] == 3
+    assert armazenamento.obter_analise(1)["resultado"] == primeira
+    assert armazenamento.obter_analise(2)["resultado"] == segunda
+    assert [(mensagem, quantidade) for mensagem, _, quantidade
+            in armazenamento.principais_ocorrencias("alerta", "2026-01-01")] == [(ALERTA, 2)]
+
+    exportadas = [linha for pagina in armazenamento.paginas("analises_conformidade") for linha in pagina]
+    assert [(linha[6], linha[7]) for linha in exportadas] == [(IMPEDIMENTO, ALERTA), (None, ALERTA)]
+
+
+def test_banco_antigo_com_resultado_inteiro_em_json_e_migrado(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    antigas = [_resultado([IMPEDIMENTO], [ALERTA], 70.0), _resultado([], [ALERTA, "Prazo acima de 420 meses"], 90.0)]
+    conn = sqlite3.connect(caminho)
+    conn.execute('''
+        CREATE TABLE analises_conformidade (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, tipo_operacao TEXT,
+            resultado TEXT, observacoes TEXT, usuario TEXT, score_conformidade REAL
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO analises_conformidade (timestamp, tipo_operacao, resultado, observacoes, usuario, "
+        "score_conformidade) VALUES (?, 'SBPE', ?, 'obs', 'ana', ?)",
+        [(f"2026-10-01T10:00:0{posicao}", json.dumps(resultado), resultado["score_conformidade"])
+         for posicao, resultado in enumerate(antigas)]
+        + [("2026-10-01T10:00:09", "{corrompido", 50.0)]
+    )
+    conn.commit()
+    conn.close()
+
+    armazenamento = ArmazenamentoSQLite(caminho, diretorio_particoes=str(tmp_path / "particoes"))
+
+    assert armazenamento.conn.execute(
+        "SELECT conforme FROM analises_conformidade ORDER BY id"
+    ).fetchall() == [(0,), (1,), (0,)]
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM mensagens_conformidade").fetchone()[0] == 3
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM ocorrencias_conformidade").fetchone()[0] == 4
+    # O JSON guardado perde as mensagens, que passam a vir das tabelas filhas
+    resultado_gravado = json.loads(armazenamento.conn.execute(
+        "SELECT resultado FROM analises_conformidade WHERE id = 1"
+    ).fetchone()[0])
+    assert "impedimentos" not in resultado_gravado and "alertas" not in resultado_gravado
+
+    assert [armazenamento.obter_analise(id_analise)["resultado"] for id_analise in (1, 2)] == antigas
+    assert armazenamento.obter_analise(3)["resultado"]["impedimentos"] == []
+    assert armazenamento._migrar_analises() == 0
+    armazenamento.fechar()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Armazenamento por locatário: ids globais, decisões entre fragmentos e cursor das sugestões"""
+
+import json
+
+import pytest
+
+from armazenamento import ArmazenamentoFragmentado
+
+ESPACO_IDS = ArmazenamentoFragmentado.ESPACO_IDS
+
+
+def _consulta(segundo, pergunta, usuario):
+    return (f"2026-10-01T10:00:{segundo:02d}", pergunta, f"resposta de {pergunta}", usuario, "tarifas")
+
+
+def _analise(segundo, usuario, operacao, score=100.0):
+    return (f"2026-10-02T10:00:{segundo:02d}", "SBPE", "{}", "obs", usuario, score, int(score >= 70),
+            (("alerta", "Renda comprometida acima de 25%"),) if score < 100 else (), operacao)
+
+
+@pytest.fixture
+def fragmentado(tmp_path):
+    armazenamento = ArmazenamentoFragmentado(str(tmp_path / "locatarios"),
+                                             locatarios={"ana": "agencia-centro", "bia": "agencia-centro"})
+    yield armazenamento
+    armazenamento.fechar()
+
+
+def test_ids_globais_identificam_fragmento_e_id_local(fragmentado):
+    fragmentado.gravar("analises", [_analise(0, "ana", "op-1"), _analise(1, "caio", "op-2", 90.0),
+                                    _analise(2, "bia", "op-3", 95.0)])
+
+    analises = [linha for pagina in fragmentado.paginas("analises_conformidade") for linha in pagina]
+    centro, caio = fragmentado._indice("agencia-centro"), fragmentado._indice("caio")
+    assert [linha[0] for linha in analises] == [centro * ESPACO_IDS + 1, caio * ESPACO_IDS + 1,
+                                                centro * ESPACO_IDS + 2]
+    for linha in analises:
+        assert fragmentado._local(linha[0]) in {(centro, 1), (caio, 1), (centro, 2)}
+        analise = fragmentado.obter_analise(linha[0])
+        assert analise["id"] == linha[0] and analise["usuario"] == linha[3]
+    assert fragmentado.obter_analise(caio * ESPACO_IDS + 2) is None
+    assert fragmentado.obter_analise(99 * ESPACO_IDS + 1) is None
+
+
+def test_decisao_com_id_global_vai_para_o_fragmento_da_analise(fragmentado):
+    fragmentado.gravar("analises", [_analise(0, "ana", "op-1"), _analise(1, "caio", "op-2", 90.0)])
+    id_caio = fragmentado._indice("caio") * ESPACO_IDS + 1
+
+    # Revisão de um analista de outro locatário, com o id global da análise
+    fragmentado.gravar("decisoes", [
+        ("2026-10-03T09:00:00", "revisao_analista", "op-2", id_caio, "{}", "aprovada", "ok", "ana"),
+        ("2026-10-03T09:00:01", "revisao_analista", "op-1", None, "{}", "reprovada", "pendência", "bia")
+    ])
+
+    decisoes = {(linha[2], linha[3]): linha[4]
+                for pagina in fragmentado.paginas("historico_decisoes") for linha in pagina}
+    assert decisoes[("revisao_analista", "op-2")] == decisoes[("conformidade_automatica", "op-2")] == id_caio
+    assert decisoes[("revisao_analista", "op-1")] == decisoes[("conformidade_automatica", "op-1")] == \
+        fragmentado._indice("agencia-centro") * ESPACO_IDS + 1
+
+
+def test_historico_e_buscas_devolvem_ids_globais(fragmentado):
+    fragmentado.gravar("consultas", [_consulta(0, "tarifas sbpe", "ana"), _consulta(1, "tarifas fgts", "caio")])
+
+    historico = fragmentado.historico_consultas()
+    assert [consulta["pergunta"] for consulta in historico] == ["tarifas fgts", "tarifas sbpe"]
+    assert [fragmentado._local(consulta["id"]) for consulta in historico] == \
+        [(fragmentado._indice("caio"), 1), (fragmentado._indice("agencia-centro"), 1)]
+    assert [consulta["id"] for consulta in fragmentado.historico_consultas("bia")] == []
+    assert {consulta["id"] for consulta in fragmentado.buscar_consultas("tarifas")} == \
+        {consulta["id"] for consulta in historico}
+
+
+def test_cursor_das_sugestoes_e_texto_por_fragmento(fragmentado):
+    assert fragmentado.perguntas_frequentes_desde(0, 10) == ("", [])
+    fragmentado.gravar("consultas", [_consulta(0, "tarifas sbpe", "ana"), _consulta(1, "tarifas sbpe", "caio"),
+                                     _consulta(2, "taxa de juros", "bia")])
+
+    cursor, frequentes = fragmentado.perguntas_frequentes_desde(0, 10)
+    assert frequentes == [("tarifas sbpe", 2), ("taxa de juros", 1)]
+    assert fragmentado._decodificar_cursor(cursor) == {
+        fragmentado._indice("agencia-centro"): 2, fragmentado._indice("caio"): 1
+    }
+
+    # O cursor sobrevive a JSON e, sem consultas novas, volta igual
+    cursor = json.loads(json.dumps({"cursor": cursor}))["cursor"]
+    assert fragmentado.perguntas_frequentes_desde(cursor, 10) == (cursor, [])
+
+    # Consultas novas num fragmento e um locatário novo: só elas entram
+    fragmentado.gravar("consultas", [_consulta(3, "taxa de juros", "caio"), _consulta(4, "subsídio", "davi")])
+    novo_cursor, frequentes = fragmentado.perguntas_frequentes_desde(cursor, 10)
+    assert sorted(frequentes) == [("subsídio", 1), ("taxa de juros", 1)]
+    assert fragmentado._decodificar_cursor(novo_cursor) == {
+        fragmentado._indice("agencia-centro"): 2, fragmentado._indice("caio"): 2, fragmentado._indice("davi"): 1
+    }
+
+
+def test_cursor_inteiro_e_recusado(fragmentado):
+    fragmentado.gravar("consultas", [_consulta(0, "tarifas sbpe", "ana")])
+    with pytest.raises(ValueError):
+        fragmentado.perguntas_frequentes_desde(3 * ESPACO_IDS, 10)
+
+
+def test_indices_persistem_ao_reabrir(tmp_path):
+    diretorio = str(tmp_path / "locatarios")
+    primeiro = ArmazenamentoFragmentado(diretorio)
+    primeiro.gravar("analises", [_analise(0, "ana", "op-1"), _analise(1, "caio", "op-2")])
+    ids = [linha[0] for pagina in primeiro.paginas("analises_conformidade") for linha in pagina]
+    primeiro.fechar()
+
+    reaberto = ArmazenamentoFragmentado(diretorio)
+    assert [reaberto.obter_analise(id_analise)["usuario"] for id_analise in ids] == ["ana", "caio"]
+    reaberto.fechar()
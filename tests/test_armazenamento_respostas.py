@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Respostas das consultas gravadas uma vez, comprimidas e endereçadas pelo hash"""
+
+import sqlite3
+import zlib
+
+from armazenamento import ArmazenamentoSQLite
+
+RESPOSTA = "📋 **Tarifas aplicáveis**\n• Tarifa de avaliação do imóvel\n• Tarifa de reavaliação (SBPE)"
+
+
+def _consultas(*respostas):
+    return [(f"2026-10-01T10:00:0{posicao}", f"pergunta {posicao}", resposta, "ana", "tarifas")
+            for posicao, resposta in enumerate(respostas)]
+
+
+def test_resposta_repetida_e_gravada_uma_vez_comprimida():
+    armazenamento = ArmazenamentoSQLite(":memory:")
+    armazenamento.gravar("consultas", _consultas(RESPOSTA, RESPOSTA))
+    armazenamento.gravar("consultas", _consultas(RESPOSTA, "Outra resposta"))
+
+    linhas = armazenamento.conn.execute("SELECT hash, conteudo FROM respostas").fetchall()
+    hashes = [resposta_hash for resposta_hash, in
+              armazenamento.conn.execute("SELECT resposta_hash FROM consultas ORDER BY id")]
+
+    assert len(linhas) == 2
+    assert hashes[0] == hashes[1] == hashes[2] != hashes[3]
+    assert {zlib.decompress(conteudo).decode("utf-8") for _, conteudo in linhas} == {RESPOSTA, "Outra resposta"}
+    assert armazenamento.obter_resposta(hashes[0]) == RESPOSTA
+    assert armazenamento.obter_resposta("0" * 32) is None
+
+
+def test_leituras_devolvem_o_texto_original():
+    armazenamento = ArmazenamentoSQLite(":memory:")
+    armazenamento.gravar("consultas", _consultas(RESPOSTA, "Outra resposta"))
+
+    assert [consulta["resposta"] for consulta in armazenamento.historico_consultas()] == \
+        ["Outra resposta", RESPOSTA]
+    assert [linha[-1] for pagina in armazenamento.paginas("consultas") for linha in pagina] == \
+        [RESPOSTA, "Outra resposta"]
+    assert [resposta["texto"] for resposta in armazenamento.buscar_respostas("reavaliação")] == [RESPOSTA]
+
+
+def test_cache_de_hashes_esvaziado_nao_duplica_respostas():
+    armazenamento = ArmazenamentoSQLite(":memory:")
+    armazenamento.gravar("consultas", _consultas(RESPOSTA))
+    armazenamento._hashes_respostas.clear()
+    armazenamento._respostas_gravadas.clear()
+    armazenamento.gravar("consultas", _consultas(RESPOSTA))
+
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0] == 1
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM busca_respostas").fetchone()[0] == 1
+
+
+def test_banco_antigo_com_resposta_em_texto_e_migrado(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(caminho)
+    conn.execute('''
+        CREATE TABLE consultas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, tipo_consulta TEXT,
+            pergunta TEXT, resposta TEXT, usuario TEXT, categoria TEXT
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO consultas (timestamp, tipo_consulta, pergunta, resposta, usuario, categoria) "
+        "VALUES (?, 'consulta_avancada', ?, ?, 'ana', 'tarifas')",
+        [("2026-10-01T10:00:00", "tarifas", RESPOSTA), ("2026-10-01T10:00:01", "quais tarifas", RESPOSTA),
+         ("2026-10-01T10:00:02", "taxa de juros", "Outra resposta")]
+    )
+    conn.commit()
+    conn.close()
+
+    armazenamento = ArmazenamentoSQLite(caminho, diretorio_particoes=str(tmp_path / "particoes"))
+
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM consultas WHERE resposta IS NOT NULL").fetchone()[0] == 0
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0] == 2
+    assert [consulta["resposta"] for consulta in armazenamento.historico_consultas()] == \
+        ["Outra resposta", RESPOSTA, RESPOSTA]
+    # Nada fica pendente para uma segunda passada
+    assert armazenamento._migrar_respostas() == 0
+    armazenamento.fechar()
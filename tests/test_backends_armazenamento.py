@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Paridade entre os backends de auditoria: o mesmo histórico dá as mesmas leituras"""
+
+import pytest
+
+from armazenamento import (BACKENDS_ARMAZENAMENTO, ArmazenamentoFragmentado, ArmazenamentoMemoria,
+                           ArmazenamentoNulo, ArmazenamentoSQLite, agregados_vazios, criar_armazenamento)
+
+RELATORIOS = ("geral", "consultas", "conformidade", "decisoes")
+
+CONSULTAS = [
+    ("2026-10-01T10:00:00", "tarifas sbpe", "Tarifa de avaliação", "ana", "tarifas"),
+    ("2026-10-01T10:00:01", "tarifas sbpe", "Tarifa de avaliação", "bia", "tarifas"),
+    ("2026-10-01T10:00:02", "taxa de juros", "Taxas efetivas por programa", "ana", "taxas"),
+    ("2026-10-01T10:00:03", "tarifas sbpe", "Tarifa de avaliação", "ana", "tarifas"),
+    ("2026-10-01T10:00:04", "documentos do vendedor", "Documentos pessoais", "caio", "documentacao"),
+    ("2026-10-01T10:00:05", "taxa de juros", "Taxas efetivas por programa", "bia", "taxas")
+]
+
+IMPEDIMENTO = ("impedimento", "Imóvel em área de risco")
+ALERTA = ("alerta", "Renda comprometida acima de 25%")
+
+
+def _analise(segundo, programa, score, mensagens, operacao):
+    return (f"2026-10-02T10:00:{segundo:02d}", programa, '{"recomendacoes": []}', "obs", "ana", score,
+            int(score >= 70 and IMPEDIMENTO not in mensagens), mensagens, operacao)
+
+
+ANALISES = [
+    _analise(0, "SBPE", 100.0, (), "op-1"),
+    _analise(1, "SBPE", 95.0, (ALERTA,), "op-2"),
+    _analise(2, "FGTS", 75.0, (IMPEDIMENTO,), "op-3"),
+    _analise(3, "SBPE", 90.0, (ALERTA, ALERTA), "op-4"),
+    _analise(4, "FGTS", 50.0, (IMPEDIMENTO, IMPEDIMENTO), "op-5"),
+    _analise(5, "PMCMV", 80.0, (ALERTA,), "op-6")
+]
+
+DECISOES = [
+    ("2026-10-03T09:00:00", "revisao_analista", "op-3", None, "{}", "aprovada", "Laudo complementar", "bia"),
+    ("2026-10-03T09:00:01", "revisao_analista", "op-9", None, "{}", "aprovada", "Sem análise", "bia")
+]
+
+
+def _gravar_historico(armazenamento):
+    armazenamento.gravar("consultas", CONSULTAS)
+    armazenamento.gravar("analises", ANALISES)
+    armazenamento.gravar("decisoes", DECISOES)
+    return armazenamento
+
+
+@pytest.fixture
+def backends():
+    sqlite = _gravar_historico(ArmazenamentoSQLite(":memory:"))
+    yield sqlite, _gravar_historico(ArmazenamentoMemoria())
+    sqlite.fechar()
+
+
+@pytest.mark.parametrize("relatorio", RELATORIOS)
+def test_agregados_iguais(backends, relatorio):
+    sqlite, memoria = backends
+    assert memoria.agregar(relatorio, "2026-01-01") == sqlite.agregar(relatorio, "2026-01-01")
+    assert memoria.agregar(relatorio, "2027-01-01") == sqlite.agregar(relatorio, "2027-01-01")
+
+
+@pytest.mark.parametrize("tabela", ["consultas", "analises_conformidade", "historico_decisoes"])
+def test_exportacoes_iguais(backends, tabela):
+    sqlite, memoria = backends
+    assert list(memoria.paginas(tabela, tamanho_pagina=4)) == list(sqlite.paginas(tabela, tamanho_pagina=4))
+    assert list(memoria.paginas(tabela, inicio="2026-10-01T10:00:02", fim="2026-10-02T10:00:03",
+                                usuario="ana")) == \
+        list(sqlite.paginas(tabela, inicio="2026-10-01T10:00:02", fim="2026-10-02T10:00:03", usuario="ana"))
+
+
+def test_leituras_pontuais_iguais(backends):
+    sqlite, memoria = backends
+    for tipo in ("impedimento", "alerta"):
+        assert memoria.principais_ocorrencias(tipo, "2026-01-01") == sqlite.principais_ocorrencias(tipo, "2026-01-01")
+    for id_analise in (1, 3, 6, 7):
+        assert memoria.obter_analise(id_analise) == sqlite.obter_analise(id_analise)
+    for usuario in (None, "ana", "ninguem"):
+        assert memoria.historico_consultas(usuario, limite=4) == sqlite.historico_consultas(usuario, limite=4)
+    assert memoria.perguntas_frequentes_desde(0, 2) == sqlite.perguntas_frequentes_desde(0, 2)
+    assert memoria.perguntas_frequentes_desde(2, 1) == sqlite.perguntas_frequentes_desde(2, 1)
+    assert memoria.perguntas_frequentes_desde(6, 5) == sqlite.perguntas_frequentes_desde(6, 5) == (6, [])
+
+    # A relevância difere (BM25 no SQLite), mas as consultas encontradas são as mesmas
+    assert {consulta["id"] for consulta in memoria.buscar_consultas("tarifas", usuario="ana")} == \
+        {consulta["id"] for consulta in sqlite.buscar_consultas("tarifas", usuario="ana")} == {1, 4}
+    assert [resposta["texto"] for resposta in memoria.buscar_respostas("taxas efetivas")] == \
+        [resposta["texto"] for resposta in sqlite.buscar_respostas("taxas efetivas")] == \
+        ["Taxas efetivas por programa"]
+
+
+def test_backend_nulo_descarta_e_devolve_leituras_vazias():
+    nulo = _gravar_historico(ArmazenamentoNulo())
+
+    for relatorio in RELATORIOS:
+        assert nulo.agregar(relatorio, "2026-01-01") == agregados_vazios(relatorio)
+    assert list(nulo.paginas("consultas")) == []
+    assert nulo.obter_analise(1) is None
+    assert nulo.historico_consultas() == []
+    assert nulo.principais_ocorrencias("alerta", "2026-01-01") == []
+    assert nulo.buscar_consultas("tarifas") == []
+    assert nulo.perguntas_frequentes_desde("1:5", 10) == ("1:5", [])
+    assert nulo.rotacionar() == {"movidas": [], "arquivadas": []}
+
+
+@pytest.mark.parametrize("relatorio", RELATORIOS)
+def test_agregados_de_periodo_vazio_tem_o_formato_de_agregados_vazios(relatorio):
+    sqlite = ArmazenamentoSQLite(":memory:")
+    vazios = agregados_vazios(relatorio)
+    assert ArmazenamentoMemoria().agregar(relatorio, "2026-01-01") == vazios
+    assert sqlite.agregar(relatorio, "2026-01-01").keys() == vazios.keys()
+    sqlite.fechar()
+
+
+def test_criar_armazenamento_pelo_nome(tmp_path):
+    caminho = str(tmp_path / "auditoria.db")
+    tipos = {"sqlite": ArmazenamentoSQLite, "fragmentado": ArmazenamentoFragmentado,
+             "memoria": ArmazenamentoMemoria, "nulo": ArmazenamentoNulo}
+    assert set(tipos) == set(BACKENDS_ARMAZENAMENTO)
+    for nome, tipo in tipos.items():
+        armazenamento = criar_armazenamento(nome, caminho)
+        assert type(armazenamento) is tipo
+        armazenamento.fechar()
+    with pytest.raises(ValueError):
+        criar_armazenamento("postgres", caminho)
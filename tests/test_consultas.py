@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Renderização das consultas: seções e subtópicos escolhidos pela própria pergunta"""
+
+import pytest
+
+
+@pytest.mark.parametrize("curta, longa", [
+    ("quais tarifas?", "Quais são as tarifas aplicáveis?"),
+    ("exigências do tomador", "Quais são as exigências para o tomador?"),
+    ("documentos necessários", "Quais são os documentos necessários?"),
+    ("Qual a tarifa SBPE?", "Qual a tarifa da operação SBPE?")
+])
+def test_versoes_curta_e_longa_renderizam_a_mesma_secao(agente, curta, longa):
+    assert agente._responder(curta) == agente._responder(longa)
+
+
+def test_subtopicos_vem_so_dos_termos_da_pergunta(agente):
+    caminho = agente.SECOES_CONSULTA["tarifas"][0]
+
+    assert agente._selecionar_subtopicos(caminho, "qual a tarifa da operação sbpe?") == ("tarifa_reavaliacao",)
+    assert agente._selecionar_subtopicos(caminho, "quais tarifas?") == \
+        agente._selecionar_subtopicos(caminho, "quais são as tarifas aplicáveis?")
+
+
+@pytest.mark.parametrize("pergunta, categoria", [
+    ("taxa de juros", "financiamento"),
+    ("quais os documentos necessários?", "documentacao"),
+    ("casal pode financiar?", "geral"),
+    ("posso usar meu fundo de garantia?", "programas"),
+    ("Quais são as tarifas aplicáveis em operações SBPE?", "tarifas")
+])
+def test_roteamento_prefere_palavra_chave_inequivoca(agente, pergunta, categoria):
+    assert agente._rotear(pergunta.lower())[0] == categoria
+
+
+def test_trecho_da_busca_semantica_vira_dica_de_secao(agente):
+    resposta, categoria = agente._responder("enquadramento acima de 1,5 milhão")
+
+    assert categoria == "programas"
+    assert "Critérios de Enquadramento" in resposta
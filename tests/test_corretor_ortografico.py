@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Correção ortográfica das consultas, com e sem o léxico opcional do português"""
+
+import pytest
+
+from corretor_ortografico import CorretorOrtografico
+
+
+@pytest.fixture
+def corretor(agente):
+    # Mesmo vocabulário do agente, sem o léxico geral (instalação padrão)
+    sem_lexico = CorretorOrtografico()
+    for termo, grafias in agente.corretor._grafias.items():
+        for forma, frequencia in grafias.items():
+            sem_lexico.adicionar(forma, frequencia)
+    return sem_lexico
+
+
+@pytest.mark.parametrize("digitada, correta", [
+    ("imovl", "imóvel"),
+    ("sbep", "sbpe"),
+    ("amortizaçao", "amortização"),
+    ("finaciamento", "financiamento"),
+    ("financiamneto", "financiamento"),
+    ("vendedr", "vendedor")
+])
+def test_corrige_erros_de_digitacao_sem_lexico(corretor, digitada, correta):
+    assert corretor.corrigir(digitada) == (correta, [(digitada, correta)])
+
+
+@pytest.mark.parametrize("palavra", [
+    "máximo", "cobra", "fiança", "quitar", "limite", "casal", "servidor", "altos", "mínima", "ciente"
+])
+def test_preserva_palavras_validas(corretor, palavra):
+    assert corretor.corrigir(palavra) == (palavra, [])
+
+
+def test_corrige_antes_de_rotear_e_informa_as_correcoes(agente):
+    resposta, categoria = agente._responder("exigencias do imovl")
+
+    assert categoria == "imovel"
+    assert "imovl → imóvel" in resposta
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Decisões automáticas e revisões do analista ligadas à análise da operação"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from armazenamento import ArmazenamentoMemoria, ArmazenamentoSQLite
+
+
+def _analise(timestamp, operacao, conforme):
+    mensagens = () if conforme else (("impedimento", "Imóvel em área de risco"),)
+    return (timestamp, "SBPE", "{}", "obs", "ana", 100.0 if conforme else 75.0, int(conforme), mensagens, operacao)
+
+
+def _revisao(timestamp, operacao, decisao, id_analise=None):
+    return (timestamp, "revisao_analista", operacao, id_analise, "{}", decisao, "Laudo complementar", "bia")
+
+
+def _decisoes(armazenamento, operacao):
+    return [(linha[2], linha[4], linha[5]) for pagina in armazenamento.paginas("historico_decisoes", operacao=operacao)
+            for linha in pagina]
+
+
+@pytest.fixture(params=["sqlite", "memoria"])
+def armazenamento(request, tmp_path):
+    if request.param == "memoria":
+        yield ArmazenamentoMemoria()
+        return
+    armazenamento = ArmazenamentoSQLite(str(tmp_path / "auditoria.db"))
+    yield armazenamento
+    armazenamento.fechar()
+
+
+def test_revisao_sem_id_liga_a_ultima_analise_da_operacao(armazenamento):
+    agora = datetime.now().isoformat()
+    armazenamento.gravar("analises", [_analise(agora, "op-1", False), _analise(agora, "op-2", True)])
+    armazenamento.gravar("decisoes", [_revisao(agora, "op-1", "aprovada"), _revisao(agora, "op-3", "aprovada")])
+
+    assert _decisoes(armazenamento, "op-1") == [
+        ("conformidade_automatica", 1, "reprovada"), ("revisao_analista", 1, "aprovada")
+    ]
+    assert _decisoes(armazenamento, "op-2") == [("conformidade_automatica", 2, "aprovada")]
+    # Operação sem análise registrada: a decisão fica sem ligação
+    assert _decisoes(armazenamento, "op-3") == [("revisao_analista", None, "aprovada")]
+    assert sorted(armazenamento.agregar("decisoes", "2000-01-01")["por_tipo"]) == [
+        ("conformidade_automatica", "aprovada", 1), ("conformidade_automatica", "reprovada", 1),
+        ("revisao_analista", "aprovada", 2)
+    ]
+
+
+def test_revisao_liga_a_analise_ja_movida_para_particao(tmp_path):
+    armazenamento = ArmazenamentoSQLite(str(tmp_path / "auditoria.db"))
+    armazenamento.gravar("analises", [_analise("2020-03-10T09:00:00", "op-1", False),
+                                      _analise("2020-03-11T09:00:00", "op-2", True)])
+    assert armazenamento.rotacionar()["movidas"] == ["2020-03"]
+
+    agora = datetime.now().isoformat()
+    armazenamento.gravar("decisoes", [_revisao(agora, "op-1", "aprovada")])
+    assert _decisoes(armazenamento, "op-1") == [
+        ("conformidade_automatica", 1, "reprovada"), ("revisao_analista", 1, "aprovada")
+    ]
+
+    # Uma nova análise no mês corrente passa a ser a mais recente da operação
+    armazenamento.gravar("analises", [_analise(agora, "op-1", True)])
+    armazenamento.gravar("decisoes", [_revisao(agora, "op-1", "reprovada")])
+    assert _decisoes(armazenamento, "op-1")[-2:] == [
+        ("conformidade_automatica", 3, "aprovada"), ("revisao_analista", 3, "reprovada")
+    ]
+    assert armazenamento.obter_analise(1)["resultado"]["impedimentos"] == ["Imóvel em área de risco"]
+    armazenamento.fechar()
+
+
+def test_agente_registra_o_resultado_automatico_e_a_revisao(agente):
+    dados = {
+        "id_operacao": "teste-decisoes-1",
+        "tomador": {"cpf_regular": True, "brasileiro": True},
+        "imovel": {"area_urbana": True, "matricula_regular": True},
+        "programa": {"tipo": "FGTS", "tempo_fgts_anos": 5},
+        "documentacao": {"completa": True}
+    }
+    resultado = agente.analisar_conformidade_avancada(dados, usuario="ana")
+    agente.registrar_decisao(dados, "aprovada", "Conferido pelo analista", "bia", contexto={"canal": "agencia"})
+
+    decisoes = [linha for pagina in agente.armazenamento.paginas("historico_decisoes", operacao="teste-decisoes-1")
+                for linha in pagina]
+    automatica, revisao = decisoes
+    assert automatica[2] == "conformidade_automatica"
+    assert automatica[5] == ("aprovada" if resultado["conforme"] else "reprovada")
+    assert json.loads(automatica[7]) == {"programa": "FGTS", "score": resultado["score_conformidade"]}
+    assert revisao[2:6] == ("revisao_analista", "teste-decisoes-1", automatica[4], "aprovada")
+    assert agente.armazenamento.obter_analise(automatica[4])["resultado"]["score_conformidade"] == \
+        resultado["score_conformidade"]
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Modelo de score: o padrão reproduz os pesos históricos (25 por impedimento, 5 por alerta, limiar 70)"""
+
+import pytest
+
+from armazenamento import ArmazenamentoMemoria
+from calibracao_score import HistoricoScore, scores_por_analise
+from modelo_score import LIMIAR_PADRAO, ModeloScore
+from rastro_analise import REGRAS_ANALISE
+
+TOMADOR = {"cpf_regular": True, "brasileiro": True}
+IMOVEL = {"area_urbana": True, "matricula_regular": True}
+
+OPERACOES = [
+    {"tomador": TOMADOR, "imovel": IMOVEL, "programa": {"tipo": "SBPE"}},
+    {"tomador": TOMADOR, "imovel": IMOVEL, "programa": {"tipo": "FGTS", "tempo_fgts_anos": 5},
+     "documentacao": {"completa": True}},
+    {"tomador": TOMADOR, "imovel": {"area_urbana": False, "matricula_regular": True},
+     "programa": {"tipo": "FGTS", "tempo_fgts_anos": 5}},
+    {"tomador": TOMADOR, "vendedor": {"tipo": "PF", "maior_idade": False}, "imovel": IMOVEL},
+    {"tomador": {"cpf_regular": False, "brasileiro": False},
+     "imovel": {"area_urbana": False, "matricula_regular": False},
+     "programa": {"tipo": "FGTS", "tempo_fgts_anos": 1}, "documentacao": {"completa": False}}
+]
+
+
+def _score_historico(impedimentos: int, alertas: int) -> float:
+    """Fórmula do agente antes do modelo configurável"""
+    return max(0.0, 100.0 - 25.0 * impedimentos - 5.0 * alertas)
+
+
+@pytest.mark.parametrize("impedimentos, alertas", [(0, 0), (0, 1), (0, 6), (0, 7), (1, 0), (1, 1), (2, 3), (5, 0)])
+def test_modelo_padrao_reproduz_a_formula_historica(impedimentos, alertas):
+    modelo = ModeloScore()
+    # Mensagens de regras conhecidas e textos que nenhuma regra gera pesam igual no padrão
+    mensagens_impedimento = [mensagem for regra in REGRAS_ANALISE if regra[3] == "impedimento" for mensagem in regra[4]]
+    mensagens_alerta = [mensagem for regra in REGRAS_ANALISE if regra[3] == "alerta" for mensagem in regra[4]]
+    impedimentos_texto = (mensagens_impedimento + ["Impedimento antigo"] * impedimentos)[:impedimentos]
+    alertas_texto = (["Alerta antigo"] + mensagens_alerta * alertas)[:alertas]
+    assert (len(impedimentos_texto), len(alertas_texto)) == (impedimentos, alertas)
+
+    score = modelo.pontuar(impedimentos_texto, alertas_texto)
+    assert score == _score_historico(impedimentos, alertas)
+    assert modelo.conforme(score, impedimentos) == (score >= 70.0 and impedimentos == 0)
+
+
+def test_limiar_padrao_e_70():
+    modelo = ModeloScore()
+    assert modelo.limiar == LIMIAR_PADRAO == 70.0
+    assert modelo.conforme(70.0, 0) and not modelo.conforme(69.9, 0) and not modelo.conforme(100.0, 1)
+
+
+def test_analises_do_agente_pontuam_como_antes(agente):
+    for dados in OPERACOES:
+        resultado = agente._avaliar_conformidade(dados)
+        impedimentos, alertas = len(resultado["impedimentos"]), len(resultado["alertas"])
+        assert resultado["score_conformidade"] == _score_historico(impedimentos, alertas)
+        assert resultado["conforme"] == (resultado["score_conformidade"] >= 70.0 and impedimentos == 0)
+
+
+def test_rescore_do_historico_com_o_modelo_padrao_repete_o_gravado(agente):
+    armazenamento = ArmazenamentoMemoria()
+    armazenamento.gravar("analises", [
+        agente._linha_analise(dados, agente._avaliar_conformidade(dados), "ana") for dados in OPERACOES
+    ])
+    gravadas = [(linha[0], linha[4], bool(linha[5]))
+                for pagina in armazenamento.paginas("analises_conformidade") for linha in pagina]
+
+    assert scores_por_analise(HistoricoScore.carregar(armazenamento), ModeloScore()) == gravadas
+
+
+def test_pesos_por_regra_e_configuracao_em_arquivo(tmp_path):
+    regra, _, _, _, mensagens = next(regra for regra in REGRAS_ANALISE if regra[3] == "impedimento")
+    mensagem = mensagens[0]
+    modelo = ModeloScore({regra: 40.0}, limiar=60.0, nome="teste")
+
+    assert modelo.pontuar([mensagem], []) == 60.0
+    assert modelo.pontuar(["Impedimento antigo"], []) == 75.0
+
+    caminho = str(tmp_path / "modelo.json")
+    modelo.salvar(caminho)
+    carregado = ModeloScore.carregar(caminho)
+    assert carregado.para_dict() == modelo.para_dict()
+    assert carregado.pontuar([mensagem], ["Alerta antigo"]) == 55.0
+
+    with pytest.raises(ValueError):
+        ModeloScore({"regra.inexistente": 10.0})
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Partições mensais da auditoria: rotação, leitura através das partições e retenção"""
+
+import os
+from datetime import datetime
+
+import pytest
+
+from armazenamento import ArmazenamentoSQLite
+from particionamento import GerenciadorParticoes
+
+
+def _mes_anterior(meses: int):
+    """(ano, mês) de `meses` meses antes do corrente"""
+    agora = datetime.now()
+    indice = agora.year * 12 + agora.month - 1 - meses
+    return indice // 12, indice % 12 + 1
+
+
+def _consulta(ano, mes, pergunta, usuario="ana"):
+    return (f"{ano:04d}-{mes:02d}-15T10:00:00", pergunta, f"resposta de {pergunta}", usuario, "tarifas")
+
+
+@pytest.fixture
+def armazenamento(tmp_path):
+    armazenamento = ArmazenamentoSQLite(str(tmp_path / "auditoria.db"), meses_retencao=3)
+    yield armazenamento
+    armazenamento.fechar()
+
+
+def test_rotacao_move_os_meses_fechados_e_as_leituras_os_encontram(armazenamento):
+    meses = [_mes_anterior(atraso) for atraso in (2, 1)]
+    armazenamento.gravar("consultas", [_consulta(*meses[0], "tarifas sbpe"), _consulta(*meses[1], "tarifas fgts")])
+    armazenamento.gravar("consultas", [(datetime.now().isoformat(), "taxa de juros", "resposta", "bia", "taxas")])
+
+    assert armazenamento.rotacionar() == {"movidas": [f"{ano:04d}-{mes:02d}" for ano, mes in meses],
+                                          "arquivadas": []}
+    assert armazenamento.particoes.particoes() == meses
+    assert armazenamento.conn.execute("SELECT COUNT(*) FROM consultas").fetchone()[0] == 1
+    assert armazenamento.rotacionar()["movidas"] == []
+
+    assert armazenamento.agregar("geral", "2000-01-01")["consultas"] == 3
+    assert armazenamento.agregar("consultas", "2000-01-01")["usuarios"] == 2
+    assert [consulta["pergunta"] for consulta in armazenamento.historico_consultas()] == \
+        ["taxa de juros", "tarifas fgts", "tarifas sbpe"]
+    assert [consulta["pergunta"] for consulta in armazenamento.historico_consultas(limite=2)] == \
+        ["taxa de juros", "tarifas fgts"]
+    assert [linha[4] for pagina in armazenamento.paginas("consultas") for linha in pagina] == \
+        ["tarifas sbpe", "tarifas fgts", "taxa de juros"]
+    assert len(armazenamento.buscar_consultas("tarifas")) == 2
+
+    # Os ids seguem a sequência global: o cursor das sugestões atravessa as partições
+    cursor, frequentes = armazenamento.perguntas_frequentes_desde(0, 10)
+    assert cursor == 3 and len(frequentes) == 3
+    assert sorted(armazenamento.perguntas_frequentes_desde(1, 10)[1]) == [("tarifas fgts", 1), ("taxa de juros", 1)]
+    assert armazenamento.perguntas_frequentes_desde(3, 10) == (3, [])
+
+
+def test_periodo_com_mais_particoes_que_o_sqlite_anexa(armazenamento):
+    armazenamento.particoes.meses_retencao = None
+    meses = [_mes_anterior(atraso) for atraso in range(1, GerenciadorParticoes.MAX_ANEXADAS + 4)]
+    armazenamento.gravar("consultas", [_consulta(ano, mes, f"pergunta {ano}-{mes}") for ano, mes in meses])
+    armazenamento.gravar("consultas", [_consulta(*meses[0], "pergunta repetida", "bia"),
+                                       _consulta(*meses[-1], "pergunta repetida", "bia")])
+    armazenamento.rotacionar()
+
+    assert len(armazenamento.particoes.particoes()) > GerenciadorParticoes.MAX_ANEXADAS
+    consultas = armazenamento.agregar("consultas", "2000-01-01")
+    assert armazenamento.agregar("geral", "2000-01-01")["consultas"] == len(meses) + 2
+    # Usuários distintos contados sobre a união dos lotes, não somados lote a lote
+    assert consultas["usuarios"] == 2
+    assert consultas["frequentes"][0] == ("pergunta repetida", 2)
+    assert len(armazenamento.historico_consultas(limite=100)) == len(meses) + 2
+    assert armazenamento.perguntas_frequentes_desde(0, 1) == (len(meses) + 2, [("pergunta repetida", 2)])
+
+
+def test_retencao_arquiva_as_particoes_expiradas(armazenamento):
+    meses = [_mes_anterior(atraso) for atraso in range(1, 6)]
+    armazenamento.gravar("consultas", [_consulta(ano, mes, f"consulta antiga {ano} {mes}") for ano, mes in meses])
+
+    arquivadas = armazenamento.rotacionar()["arquivadas"]
+
+    # Retenção de 3 meses: ficam os três mais recentes, os outros vão comprimidos para o arquivo
+    assert armazenamento.particoes.particoes() == sorted(meses[:3])
+    assert sorted(os.path.basename(caminho) for caminho in arquivadas) == [
+        f"auditoria_{ano:04d}_{mes:02d}.db.gz" for ano, mes in sorted(meses[3:])
+    ]
+    assert all(os.path.exists(caminho) for caminho in arquivadas)
+    assert armazenamento.agregar("geral", "2000-01-01")["consultas"] == 3
+    assert len(armazenamento.buscar_consultas("consulta antiga")) == 3
+
+    # Uma partição restaurada volta às leituras
+    ano, mes = meses[-1]
+    armazenamento.particoes.restaurar(ano, mes)
+    assert armazenamento.agregar("geral", "2000-01-01")["consultas"] == 4
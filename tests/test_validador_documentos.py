@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Validador de documentos: matriz por tipo de vendedor, apelidos e componentes entre parênteses"""
+
+import pytest
+
+from validador_documentos import PENDENCIA_TIPO_VENDEDOR
+
+
+@pytest.fixture
+def validador(agente):
+    return agente.validador_documentos
+
+
+def _nomes(validador, programa, operacao, tipo_vendedor):
+    return [nome for _, nome in validador.documentos_exigidos(programa, operacao, tipo_vendedor)]
+
+
+def test_documentos_do_vendedor_dependem_do_tipo(validador):
+    vendedor_pf = {nome for grupo, nome in validador.documentos_exigidos("SBPE", "aquisicao", "PF")
+                   if grupo == "vendedor"}
+    vendedor_pj = {nome for grupo, nome in validador.documentos_exigidos("SBPE", "aquisicao", "PJ")
+                   if grupo == "vendedor"}
+
+    assert "Documentos pessoais do vendedor (PF)" in vendedor_pf - vendedor_pj
+    assert "Documentos empresariais do vendedor (PJ)" in vendedor_pj - vendedor_pf
+
+    entregues = _nomes(validador, "SBPE", "aquisicao", "PF")
+    assert validador.validar("SBPE", "aquisicao", "PF", entregues) == \
+        {"completa": True, "faltantes": {}, "nao_reconhecidos": []}
+    assert validador.validar("SBPE", "aquisicao", "PJ", entregues)["faltantes"] == \
+        {"vendedor": ["Documentos empresariais do vendedor (PJ)"]}
+
+
+def test_aquisicao_sem_tipo_de_vendedor_fica_pendente(validador):
+    exigidos = validador.documentos_exigidos("SBPE", "aquisicao", None)
+    assert exigidos and all(grupo != "vendedor" for grupo, _ in exigidos)
+
+    resultado = validador.validar("SBPE", "aquisicao", None, [nome for _, nome in exigidos])
+    assert resultado["completa"] is False
+    assert resultado["faltantes"] == {"vendedor": [PENDENCIA_TIPO_VENDEDOR]}
+    with pytest.raises(ValueError):
+        validador.exigidos("SBPE", "aquisicao", None)
+
+
+@pytest.mark.parametrize("operacao", ["construcao_individual", "reforma_ampliacao"])
+def test_operacoes_sem_vendedor_aceitam_tipo_ausente(validador, operacao):
+    entregues = _nomes(validador, "SBPE", operacao, None)
+    assert entregues and PENDENCIA_TIPO_VENDEDOR not in entregues
+    assert validador.validar("SBPE", operacao, None, entregues)["completa"] is True
+    assert validador.validar("SBPE", operacao, None, entregues[1:])["faltantes"] == \
+        {"tomador": ["Documentos pessoais (RG, CPF)"]}
+
+
+def test_documento_composto_exige_todos_os_componentes(validador):
+    base = [nome for nome in _nomes(validador, "SBPE", "aquisicao", "PF") if nome != "Documentos pessoais (RG, CPF)"]
+
+    so_rg = validador.validar("SBPE", "aquisicao", "PF", base + ["RG"])
+    assert so_rg["faltantes"] == {"tomador": ["Documentos pessoais (RG, CPF)"]}
+    assert so_rg["nao_reconhecidos"] == []
+    assert validador.validar("SBPE", "aquisicao", "PF", base + ["rg", "CPF"])["completa"] is True
+    assert validador.validar("SBPE", "aquisicao", "PF", {"tomador": ["RG", "CPF"]})["faltantes"].get("tomador") \
+        == [nome for grupo, nome in validador.documentos_exigidos("SBPE", "aquisicao", "PF")
+            if grupo == "tomador" and nome != "Documentos pessoais (RG, CPF)"]
+
+
+def test_documento_reconhecido_pelo_nome_sem_parentese(validador):
+    entregues = [nome.replace("Planta aprovada (para construção)", "Planta aprovada")
+                 for nome in _nomes(validador, "SBPE", "construcao_individual", None)]
+    assert "Planta aprovada" in entregues
+    assert validador.validar("SBPE", "construcao_individual", None, entregues)["completa"] is True
+
+
+def test_documentos_por_grupo_e_itens_nao_reconhecidos(validador):
+    # Numa lista, o nome vale para todos os grupos; num dicionário, só para o grupo indicado
+    exigidos = validador.documentos_exigidos("SBPE", "aquisicao", "PF")
+    por_grupo = {}
+    for grupo, nome in exigidos:
+        if not (grupo == "vendedor" and nome == "Certidões negativas"):
+            por_grupo.setdefault(grupo, []).append(nome)
+    por_grupo["imovel"].append("Boleto do condomínio")
+
+    resultado = validador.validar("SBPE", "aquisicao", "PF", por_grupo)
+    assert resultado["faltantes"] == {"vendedor": ["Certidões negativas"]}
+    assert resultado["nao_reconhecidos"] == ["imovel: Boleto do condomínio"]
+
+
+def test_lote_isola_combinacao_invalida(validador):
+    entregues = _nomes(validador, "FGTS", "aquisicao", "PJ")
+    resultados = validador.validar_lote([
+        {"programa": "FGTS", "operacao": "aquisicao", "tipo_vendedor": "PJ", "documentos": entregues},
+        {"programa": "INEXISTENTE", "operacao": "aquisicao", "tipo_vendedor": "PF", "documentos": entregues},
+        {"programa": "FGTS", "tipo_vendedor": None, "documentos": entregues}
+    ])
+
+    assert resultados[0]["completa"] is True
+    assert "erro" in resultados[1]
+    assert resultados[2]["faltantes"] == {"vendedor": [PENDENCIA_TIPO_VENDEDOR]}
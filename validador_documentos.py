@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Validador de documentação do Agente Colaborativo CAIXA
+Matriz pré-calculada (programa, operação, tipo de vendedor) -> documentos exigidos, em bitsets
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from normalizacao_texto import tokenizar
+
+# Operação -> (itens de documentacao["imovel"] exigidos, (modalidade, lista) em modalidades_construcao)
+OPERACOES_DOCUMENTACAO: Dict[str, Tuple[Sequence[str], Optional[Tuple[str, str]]]] = {
+    "aquisicao": (
+        ("Certidão de matrícula individualizada e atualizada", "IPTU", "Escritura ou contrato de compra e venda"),
+        None
+    ),
+    "construcao_individual": (
+        # O licenciamento de obra vem da lista da modalidade
+        ("Certidão de matrícula individualizada e atualizada", "IPTU", "Planta aprovada (para construção)"),
+        ("construcao_individual", "documentos_necessarios")
+    ),
+    "reforma_ampliacao": (
+        ("Certidão de matrícula individualizada e atualizada", "IPTU"),
+        ("reforma_ampliacao", "exigencias")
+    )
+}
+
+# O manual pede "Documentos pessoais (PF) ou empresariais (PJ)": no validador o item vira um por tipo de vendedor
+ITENS_POR_TIPO_VENDEDOR: Dict[str, Dict[str, str]] = {
+    "Documentos pessoais (PF) ou empresariais (PJ)": {
+        "PF": "Documentos pessoais do vendedor (PF)",
+        "PJ": "Documentos empresariais do vendedor (PJ)"
+    }
+}
+
+# None: operação sem vendedor (construção ou reforma em imóvel próprio)
+TIPOS_VENDEDOR = ("PF", "PJ", None)
+
+# Operações com vendedor: sem o tipo informado, a documentação dele fica pendente (não há linha None na matriz)
+OPERACOES_COM_VENDEDOR = frozenset({"aquisicao"})
+PENDENCIA_TIPO_VENDEDOR = "Tipo do vendedor (PF ou PJ) não informado"
+
+# Combinação da matriz: (programa, operação, tipo de vendedor)
+ChaveDocumentacao = Tuple[str, str, Optional[str]]
+
+# Complemento entre parênteses no nome do documento: "Documentos pessoais (RG, CPF)"
+_RE_PARENTESES = re.compile(r"\s*\(([^)]*)\)")
+
+
+def _chave_texto(texto: str) -> str:
+    return " ".join(tokenizar(texto))
+
+
+class ValidadorDocumentos:
+    """Documentos exigidos por combinação, guardados como bitsets
+
+    Cada documento de cada grupo (tomador, vendedor, imóvel, modalidade,
+    programa) ganha um bit; na construção, a matriz (programa, operação, tipo
+    de vendedor) -> bitset dos exigidos é montada por inteiro. Validar uma
+    entrega é converter os documentos recebidos em bitset (uma busca em
+    dicionário por item) e fazer `exigidos & ~entregues`.
+
+    Além do nome da base, cada documento é reconhecido pelo nome sem o
+    parêntese ("Planta aprovada") e, se o parêntese lista componentes
+    ("RG, CPF"), por cada componente; o documento conta como entregue
+    quando todos os componentes chegam.
+    """
+
+    # Textos distintos guardados no cache de normalização antes de ele ser esvaziado
+    LIMITE_CACHE_TEXTOS = 100_000
+
+    def __init__(self, documentacao: Dict, modalidades_construcao: Dict, programas: Iterable[str]):
+        self._nomes: List[str] = []
+        self._grupos: List[str] = []
+        # (grupo, texto normalizado) -> bit; texto normalizado -> bits do mesmo nome em todos os grupos
+        self._bits: Dict[Tuple[str, str], int] = {}
+        self._bits_por_texto: Dict[str, int] = {}
+        # (grupo ou None, texto normalizado) -> bits dos documentos pelo nome sem parêntese / dos componentes
+        self._apelidos: Dict[Tuple[Optional[str], str], int] = {}
+        self._componentes: Dict[Tuple[Optional[str], str], int] = {}
+        # Documento composto: (bit do documento, bits de todos os componentes)
+        self._compostos: List[Tuple[int, int]] = []
+        self._total_componentes = 0
+        # (grupo, texto recebido) -> (bitset, bits de componentes), para não normalizar de novo itens repetidos
+        self._cache_textos: Dict[Tuple[Optional[str], str], Tuple[int, int]] = {}
+
+        tomador = self._mascara_grupo(documentacao["tomador"], "tomador")
+        vendedor = {
+            tipo: self._mascara_grupo(
+                [ITENS_POR_TIPO_VENDEDOR.get(item, {}).get(tipo, item) for item in documentacao["vendedor"]],
+                "vendedor"
+            )
+            for tipo in TIPOS_VENDEDOR if tipo is not None
+        }
+        vendedor[None] = 0
+        self._mascara_vendedor = vendedor["PF"] | vendedor["PJ"]
+        especificas = documentacao.get("especificas_programa", {})
+
+        self.matriz: Dict[ChaveDocumentacao, int] = {}
+        for operacao, (itens_imovel, modalidade) in OPERACOES_DOCUMENTACAO.items():
+            desconhecidos = set(itens_imovel) - set(documentacao["imovel"])
+            if desconhecidos:
+                raise ValueError(f"Documentos do imóvel ausentes da base: {sorted(desconhecidos)}")
+            base_operacao = tomador | self._mascara_grupo(itens_imovel, "imovel")
+            if modalidade is not None:
+                nome_modalidade, lista = modalidade
+                base_operacao |= self._mascara_grupo(modalidades_construcao[nome_modalidade][lista], "modalidade")
+            for programa in programas:
+                do_programa = self._mascara_grupo(especificas.get(programa, []), "programa")
+                for tipo in TIPOS_VENDEDOR:
+                    if tipo is None and operacao in OPERACOES_COM_VENDEDOR:
+                        continue
+                    self.matriz[(programa, operacao, tipo)] = base_operacao | do_programa | vendedor[tipo]
+
+    def _mascara_grupo(self, itens: Iterable[str], grupo: str) -> int:
+        mascara = 0
+        for item in itens:
+            chave = _chave_texto(item)
+            bit = self._bits.get((grupo, chave))
+            if bit is None:
+                bit = self._bits[(grupo, chave)] = len(self._nomes)
+                self._nomes.append(item)
+                self._grupos.append(grupo)
+                self._bits_por_texto[chave] = self._bits_por_texto.get(chave, 0) | 1 << bit
+                self._indexar_apelidos(grupo, item, bit)
+            mascara |= 1 << bit
+        return mascara
+
+    def _indexar_apelidos(self, grupo: str, item: str, bit: int):
+        """Reconhece o documento pelo nome sem o parêntese e, numa lista entre parênteses, por componente"""
+        parenteses = _RE_PARENTESES.search(item)
+        if parenteses is None:
+            return
+        nome = _chave_texto(_RE_PARENTESES.sub("", item))
+        if nome:
+            for chave in ((grupo, nome), (None, nome)):
+                self._apelidos[chave] = self._apelidos.get(chave, 0) | 1 << bit
+
+        partes = [parte for parte in (_chave_texto(texto) for texto in parenteses.group(1).split(",")) if parte]
+        if len(partes) < 2:
+            return
+        componentes = 0
+        for parte in partes:
+            componente = 1 << self._total_componentes
+            self._total_componentes += 1
+            for chave in ((grupo, parte), (None, parte)):
+                self._componentes[chave] = self._componentes.get(chave, 0) | componente
+            componentes |= componente
+        self._compostos.append((1 << bit, componentes))
+
+    def exigidos(self, programa: str, operacao: str, tipo_vendedor: Optional[str] = None) -> int:
+        """Bitset dos documentos exigidos na combinação"""
+        try:
+            return self.matriz[(programa, operacao, tipo_vendedor)]
+        except KeyError:
+            raise ValueError(
+                f"Combinação sem matriz documental: programa={programa}, operação={operacao}, "
+                f"vendedor={tipo_vendedor}"
+            ) from None
+
+    def _exigidos_conhecidos(self, programa: str, operacao: str,
+                             tipo_vendedor: Optional[str]) -> Tuple[int, bool]:
+        """Bitset dos exigidos e se a documentação do vendedor está pendente do tipo dele"""
+        if tipo_vendedor is None and operacao in OPERACOES_COM_VENDEDOR:
+            # Os documentos do vendedor dependem do tipo: exige-se o restante e o tipo fica pendente
+            return self.exigidos(programa, operacao, "PF") & ~self._mascara_vendedor, True
+        return self.exigidos(programa, operacao, tipo_vendedor), False
+
+    def documentos_exigidos(self, programa: str, operacao: str,
+                            tipo_vendedor: Optional[str] = None) -> List[Tuple[str, str]]:
+        """(grupo, documento) exigidos na combinação, na ordem da base
+
+        Numa aquisição sem tipo de vendedor, os documentos do vendedor ficam de fora.
+        """
+        mascara, _ = self._exigidos_conhecidos(programa, operacao, tipo_vendedor)
+        return [(self._grupos[bit], self._nomes[bit]) for bit in range(len(self._nomes)) if mascara >> bit & 1]
+
+    def _bits_texto(self, grupo: Optional[str], texto: str) -> Tuple[int, int]:
+        chave = (grupo, texto)
+        bits = self._cache_textos.get(chave)
+        if bits is None:
+            normalizado = _chave_texto(texto)
+            if grupo is None:
+                documentos = self._bits_por_texto.get(normalizado, 0)
+            else:
+                bit = self._bits.get((grupo, normalizado))
+                documentos = 0 if bit is None else 1 << bit
+            bits = (documentos or self._apelidos.get((grupo, normalizado), 0),
+                    self._componentes.get((grupo, normalizado), 0))
+            if len(self._cache_textos) >= self.LIMITE_CACHE_TEXTOS:
+                self._cache_textos.clear()
+            self._cache_textos[chave] = bits
+        return bits
+
+    def mascara(self, documentos: Union[Iterable[str], Dict[str, Iterable[str]]]) -> Tuple[int, List[str]]:
+        """Bitset dos documentos entregues e itens que não correspondem a nenhum documento da base
+
+        `documentos` é uma lista (o nome vale para todos os grupos que exigem
+        um documento com esse nome) ou um dicionário grupo -> lista.
+        """
+        if isinstance(documentos, dict):
+            itens = [(grupo, texto) for grupo, textos in documentos.items() for texto in textos]
+        else:
+            itens = [(None, texto) for texto in documentos]
+        mascara = 0
+        componentes = 0
+        nao_reconhecidos = []
+        for grupo, texto in itens:
+            bits, partes = self._bits_texto(grupo, texto)
+            if bits or partes:
+                mascara |= bits
+                componentes |= partes
+            else:
+                nao_reconhecidos.append(texto if grupo is None else f"{grupo}: {texto}")
+        for bit_documento, bits_componentes in self._compostos:
+            if componentes & bits_componentes == bits_componentes:
+                mascara |= bit_documento
+        return mascara, nao_reconhecidos
+
+    def validar(self, programa: str, operacao: str, tipo_vendedor: Optional[str],
+                documentos: Union[Iterable[str], Dict[str, Iterable[str]]]) -> Dict:
+        """Documentos faltantes (por grupo) para a combinação
+
+        Numa aquisição sem tipo de vendedor, o grupo do vendedor traz
+        `PENDENCIA_TIPO_VENDEDOR` no lugar dos documentos dele.
+        """
+        entregues, nao_reconhecidos = self.mascara(documentos)
+        exigidos, tipo_pendente = self._exigidos_conhecidos(programa, operacao, tipo_vendedor)
+        faltantes = exigidos & ~entregues
+        por_grupo: Dict[str, List[str]] = {}
+        while faltantes:
+            bit = (faltantes & -faltantes).bit_length() - 1
+            por_grupo.setdefault(self._grupos[bit], []).append(self._nomes[bit])
+            faltantes &= faltantes - 1
+        if tipo_pendente:
+            por_grupo.setdefault("vendedor", []).append(PENDENCIA_TIPO_VENDEDOR)
+        return {
+            "completa": not por_grupo,
+            "faltantes": por_grupo,
+            "nao_reconhecidos": nao_reconhecidos
+        }
+
+    def validar_lote(self, pedidos: Iterable[Dict]) -> List[Dict]:
+        """Valida uma fila de pedidos {"programa", "operacao", "tipo_vendedor", "documentos"}
+
+        Um pedido com combinação inválida recebe `erro` no resultado sem interromper a fila.
+        """
+        resultados = []
+        for pedido in pedidos:
+            try:
+                resultados.append(self.validar(pedido.get("programa"), pedido.get("operacao", "aquisicao"),
+                                               pedido.get("tipo_vendedor"), pedido.get("documentos", [])))
+            except ValueError as erro:
+                resultados.append({"completa": False, "faltantes": {}, "nao_reconhecidos": [], "erro": str(erro)})
+        return resultados